@@ -0,0 +1,161 @@
+import logging
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Hashable, List, Optional
+
+from pymongo import ReturnDocument
+
+logger = logging.getLogger(__name__)
+
+
+class TTLCache:
+    """Bounded in-process cache with per-entry TTL and LRU eviction.
+
+    Meant for the single event loop of one worker, so it does no locking.
+    Each worker keeps its own copy, which is why entries expire quickly.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 30.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple[float, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return default
+
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._data[key]
+            self.misses += 1
+            return default
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        if self.maxsize <= 0:
+            return
+        self._data[key] = (time.monotonic() + (ttl if ttl is not None else self.ttl), value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._data.pop(key, None)
+        return entry[1] if entry else default
+
+    def keys(self) -> list:
+        return list(self._data)
+
+    def values(self) -> list:
+        """Live (unexpired) values, without touching LRU order or counters"""
+        now = time.monotonic()
+        return [value for expires_at, value in self._data.values() if expires_at >= now]
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def __contains__(self, key: Hashable) -> bool:
+        entry = self._data.get(key)
+        return entry is not None and entry[0] >= time.monotonic()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+
+class MongoLRUCache:
+    """Base for caches kept in a collection shared by all workers, with a
+    small per-worker TTLCache (L1) in front.
+
+    Lookups record last_hit_at, and every trim_every stores the collection
+    is trimmed to max_entries, evicting the least recently hit entries
+    first. Subclasses name the key field and count their own evictions.
+    """
+
+    key_field = "hash"
+    label = "Cache"
+    # Extra fields read from evicted entries for _evicted
+    victim_fields: tuple = ()
+
+    def __init__(self, collection, max_entries: int, l1_size: int, l1_ttl: float, trim_every: int = 50):
+        self.collection = collection
+        self.max_entries = max_entries
+        self.l1 = TTLCache(maxsize=l1_size, ttl=l1_ttl)
+        self.trim_every = trim_every
+        self._stores_since_trim = 0
+
+    async def _find(self, key: str, projection: dict) -> Optional[dict]:
+        """The stored entry for key, recording the hit; None on a miss or error"""
+        try:
+            # One round trip both reads the entry and records the hit for LRU
+            return await self.collection.find_one_and_update(
+                {self.key_field: key},
+                {"$set": {"last_hit_at": datetime.now(timezone.utc)}, "$inc": {"hits": 1}},
+                projection=projection,
+                return_document=ReturnDocument.AFTER
+            )
+        except Exception as e:
+            logger.error(f"{self.label} lookup failed: {e}")
+            return None
+
+    async def _store(self, key: str, fields: dict) -> None:
+        """Upsert an entry, trimming the collection every trim_every stores"""
+        try:
+            await self.collection.update_one({self.key_field: key}, {"$set": fields}, upsert=True)
+        except Exception as e:
+            logger.error(f"{self.label} update failed: {e}")
+            return
+
+        self._stores_since_trim += 1
+        if self._stores_since_trim >= self.trim_every:
+            self._stores_since_trim = 0
+            await self.trim()
+
+    async def trim(self) -> int:
+        """Evict least recently hit entries beyond max_entries"""
+        if self.max_entries <= 0:
+            return 0
+        try:
+            excess = await self.collection.estimated_document_count() - self.max_entries
+            if excess <= 0:
+                return 0
+
+            projection = {"_id": 0, self.key_field: 1, **{field: 1 for field in self.victim_fields}}
+            victims = await self.collection.find(
+                {}, projection
+            ).sort("last_hit_at", 1).limit(excess).to_list(excess)
+            keys = [v[self.key_field] for v in victims]
+            result = await self.collection.delete_many({self.key_field: {"$in": keys}})
+        except Exception as e:
+            logger.error(f"{self.label} trim failed: {e}")
+            return 0
+
+        for key in keys:
+            self.l1.pop(key)
+        self._evicted(victims, result.deleted_count)
+        logger.info(f"{self.label}: evicted {result.deleted_count} entries")
+        return result.deleted_count
+
+    def _evicted(self, victims: List[dict], deleted: int) -> None:
+        """Hook for counting evictions"""
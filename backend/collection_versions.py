@@ -0,0 +1,87 @@
+import hashlib
+import uuid
+from typing import Iterable, Optional
+
+from fastapi import Request, Response
+
+from data_access import etag_matches
+from dependencies import db
+
+# Lists that carry version counters. Scopes are household or user ids:
+# whatever the list's household_id (or a recipe's author_id) holds.
+RECIPES = "recipes"
+MEAL_PLANS = "meal_plans"
+SHOPPING_LISTS = "shopping_lists"
+MEMBERS = "members"
+
+# Clients may keep list responses but must revalidate them every time
+LIST_CACHE_CONTROL = "private, no-cache"
+
+
+class CollectionVersions:
+    """Per-scope counters bumped on every write to a list, so list reads can
+    answer If-None-Match from one tiny document instead of the list itself.
+
+    Writers bump after their write lands: a reader that sees the new
+    version is then sure to read the new data. A reader racing a write at
+    worst tags new data with the old version and refetches next time.
+    """
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    async def bump(self, name: str, *scopes: Optional[str]) -> None:
+        for scope in {s for s in scopes if s}:
+            await self.collection.update_one(
+                {"scope": scope},
+                # A new epoch if the counters are ever lost, so old tags can't match again
+                {"$inc": {name: 1}, "$setOnInsert": {"epoch": uuid.uuid4().hex}},
+                upsert=True
+            )
+
+    async def etag(self, name: str, scopes: Iterable[Optional[str]], *vary) -> str:
+        """Weak ETag for a list over scopes; vary adds anything else the
+        response depends on (query parameters, the caller's favorites, the hour)
+        """
+        scopes = sorted({s for s in scopes if s})
+        versions = {
+            doc["scope"]: f"{doc.get('epoch')}.{doc[name]}"
+            async for doc in self.collection.find(
+                {"scope": {"$in": scopes}}, {"_id": 0, "scope": 1, "epoch": 1, name: 1}
+            )
+            if name in doc
+        }
+        key = "|".join([name, *(f"{s}={versions.get(s, '-')}" for s in scopes), *map(str, vary)])
+        return f'W/"{hashlib.blake2b(key.encode(), digest_size=12).hexdigest()}"'
+
+    async def conditional_get(
+        self,
+        request: Request,
+        response: Response,
+        name: str,
+        scopes: Iterable[Optional[str]],
+        *vary
+    ) -> Optional[Response]:
+        """A 304 when the client already has the current list; otherwise
+        None, with the ETag set on the response for the full read
+        """
+        tag = await self.etag(name, scopes, request.url.path, *vary)
+        headers = {"ETag": tag, "Cache-Control": LIST_CACHE_CONTROL}
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match and etag_matches(if_none_match, tag):
+            return Response(status_code=304, headers=headers)
+        response.headers.update(headers)
+        return None
+
+
+def list_scope(user: dict) -> str:
+    """Scope of household lists (meal plans, shopping lists)"""
+    return user.get("household_id") or user["id"]
+
+
+def recipe_scopes(doc: dict) -> tuple:
+    """Scopes whose recipe lists can include a recipe"""
+    return doc.get("author_id"), doc.get("household_id")
+
+
+collection_versions = CollectionVersions(db.collection_versions)
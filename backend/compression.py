@@ -0,0 +1,41 @@
+from starlette.datastructures import Headers
+from starlette.middleware.gzip import GZipMiddleware, GZipResponder
+from starlette.types import Message, Receive, Scope, Send
+
+from streaming import NDJSON_MEDIA_TYPE
+
+COMPRESSIBLE_TYPES = ("application/json", "text/", "application/javascript", "image/svg+xml")
+# Gzip holds streamed events back until its buffer fills, so streams go out as-is
+STREAMED_TYPES = (NDJSON_MEDIA_TYPE, "text/event-stream")
+
+
+def compressible(headers: Headers) -> bool:
+    """JSON and text bodies; not images (already compressed) or byte ranges"""
+    content_type = headers.get("content-type", "")
+    if "content-range" in headers or content_type.startswith(STREAMED_TYPES):
+        return False
+    return content_type.startswith(COMPRESSIBLE_TYPES)
+
+
+class SelectiveGZipResponder(GZipResponder):
+    passthrough = False
+
+    async def send_with_gzip(self, message: Message) -> None:
+        if message["type"] == "http.response.start" and not compressible(Headers(raw=message["headers"])):
+            self.passthrough = True
+        if self.passthrough:
+            # Includes http.response.pathsend, which GZipResponder would drop
+            await self.send(message)
+            return
+        await super().send_with_gzip(message)
+
+
+class SelectiveGZipMiddleware(GZipMiddleware):
+    """GZipMiddleware that only compresses responses where it pays off"""
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http" and "gzip" in Headers(scope=scope).get("Accept-Encoding", ""):
+            responder = SelectiveGZipResponder(self.app, self.minimum_size, compresslevel=self.compresslevel)
+            await responder(scope, receive, send)
+            return
+        await self.app(scope, receive, send)
@@ -16,9 +16,112 @@ class Settings:
         # Embedded LLM (GPT4All) - runs completely offline
         self.embedded_model: str = os.getenv("EMBEDDED_MODEL", "Phi-3-mini-4k-instruct.Q4_0.gguf")
         self.embedded_models_path: str = os.getenv("EMBEDDED_MODELS_PATH", "./models")
+        # Requests allowed to wait for the embedded model before 429s
+        self.embedded_queue_size: int = int(os.getenv("EMBEDDED_QUEUE_SIZE", "8"))
+        # Models kept loaded at once, bounded by count and by estimated RAM
+        self.embedded_max_models: int = int(os.getenv("EMBEDDED_MAX_MODELS", "2"))
+        self.embedded_ram_budget_gb: float = float(os.getenv("EMBEDDED_RAM_BUDGET_GB", "8"))
+        # Load the default model at startup so the first request doesn't pay for it
+        self.embedded_warmup: bool = os.getenv(
+            "EMBEDDED_WARMUP", str(self.llm_provider == "embedded")
+        ).lower() == "true"
 
         self.cors_origins: str = os.getenv("CORS_ORIGINS", "*")
+        # Gzip JSON and text responses of at least this many bytes (0 disables)
+        self.gzip_minimum_size: int = int(os.getenv("GZIP_MINIMUM_SIZE", "1024"))
+        self.gzip_level: int = int(os.getenv("GZIP_LEVEL", "6"))
 
         self.upload_dir: str = os.getenv("UPLOAD_DIR", "uploads")
+        # Recipe photos: upload size cap, output formats (skipped if Pillow
+        # can't encode them), resize worker processes and a decode pixel cap
+        self.image_max_upload_bytes: int = int(os.getenv("IMAGE_MAX_UPLOAD_BYTES", str(15 * 1024 * 1024)))
+        self.image_formats: str = os.getenv("IMAGE_FORMATS", "webp,avif")
+        self.image_workers: int = int(os.getenv("IMAGE_WORKERS", "2"))
+        self.image_max_pixels: int = int(os.getenv("IMAGE_MAX_PIXELS", str(50_000_000)))
+        # Upload storage: "local" (UPLOAD_DIR) or "s3" (any S3-compatible store;
+        # set S3_ENDPOINT_URL for MinIO). Without S3_PUBLIC_URL, downloads
+        # redirect to presigned URLs valid for S3_URL_EXPIRES seconds. Older
+        # uploads not named by hash keep being served from UPLOAD_DIR
+        self.storage_backend: str = os.getenv("STORAGE_BACKEND", "local").lower()
+        self.s3_bucket: str = os.getenv("S3_BUCKET", "")
+        self.s3_endpoint_url: str | None = os.getenv("S3_ENDPOINT_URL") or None
+        self.s3_region: str | None = os.getenv("S3_REGION") or None
+        self.s3_access_key_id: str | None = os.getenv("S3_ACCESS_KEY_ID") or None
+        self.s3_secret_access_key: str | None = os.getenv("S3_SECRET_ACCESS_KEY") or None
+        self.s3_public_url: str | None = os.getenv("S3_PUBLIC_URL") or None
+        self.s3_url_expires: int = int(os.getenv("S3_URL_EXPIRES", "3600"))
+
+        # In-process cache of authenticated users (per worker)
+        self.user_cache_ttl: float = float(os.getenv("USER_CACHE_TTL", "30"))
+        self.user_cache_size: int = int(os.getenv("USER_CACHE_SIZE", "2048"))
+
+        # In-process recipe search indexes, one per visible recipe library
+        self.search_index_ttl: float = float(os.getenv("SEARCH_INDEX_TTL", "300"))
+        self.search_index_size: int = int(os.getenv("SEARCH_INDEX_SIZE", "256"))
+        # Fridge search: share of a recipe's ingredients on hand to count as a
+        # match, and how many near matches to report
+        self.fridge_min_coverage: float = float(os.getenv("FRIDGE_MIN_COVERAGE", "0.6"))
+        self.fridge_max_results: int = int(os.getenv("FRIDGE_MAX_RESULTS", "50"))
+
+        # Tonight's suggestions: points for liked/disliked and quick/moderate/slow
+        # recipes, and a penalty fading over TONIGHT_RECENT_DAYS after cooking one
+        self.tonight_liked_weight: float = float(os.getenv("TONIGHT_LIKED_WEIGHT", "30"))
+        self.tonight_disliked_weight: float = float(os.getenv("TONIGHT_DISLIKED_WEIGHT", "50"))
+        self.tonight_quick_weight: float = float(os.getenv("TONIGHT_QUICK_WEIGHT", "20"))
+        self.tonight_moderate_weight: float = float(os.getenv("TONIGHT_MODERATE_WEIGHT", "10"))
+        self.tonight_slow_weight: float = float(os.getenv("TONIGHT_SLOW_WEIGHT", "10"))
+        self.tonight_recent_weight: float = float(os.getenv("TONIGHT_RECENT_WEIGHT", "25"))
+        self.tonight_recent_days: float = float(os.getenv("TONIGHT_RECENT_DAYS", "7"))
+
+        # Coalesce identical LLM calls across workers with a Mongo lease
+        self.llm_lease_enabled: bool = os.getenv("LLM_LEASE_ENABLED", "false").lower() == "true"
+        self.llm_lease_ttl: float = float(os.getenv("LLM_LEASE_TTL", "180"))
+
+        # LLM response cache: Mongo TTL and size cap, plus a per-worker L1
+        self.llm_cache_ttl: int = int(os.getenv("LLM_CACHE_TTL", str(30 * 24 * 3600)))
+        self.llm_cache_max_entries: int = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "10000"))
+        self.llm_cache_l1_size: int = int(os.getenv("LLM_CACHE_L1_SIZE", "256"))
+        self.llm_cache_l1_ttl: float = float(os.getenv("LLM_CACHE_L1_TTL", "300"))
+
+        # Outbound HTTP: one connection pool per LLM provider plus one for page fetches
+        self.http_connect_timeout: float = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+        self.http_pool_timeout: float = float(os.getenv("HTTP_POOL_TIMEOUT", "10"))
+        self.http_keepalive_expiry: float = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30"))
+        self.http2_enabled: bool = os.getenv("HTTP2_ENABLED", "true").lower() == "true"
+        self.llm_read_timeout: float = float(os.getenv("LLM_READ_TIMEOUT", "120"))
+        self.llm_max_connections: int = int(os.getenv("LLM_MAX_CONNECTIONS", "20"))
+        self.llm_max_keepalive: int = int(os.getenv("LLM_MAX_KEEPALIVE", "10"))
+        # Ollama serves a handful of generations at once (OLLAMA_NUM_PARALLEL)
+        self.ollama_max_connections: int = int(os.getenv("OLLAMA_MAX_CONNECTIONS", "4"))
+        self.fetch_read_timeout: float = float(os.getenv("FETCH_READ_TIMEOUT", "30"))
+        # Whole download, however slowly the bytes trickle in (the read
+        # timeout only bounds the gap between chunks)
+        self.fetch_total_timeout: float = float(os.getenv("FETCH_TOTAL_TIMEOUT", "60"))
+        self.fetch_max_connections: int = int(os.getenv("FETCH_MAX_CONNECTIONS", "20"))
+        # Imported pages are cut off after this many bytes
+        self.fetch_max_bytes: int = int(os.getenv("FETCH_MAX_BYTES", str(2 * 1024 * 1024)))
+
+        # Imported pages: served without a request while fresh, then revalidated
+        # with a conditional GET; Mongo TTL (since last import) and size cap, plus a per-worker L1
+        self.page_cache_fresh_for: float = float(os.getenv("PAGE_CACHE_FRESH_FOR", str(24 * 3600)))
+        self.page_cache_ttl: int = int(os.getenv("PAGE_CACHE_TTL", str(30 * 24 * 3600)))
+        self.page_cache_max_entries: int = int(os.getenv("PAGE_CACHE_MAX_ENTRIES", "5000"))
+        self.page_cache_l1_size: int = int(os.getenv("PAGE_CACHE_L1_SIZE", "128"))
+
+        # Batch recipe import: size cap, concurrent page fetches, and LLM calls
+        # in flight per provider (embedded always runs one at a time)
+        self.batch_import_max_items: int = int(os.getenv("BATCH_IMPORT_MAX_ITEMS", "200"))
+        self.batch_fetch_concurrency: int = int(os.getenv("BATCH_FETCH_CONCURRENCY", "8"))
+        self.batch_llm_concurrency: int = int(os.getenv("BATCH_LLM_CONCURRENCY", "4"))
+        self.batch_insert_size: int = int(os.getenv("BATCH_INSERT_SIZE", "25"))
+
+        # Background jobs: runs per job type per worker, heartbeat, and how long
+        # a silent job waits before another worker takes it over
+        self.job_concurrency: int = int(os.getenv("JOB_CONCURRENCY", "2"))
+        self.job_heartbeat_interval: float = float(os.getenv("JOB_HEARTBEAT_INTERVAL", "15"))
+        self.job_stale_after: float = float(os.getenv("JOB_STALE_AFTER", "60"))
+        self.job_max_attempts: int = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+        # Finished jobs are removed by a TTL index after this long
+        self.job_result_ttl: int = int(os.getenv("JOB_RESULT_TTL", str(7 * 24 * 3600)))
 
 settings = Settings()
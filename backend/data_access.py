@@ -0,0 +1,96 @@
+import base64
+from typing import Iterable, Optional, TypedDict
+
+from fastapi import HTTPException
+
+from dependencies import db
+
+# Existence and permission checks only need these few fields; recipes and
+# shopping lists carry ingredients/items that can run to tens of KB.
+RECIPE_REF_FIELDS = ("id", "author_id", "household_id")
+SHOPPING_LIST_REF_FIELDS = ("id", "household_id")
+
+
+class RecipeRef(TypedDict, total=False):
+    id: str
+    author_id: str
+    household_id: Optional[str]
+    title: str
+
+
+class ShoppingListRef(TypedDict, total=False):
+    id: str
+    household_id: Optional[str]
+
+
+def etag(doc: dict) -> str:
+    """Version tag of a document, derived from its updated_at"""
+    token = base64.urlsafe_b64encode(str(doc.get("updated_at") or "").encode()).decode().rstrip("=")
+    return f'"{token}"'
+
+
+def etag_matches(header: str, etag: str) -> bool:
+    """If-None-Match comparison (weak, so W/ prefixes are ignored)"""
+    if header.strip() == "*":
+        return True
+    tags = [tag.strip().removeprefix("W/") for tag in header.split(",")]
+    return etag.removeprefix("W/") in tags
+
+
+def if_match_filter(if_match: Optional[str]) -> dict:
+    """Extra filter making an update apply only to the version the client saw.
+
+    Empty when there is no If-Match header (or it is "*"), so updates stay
+    unconditional for clients that don't send one.
+    """
+    if not if_match or if_match.strip() == "*":
+        return {}
+    token = if_match.split(",")[0].strip()
+    if token.startswith("W/"):
+        token = token[2:]
+    token = token.strip('"')
+    try:
+        updated_at = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)).decode()
+    except ValueError:
+        raise HTTPException(status_code=412, detail="Invalid If-Match header")
+    return {"updated_at": updated_at}
+
+
+def projection(fields: Iterable[str]) -> dict:
+    return {"_id": 0, **{field: 1 for field in fields}}
+
+
+async def recipe_exists(recipe_id: str) -> bool:
+    return await db.recipes.find_one({"id": recipe_id}, projection(["id"])) is not None
+
+
+async def get_recipe_ref(recipe_id: str, fields: Iterable[str] = RECIPE_REF_FIELDS) -> RecipeRef:
+    """Just the requested fields of a recipe; 404 if it doesn't exist"""
+    recipe = await db.recipes.find_one({"id": recipe_id}, projection(["id", *fields]))
+    if not recipe:
+        raise HTTPException(status_code=404, detail="Recipe not found")
+    return recipe
+
+
+async def get_own_recipe_ref(recipe_id: str, user: dict, fields: Iterable[str] = RECIPE_REF_FIELDS) -> RecipeRef:
+    """Ownership fields of a recipe the user authored; 404 or 403 otherwise"""
+    recipe = await get_recipe_ref(recipe_id, fields)
+    if recipe.get("author_id") != user["id"]:
+        raise HTTPException(status_code=403, detail="Not authorized")
+    return recipe
+
+
+async def require_recipe(recipe_id: str) -> None:
+    if not await recipe_exists(recipe_id):
+        raise HTTPException(status_code=404, detail="Recipe not found")
+
+
+async def get_shopping_list_ref(list_id: str, user: dict) -> ShoppingListRef:
+    """Ownership fields of a shopping list in the user's household; 404 or 403 otherwise"""
+    shopping_list = await db.shopping_lists.find_one({"id": list_id}, projection(SHOPPING_LIST_REF_FIELDS))
+    if not shopping_list:
+        raise HTTPException(status_code=404, detail="Shopping list not found")
+
+    if shopping_list.get("household_id") != user.get("household_id") and shopping_list.get("household_id") != user["id"]:
+        raise HTTPException(status_code=403, detail="Not authorized")
+    return shopping_list
@@ -2,15 +2,24 @@ from fastapi import Depends, HTTPException
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from motor.motor_asyncio import AsyncIOMotorClient
 from config import settings
+from cache import TTLCache
+from singleflight import SingleFlight, MongoLease
+from llm_cache import LLMCache
+from page_cache import PageCache
+from inference import InferenceQueue, PRIORITY_BACKGROUND
+from model_registry import EmbeddedModelRegistry, GB
+from http_clients import ProviderClients
 import jwt
 import bcrypt
 import httpx
 import logging
 import asyncio
 import hashlib
-import time
+import json
+import threading
+import weakref
 from datetime import datetime, timezone, timedelta
-from typing import Optional
+from typing import AsyncIterator, Optional
 
 # Setup Logging
 logging.basicConfig(
@@ -39,13 +48,26 @@ def create_token(user_id: str) -> str:
     }
     return jwt.encode(payload, settings.jwt_secret, algorithm=settings.jwt_algorithm)
 
+# Authenticated user documents, keyed by user id. Handlers that modify a
+# user document must call invalidate_user() so the change is seen at once.
+user_cache = TTLCache(maxsize=settings.user_cache_size, ttl=settings.user_cache_ttl)
+
+def invalidate_user(*user_ids: str) -> None:
+    for user_id in user_ids:
+        user_cache.pop(user_id)
+
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
     try:
         payload = jwt.decode(credentials.credentials, settings.jwt_secret, algorithms=[settings.jwt_algorithm])
-        user = await db.users.find_one({"id": payload["user_id"]}, {"_id": 0})
-        if not user:
-            raise HTTPException(status_code=401, detail="User not found")
-        return user
+        user_id = payload["user_id"]
+        user = user_cache.get(user_id)
+        if user is None:
+            user = await db.users.find_one({"id": user_id}, {"_id": 0})
+            if not user:
+                raise HTTPException(status_code=401, detail="User not found")
+            user_cache.set(user_id, user)
+        # Hand out a copy so a handler can't alter the cached document
+        return dict(user)
     except jwt.ExpiredSignatureError:
         raise HTTPException(status_code=401, detail="Token expired")
     except jwt.InvalidTokenError:
@@ -53,73 +75,156 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
 
 # LLM Helpers
 
-# Global GPT4All model instance (lazy loaded)
-_embedded_model = None
-_embedded_model_name = None
+llm_cache = LLMCache(
+    db.llm_cache,
+    max_entries=settings.llm_cache_max_entries,
+    l1_size=settings.llm_cache_l1_size,
+    l1_ttl=settings.llm_cache_l1_ttl
+)
+
+page_cache = PageCache(
+    db.page_cache,
+    max_entries=settings.page_cache_max_entries,
+    fresh_for=settings.page_cache_fresh_for,
+    l1_size=settings.page_cache_l1_size
+)
+
+# Identical prompts in flight at the same time share one provider call
+llm_flight = SingleFlight()
+llm_lease = MongoLease(db.llm_leases, ttl=settings.llm_lease_ttl)
+
+OPENAI_MODEL = "gpt-4o"
+ANTHROPIC_MODEL = "claude-sonnet-4-20250514"
+
+def _http_profile(max_connections: int, read_timeout: float, http2: bool, **extra) -> dict:
+    return {
+        "max_connections": max_connections,
+        "max_keepalive": min(settings.llm_max_keepalive, max_connections),
+        "keepalive_expiry": settings.http_keepalive_expiry,
+        "read_timeout": read_timeout,
+        "http2": http2 and settings.http2_enabled,
+        **extra
+    }
+
+# Separate pools so a backlog on one upstream doesn't queue the others.
+# Ollama is plain HTTP/1.1 on the local network; the hosted APIs speak HTTP/2.
+provider_clients = ProviderClients(
+    profiles={
+        "openai": _http_profile(settings.llm_max_connections, settings.llm_read_timeout, http2=True),
+        "anthropic": _http_profile(settings.llm_max_connections, settings.llm_read_timeout, http2=True),
+        "ollama": _http_profile(settings.ollama_max_connections, settings.llm_read_timeout, http2=False),
+        "fetch": _http_profile(
+            settings.fetch_max_connections, settings.fetch_read_timeout, http2=True, follow_redirects=True
+        ),
+    },
+    connect_timeout=settings.http_connect_timeout,
+    pool_timeout=settings.http_pool_timeout
+)
+
+# AsyncOpenAI wrappers are reused per httpx client instead of rebuilt per call
+_openai_clients: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+def get_openai_client(client: httpx.AsyncClient):
+    from openai import AsyncOpenAI
+
+    api_key = settings.openai_api_key
+    if not api_key:
+        raise HTTPException(status_code=500, detail="OpenAI API key not configured")
+
+    openai_client = _openai_clients.get(client)
+    if openai_client is None or openai_client.api_key != api_key:
+        # No SDK retries: a pool wait would be repeated on top of the pool
+        # timeout, and saturation is reported to the caller as a 503 instead
+        openai_client = AsyncOpenAI(
+            api_key=api_key, http_client=client, timeout=provider_clients.timeout("openai"),
+            max_retries=0
+        )
+        _openai_clients[client] = openai_client
+    return openai_client
+
+def provider_busy() -> HTTPException:
+    return HTTPException(
+        status_code=503,
+        detail="AI provider connections are saturated. Please try again shortly.",
+        headers={"Retry-After": str(max(1, int(settings.http_pool_timeout)))}
+    )
+
+def is_pool_timeout(error: BaseException) -> bool:
+    """Whether an SDK error was caused by waiting for a pooled connection.
+
+    The OpenAI SDK wraps httpx errors (APITimeoutError from PoolTimeout),
+    so the cause chain is checked rather than the exception type.
+    """
+    while error is not None:
+        if isinstance(error, httpx.PoolTimeout):
+            return True
+        error = error.__cause__ or error.__context__
+    return False
+
+# Embedded model loads and generations run one at a time on this queue's
+# own thread, away from the default executor used for password hashing
+inference_queue = InferenceQueue(max_queue=settings.embedded_queue_size, name="embedded-llm")
+
+# Loaded GPT4All models, shared by every user of this worker
+embedded_models = EmbeddedModelRegistry(
+    models_path=settings.embedded_models_path,
+    max_models=settings.embedded_max_models,
+    ram_budget_bytes=int(settings.embedded_ram_budget_gb * GB)
+)
 
 def get_embedded_model(model_name: str):
-    """Get or create the embedded GPT4All model instance"""
-    global _embedded_model, _embedded_model_name
-    
-    if _embedded_model is None or _embedded_model_name != model_name:
-        try:
-            from gpt4all import GPT4All
-            import os
-            
-            # Ensure models directory exists
-            models_path = settings.embedded_models_path
-            os.makedirs(models_path, exist_ok=True)
-            
-            logger.info(f"Loading embedded model: {model_name}")
-            _embedded_model = GPT4All(
-                model_name=model_name,
-                model_path=models_path,
-                allow_download=True,
-                verbose=False
-            )
-            _embedded_model_name = model_name
-            logger.info(f"Embedded model loaded successfully")
-        except Exception as e:
-            logger.error(f"Failed to load embedded model: {e}")
-            raise HTTPException(status_code=500, detail=f"Failed to load embedded model: {str(e)}")
-    
-    return _embedded_model
+    """Get a loaded embedded GPT4All model, loading it if it isn't resident"""
+    try:
+        return embedded_models.get(model_name)
+    except Exception as e:
+        logger.error(f"Failed to load embedded model: {e}")
+        raise HTTPException(status_code=500, detail=f"Failed to load embedded model: {str(e)}")
 
 
-async def call_embedded(
-    system_prompt: str,
-    user_prompt: str,
-    model_name: str = None
-) -> str:
-    """Call embedded GPT4All model - runs completely offline"""
+async def warm_up_embedded_model(model_name: str = None) -> None:
+    """Load a model on the inference thread ahead of the first request"""
+    model_name = model_name or settings.embedded_model
     try:
-        model_name = model_name or settings.embedded_model
-        model = get_embedded_model(model_name)
-        
-        # Combine prompts for the model
-        full_prompt = f"""### System:
+        await inference_queue.run(get_embedded_model, model_name, priority=PRIORITY_BACKGROUND)
+    except Exception as e:
+        logger.warning(f"Embedded model warm-up failed: {e}")
+
+
+def embedded_prompt(system_prompt: str, user_prompt: str) -> str:
+    """Combine prompts for the embedded model"""
+    return f"""### System:
 {system_prompt}
 
 ### User:
 {user_prompt}
 
 ### Assistant:"""
-        
-        # Run in thread pool to not block async
-        import asyncio
-        loop = asyncio.get_event_loop()
-        
-        response = await loop.run_in_executor(
-            None,
-            lambda: model.generate(
-                full_prompt,
-                max_tokens=2000,
-                temp=0.7,
-                top_p=0.9,
-            )
+
+
+async def call_embedded(
+    system_prompt: str,
+    user_prompt: str,
+    model_name: str = None
+) -> str:
+    """Call embedded GPT4All model - runs completely offline"""
+    model_name = model_name or settings.embedded_model
+    full_prompt = embedded_prompt(system_prompt, user_prompt)
+
+    def generate():
+        # Loading happens on the inference thread too, never on the event loop
+        model = get_embedded_model(model_name)
+        return model.generate(
+            full_prompt,
+            max_tokens=2000,
+            temp=0.7,
+            top_p=0.9,
         )
-        
+
+    try:
+        response = await inference_queue.run(generate)
         return response.strip()
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Embedded LLM error: {e}")
         raise HTTPException(status_code=500, detail=f"Embedded AI error: {str(e)}")
@@ -132,16 +237,10 @@ async def call_openai(
 ) -> str:
     """Call OpenAI directly"""
     try:
-        from openai import AsyncOpenAI
-
-        api_key = settings.openai_api_key
-        if not api_key:
-            raise HTTPException(status_code=500, detail="OpenAI API key not configured")
-
-        openai_client = AsyncOpenAI(api_key=api_key, http_client=client)
+        openai_client = get_openai_client(client)
 
         response = await openai_client.chat.completions.create(
-            model="gpt-4o",
+            model=OPENAI_MODEL,
             messages=[
                 {"role": "system", "content": system_prompt},
                 {"role": "user", "content": user_prompt}
@@ -151,7 +250,11 @@ async def call_openai(
         )
 
         return response.choices[0].message.content
+    except HTTPException:
+        raise
     except Exception as e:
+        if is_pool_timeout(e):
+            raise provider_busy()
         logger.error(f"OpenAI error: {e}")
         raise HTTPException(status_code=500, detail=f"AI service error: {str(e)}")
 
@@ -175,14 +278,14 @@ async def call_anthropic(
                 "content-type": "application/json"
             },
             json={
-                "model": "claude-sonnet-4-20250514",
+                "model": ANTHROPIC_MODEL,
                 "max_tokens": 2000,
                 "system": system_prompt,
                 "messages": [
                     {"role": "user", "content": user_prompt}
                 ]
             },
-            timeout=120.0
+            timeout=provider_clients.timeout("anthropic")
         )
 
         if response.status_code != 200:
@@ -193,6 +296,8 @@ async def call_anthropic(
         content = result.get("content", [])
         text_parts = [block.get("text", "") for block in content if block.get("type") == "text"]
         return "".join(text_parts)
+    except httpx.PoolTimeout:
+        raise provider_busy()
     except httpx.ConnectError:
         raise HTTPException(status_code=503, detail="Cannot connect to Anthropic API")
     except Exception as e:
@@ -219,7 +324,7 @@ async def call_ollama_with_config(
                     "num_predict": 2000,
                 }
             },
-            timeout=120.0
+            timeout=provider_clients.timeout("ollama")
         )
 
         if response.status_code != 200:
@@ -227,6 +332,8 @@ async def call_ollama_with_config(
 
         result = response.json()
         return result.get("response", "")
+    except httpx.PoolTimeout:
+        raise provider_busy()
     except httpx.ConnectError:
         raise HTTPException(
             status_code=503,
@@ -236,6 +343,222 @@ async def call_ollama_with_config(
         logger.error(f"Ollama error: {e}")
         raise HTTPException(status_code=500, detail=f"Local LLM error: {str(e)}")
 
+async def stream_embedded(
+    system_prompt: str,
+    user_prompt: str,
+    model_name: str = None
+) -> AsyncIterator[str]:
+    """Stream tokens from the embedded GPT4All model as they are generated"""
+    model_name = model_name or settings.embedded_model
+    full_prompt = embedded_prompt(system_prompt, user_prompt)
+
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+    stop = threading.Event()
+    finished = object()
+
+    def produce():
+        try:
+            model = get_embedded_model(model_name)
+            for token in model.generate(full_prompt, max_tokens=2000, temp=0.7, top_p=0.9, streaming=True):
+                if stop.is_set():
+                    break
+                loop.call_soon_threadsafe(queue.put_nowait, token)
+        except Exception as e:
+            loop.call_soon_threadsafe(queue.put_nowait, e)
+        finally:
+            loop.call_soon_threadsafe(queue.put_nowait, finished)
+
+    # Raises 429 before anything is streamed if the queue is full
+    producer = inference_queue.submit(produce)
+    try:
+        while True:
+            item = await queue.get()
+            if item is finished:
+                break
+            if isinstance(item, Exception):
+                logger.error(f"Embedded LLM error: {item}")
+                raise HTTPException(status_code=500, detail=f"Embedded AI error: {str(item)}")
+            yield item
+    finally:
+        # Stops generation early if the consumer went away; a request that
+        # never left the queue is dropped by the worker
+        stop.set()
+        if not producer.done():
+            producer.cancel()
+
+
+async def stream_openai(
+    client: httpx.AsyncClient,
+    system_prompt: str,
+    user_prompt: str
+) -> AsyncIterator[str]:
+    """Stream tokens from OpenAI"""
+    openai_client = get_openai_client(client)
+    try:
+        stream = await openai_client.chat.completions.create(
+            model=OPENAI_MODEL,
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt}
+            ],
+            temperature=0.7,
+            max_tokens=2000,
+            stream=True
+        )
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+    except HTTPException:
+        raise
+    except Exception as e:
+        if is_pool_timeout(e):
+            raise provider_busy()
+        logger.error(f"OpenAI error: {e}")
+        raise HTTPException(status_code=500, detail=f"AI service error: {str(e)}")
+
+
+async def stream_anthropic(
+    client: httpx.AsyncClient,
+    system_prompt: str,
+    user_prompt: str
+) -> AsyncIterator[str]:
+    """Stream tokens from the Anthropic Messages API (server-sent events)"""
+    api_key = settings.anthropic_api_key
+    if not api_key:
+        raise HTTPException(status_code=500, detail="Anthropic API key not configured")
+
+    try:
+        async with client.stream(
+            "POST",
+            "https://api.anthropic.com/v1/messages",
+            headers={
+                "x-api-key": api_key,
+                "anthropic-version": "2023-06-01",
+                "content-type": "application/json"
+            },
+            json={
+                "model": ANTHROPIC_MODEL,
+                "max_tokens": 2000,
+                "system": system_prompt,
+                "messages": [
+                    {"role": "user", "content": user_prompt}
+                ],
+                "stream": True
+            },
+            timeout=provider_clients.timeout("anthropic")
+        ) as response:
+            if response.status_code != 200:
+                body = await response.aread()
+                raise HTTPException(status_code=500, detail=f"Anthropic error: {body.decode(errors='replace')}")
+
+            async for line in response.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                event = json.loads(line[5:])
+                if event.get("type") == "content_block_delta":
+                    delta = event.get("delta", {})
+                    if delta.get("type") == "text_delta":
+                        yield delta.get("text", "")
+                elif event.get("type") == "error":
+                    raise HTTPException(status_code=500, detail=f"Anthropic error: {event.get('error')}")
+    except httpx.PoolTimeout:
+        raise provider_busy()
+    except httpx.ConnectError:
+        raise HTTPException(status_code=503, detail="Cannot connect to Anthropic API")
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Anthropic error: {e}")
+        raise HTTPException(status_code=500, detail=f"Claude AI error: {str(e)}")
+
+
+async def stream_ollama(
+    client: httpx.AsyncClient,
+    system_prompt: str,
+    user_prompt: str,
+    url: str,
+    model: str
+) -> AsyncIterator[str]:
+    """Stream tokens from Ollama (newline-delimited JSON)"""
+    try:
+        async with client.stream(
+            "POST",
+            f"{url}/api/generate",
+            json={
+                "model": model,
+                "prompt": f"{system_prompt}\n\nUser: {user_prompt}\n\nAssistant:",
+                "stream": True,
+                "options": {
+                    "temperature": 0.7,
+                    "num_predict": 2000,
+                }
+            },
+            timeout=provider_clients.timeout("ollama")
+        ) as response:
+            if response.status_code != 200:
+                body = await response.aread()
+                raise HTTPException(status_code=500, detail=f"Ollama error: {body.decode(errors='replace')}")
+
+            async for line in response.aiter_lines():
+                if not line.strip():
+                    continue
+                chunk = json.loads(line)
+                if chunk.get("error"):
+                    raise HTTPException(status_code=500, detail=f"Ollama error: {chunk['error']}")
+                if chunk.get("response"):
+                    yield chunk["response"]
+                if chunk.get("done"):
+                    break
+    except httpx.PoolTimeout:
+        raise provider_busy()
+    except httpx.ConnectError:
+        raise HTTPException(
+            status_code=503,
+            detail="Cannot connect to Ollama. Make sure Ollama is running locally (ollama serve)"
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Ollama error: {e}")
+        raise HTTPException(status_code=500, detail=f"Local LLM error: {str(e)}")
+
+
+async def resolve_llm_config(user_id: str = None) -> dict:
+    """Provider settings for a user, falling back to the server defaults"""
+    config = {
+        "provider": settings.llm_provider,
+        "ollama_url": settings.ollama_url,
+        "ollama_model": settings.ollama_model,
+        "embedded_model": settings.embedded_model
+    }
+
+    if user_id:
+        user_settings = await db.llm_settings.find_one({"user_id": user_id}, {"_id": 0})
+        if user_settings:
+            for key in config:
+                config[key] = user_settings.get(key, config[key])
+
+    return config
+
+def llm_cache_key(system_prompt: str, user_prompt: str, config: dict) -> str:
+    key_content = f"{system_prompt}|{user_prompt}|{config['provider']}"
+    if config["provider"] == 'ollama':
+        key_content += f"|{config['ollama_url']}|{config['ollama_model']}"
+    elif config["provider"] == 'embedded':
+        key_content += f"|{config['embedded_model']}"
+
+    return hashlib.sha256(key_content.encode()).hexdigest()
+
+def llm_model_name(config: dict) -> str:
+    if config["provider"] == 'embedded':
+        return config["embedded_model"]
+    if config["provider"] == 'ollama':
+        return config["ollama_model"]
+    if config["provider"] == 'anthropic':
+        return ANTHROPIC_MODEL
+    return OPENAI_MODEL
+
 async def call_llm(
     client: httpx.AsyncClient,
     system_prompt: str,
@@ -244,67 +567,83 @@ async def call_llm(
 ) -> str:
     """Call LLM - routes to Embedded, Ollama, OpenAI, or Claude based on user config"""
     # Get user-specific settings if available
-    provider = settings.llm_provider
-    ollama_url = settings.ollama_url
-    ollama_model = settings.ollama_model
-    embedded_model = settings.embedded_model
-
-    if user_id:
-        user_settings = await db.llm_settings.find_one({"user_id": user_id}, {"_id": 0})
-        if user_settings:
-            provider = user_settings.get("provider", provider)
-            ollama_url = user_settings.get("ollama_url", ollama_url)
-            ollama_model = user_settings.get("ollama_model", ollama_model)
-            embedded_model = user_settings.get("embedded_model", embedded_model)
+    config = await resolve_llm_config(user_id)
+    provider = config["provider"]
 
     # Calculate Cache Key
-    key_content = f"{system_prompt}|{user_prompt}|{provider}"
-    if provider == 'ollama':
-        key_content += f"|{ollama_url}|{ollama_model}"
-    elif provider == 'embedded':
-        key_content += f"|{embedded_model}"
-
-    cache_hash = hashlib.sha256(key_content.encode()).hexdigest()
+    cache_hash = llm_cache_key(system_prompt, user_prompt, config)
 
     # Check cache
-    try:
-        cached = await db.llm_cache.find_one({"hash": cache_hash})
-        if cached and cached.get("response"):
-            return cached["response"]
-    except Exception as e:
-        logger.error(f"Cache lookup failed: {e}")
+    cached = await llm_cache.get(cache_hash, provider)
+    if cached is not None:
+        return cached
+
+    # Provider calls use that provider's own connection pool
+    client = provider_clients.client_for(provider, fallback=client)
+
+    async def generate() -> str:
+        # Route to appropriate provider
+        if provider == 'embedded':
+            result = await call_embedded(system_prompt, user_prompt, config["embedded_model"])
+        elif provider == 'ollama':
+            result = await call_ollama_with_config(
+                client, system_prompt, user_prompt, config["ollama_url"], config["ollama_model"]
+            )
+        elif provider == 'anthropic':
+            result = await call_anthropic(client, system_prompt, user_prompt)
+        else:  # openai
+            result = await call_openai(client, system_prompt, user_prompt)
+
+        # Store in cache
+        await llm_cache.put(cache_hash, result, provider, llm_model_name(config))
+
+        return result
+
+    async def generate_once() -> str:
+        if settings.llm_lease_enabled:
+            return await llm_lease.run(
+                cache_hash, generate, lambda key: llm_cache.get(key, provider)
+            )
+        return await generate()
+
+    return await llm_flight.do(cache_hash, generate_once)
 
-    # Route to appropriate provider
+async def stream_llm(
+    client: httpx.AsyncClient,
+    system_prompt: str,
+    user_prompt: str,
+    user_id: str = None
+) -> AsyncIterator[str]:
+    """Like call_llm, but yields tokens as the provider produces them.
+
+    A cached response is yielded as a single chunk. A completed stream is
+    written to the LLM cache so later calls (streamed or not) reuse it.
+    """
+    config = await resolve_llm_config(user_id)
+    provider = config["provider"]
+    cache_hash = llm_cache_key(system_prompt, user_prompt, config)
+
+    cached = await llm_cache.get(cache_hash, provider)
+    if cached is not None:
+        yield cached
+        return
+
+    client = provider_clients.client_for(provider, fallback=client)
     if provider == 'embedded':
-        result = await call_embedded(system_prompt, user_prompt, embedded_model)
-        model_used = embedded_model
+        tokens = stream_embedded(system_prompt, user_prompt, config["embedded_model"])
     elif provider == 'ollama':
-        result = await call_ollama_with_config(client, system_prompt, user_prompt, ollama_url, ollama_model)
-        model_used = ollama_model
+        tokens = stream_ollama(client, system_prompt, user_prompt, config["ollama_url"], config["ollama_model"])
     elif provider == 'anthropic':
-        result = await call_anthropic(client, system_prompt, user_prompt)
-        model_used = "claude-sonnet-4-20250514"
+        tokens = stream_anthropic(client, system_prompt, user_prompt)
     else:  # openai
-        result = await call_openai(client, system_prompt, user_prompt)
-        model_used = "gpt-4o"
+        tokens = stream_openai(client, system_prompt, user_prompt)
 
-    # Store in cache
-    try:
-        await db.llm_cache.update_one(
-            {"hash": cache_hash},
-            {"$set": {
-                "hash": cache_hash,
-                "response": result,
-                "created_at": time.time(),
-                "provider": provider,
-                "model": model_used
-            }},
-            upsert=True
-        )
-    except Exception as e:
-        logger.error(f"Cache update failed: {e}")
+    parts = []
+    async for token in tokens:
+        parts.append(token)
+        yield token
 
-    return result
+    await llm_cache.put(cache_hash, "".join(parts), provider, llm_model_name(config))
 
 def clean_llm_json(text: str) -> str:
     """Clean markdown code blocks from LLM response"""
@@ -0,0 +1,151 @@
+import logging
+from typing import Dict, Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+class _TrackedStream(httpx.AsyncByteStream):
+    """Response body wrapper that reports when the connection is released"""
+
+    def __init__(self, stream: httpx.AsyncByteStream, on_close):
+        self._stream = stream
+        self._on_close = on_close
+        self._closed = False
+
+    async def __aiter__(self):
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self) -> None:
+        try:
+            await self._stream.aclose()
+        finally:
+            if not self._closed:
+                self._closed = True
+                self._on_close()
+
+
+class InstrumentedTransport(httpx.AsyncHTTPTransport):
+    """Connection pool transport that counts in-flight requests and pool timeouts.
+
+    A request counts as in flight from send until its body is closed, so
+    streamed generations hold their slot for as long as they hold the
+    connection. Requests waiting for a free connection count too, which
+    is why saturation can go above 1.
+    """
+
+    def __init__(self, max_connections: int, **kwargs):
+        super().__init__(**kwargs)
+        self.max_connections = max_connections
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.requests = 0
+        self.pool_timeouts = 0
+        self.errors = 0
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        self.requests += 1
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            response = await super().handle_async_request(request)
+        except httpx.PoolTimeout:
+            self.in_flight -= 1
+            self.pool_timeouts += 1
+            raise
+        except Exception:
+            self.in_flight -= 1
+            self.errors += 1
+            raise
+
+        response.stream = _TrackedStream(response.stream, self._release)
+        return response
+
+    def _release(self) -> None:
+        self.in_flight -= 1
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": self.in_flight,
+            "peak_in_flight": self.peak_in_flight,
+            "max_connections": self.max_connections,
+            "saturation": round(self.in_flight / self.max_connections, 2) if self.max_connections else 0,
+            "requests": self.requests,
+            "pool_timeouts": self.pool_timeouts,
+            "errors": self.errors
+        }
+
+
+class ProviderClients:
+    """One pooled httpx client per upstream, so slow Ollama generations
+    can't starve OpenAI/Anthropic calls or page fetches of connections.
+
+    Clients are created on first use and closed together at shutdown.
+    """
+
+    def __init__(self, profiles: Dict[str, dict], connect_timeout: float, pool_timeout: float):
+        self.profiles = profiles
+        self.connect_timeout = connect_timeout
+        self.pool_timeout = pool_timeout
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+        self._transports: Dict[str, InstrumentedTransport] = {}
+
+    def timeout(self, name: str) -> httpx.Timeout:
+        """Separate connect/pool timeouts from the (long) read timeout"""
+        return httpx.Timeout(
+            self.profiles[name]["read_timeout"],
+            connect=self.connect_timeout,
+            pool=self.pool_timeout
+        )
+
+    def get(self, name: str) -> httpx.AsyncClient:
+        client = self._clients.get(name)
+        if client is None or client.is_closed:
+            profile = self.profiles[name]
+            http2 = profile.get("http2", False) and HTTP2_AVAILABLE
+            limits = httpx.Limits(
+                max_connections=profile["max_connections"],
+                max_keepalive_connections=profile["max_keepalive"],
+                keepalive_expiry=profile["keepalive_expiry"]
+            )
+            transport = InstrumentedTransport(
+                max_connections=profile["max_connections"],
+                limits=limits,
+                http2=http2,
+                retries=1
+            )
+            client = httpx.AsyncClient(
+                transport=transport,
+                timeout=self.timeout(name),
+                follow_redirects=profile.get("follow_redirects", False)
+            )
+            self._clients[name] = client
+            self._transports[name] = transport
+            logger.info(f"Created {name} HTTP client (http2={http2}, max_connections={profile['max_connections']})")
+        return client
+
+    def client_for(self, name: str, fallback: Optional[httpx.AsyncClient] = None) -> httpx.AsyncClient:
+        """Pooled client for a provider, or fallback for providers without a profile"""
+        if name in self.profiles:
+            return self.get(name)
+        return fallback
+
+    async def aclose(self) -> None:
+        for client in self._clients.values():
+            await client.aclose()
+        self._clients.clear()
+        self._transports.clear()
+
+    def stats(self) -> dict:
+        return {
+            "http2_available": HTTP2_AVAILABLE,
+            "pools": {name: transport.stats() for name, transport in self._transports.items()}
+        }
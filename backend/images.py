@@ -0,0 +1,267 @@
+import asyncio
+import hashlib
+import logging
+import os
+import re
+import shutil
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import aiofiles
+from fastapi import HTTPException, UploadFile
+
+from config import settings
+from storage import LocalStorage, Storage, storage
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 64 * 1024
+
+# Named sizes (max width in px): grid thumbnails, recipe cards, detail view
+VARIANT_WIDTHS = {"thumb": 320, "card": 800, "full": 1920}
+
+# image_url points at this one, so clients that ignore variants still get
+# a reasonably sized picture
+DEFAULT_VARIANT = ("card", "webp")
+
+# Quality settings per output format; AVIF reaches the same look at lower values
+FORMAT_OPTIONS = {
+    "webp": {"quality": 80, "method": 4},
+    "avif": {"quality": 55, "speed": 8},
+}
+
+PROCESSED_NAME = r"[0-9a-f]{16}-(thumb|card|full)\.(webp|avif)"
+PROCESSED_NAME_RE = re.compile(rf"^{PROCESSED_NAME}$")
+PROCESSED_URL_RE = re.compile(rf"^/api/uploads/{PROCESSED_NAME}$")
+
+
+class ImageTooLarge(ValueError):
+    """More pixels than the configured limit"""
+
+
+def available_formats() -> List[str]:
+    """Configured output formats this Pillow build can encode (WebP first)"""
+    from PIL import features
+
+    wanted = [f.strip().lower() for f in settings.image_formats.split(",") if f.strip()]
+    formats = [f for f in wanted if f in FORMAT_OPTIONS and features.check(f)]
+    return formats or ["webp"]
+
+
+def render_variants(
+    source: str,
+    output_dir: str,
+    stem: str,
+    widths: Dict[str, int],
+    formats: List[str],
+    max_pixels: int
+) -> List[dict]:
+    """Decode an upload and write resized variants. Runs in a worker process.
+
+    EXIF orientation is applied to the pixels and no metadata is written,
+    which strips GPS position and camera details from shared photos.
+    """
+    from PIL import Image, ImageOps
+
+    Image.MAX_IMAGE_PIXELS = max_pixels
+    with Image.open(source) as image:
+        # Pillow only refuses images over twice MAX_IMAGE_PIXELS (and just
+        # warns below that); the header is enough to check before decoding
+        if image.width * image.height > max_pixels:
+            raise ImageTooLarge(f"{image.width}x{image.height} exceeds {max_pixels} pixels")
+        image = ImageOps.exif_transpose(image)
+        image = image.convert("RGBA" if image.mode in ("RGBA", "LA", "P") else "RGB")
+
+        variants = []
+        rendered = set()
+        for name, max_width in widths.items():
+            # Never upscale; small originals make some sizes identical
+            width = min(max_width, image.width)
+            height = round(image.height * width / image.width)
+            if width in rendered:
+                continue
+            rendered.add(width)
+
+            resized = image if width == image.width else image.resize((width, height), Image.LANCZOS)
+            for fmt in formats:
+                filename = f"{stem}-{name}.{fmt}"
+                path = os.path.join(output_dir, filename)
+                if not os.path.exists(path):
+                    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+                    resized.save(tmp_path, fmt.upper(), **FORMAT_OPTIONS[fmt])
+                    os.replace(tmp_path, path)
+                variants.append({
+                    "name": name,
+                    "url": f"/api/uploads/{filename}",
+                    "width": width,
+                    "height": height,
+                    "format": fmt
+                })
+        return variants
+
+
+class ImageProcessor:
+    """Streams uploads to disk, renders variants on a process pool and
+    hands them to storage.
+
+    Decoding and encoding large photos is CPU bound (AVIF especially), so
+    it runs in separate processes rather than on the event loop or the
+    default thread pool shared with bcrypt. work_dir holds temp files; with
+    local storage it is the upload directory itself, so storing is a rename.
+    """
+
+    def __init__(
+        self,
+        work_dir: str,
+        max_bytes: int,
+        workers: int,
+        max_pixels: int,
+        storage: Optional[Storage] = None
+    ):
+        self.work_dir = Path(work_dir)
+        self.max_bytes = max_bytes
+        self.workers = workers
+        self.max_pixels = max_pixels
+        self.storage = storage or LocalStorage(work_dir)
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        return self._executor
+
+    async def save_upload(self, file: UploadFile) -> Tuple[Path, str]:
+        """Copy an upload to a temp file in chunks, enforcing the size limit.
+
+        Returns the temp path and the SHA-256 of the content.
+        """
+        self.work_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.work_dir / f".upload-{uuid.uuid4().hex}"
+        digest = hashlib.sha256()
+        size = 0
+        try:
+            async with aiofiles.open(tmp_path, "wb") as out:
+                while chunk := await file.read(CHUNK_SIZE):
+                    size += len(chunk)
+                    if size > self.max_bytes:
+                        raise HTTPException(
+                            status_code=413,
+                            detail=f"Image is too large (max {self.max_bytes // (1024 * 1024)} MB)"
+                        )
+                    digest.update(chunk)
+                    await out.write(chunk)
+        except BaseException:
+            tmp_path.unlink(missing_ok=True)
+            raise
+        return tmp_path, digest.hexdigest()
+
+    async def store_variants(self, source: Path, content_hash: str) -> List[dict]:
+        """Render variants of a local file and put them in storage"""
+        render_dir = self.work_dir / f".render-{uuid.uuid4().hex}"
+        render_dir.mkdir(parents=True)
+        try:
+            try:
+                variants = await asyncio.get_running_loop().run_in_executor(
+                    self.executor,
+                    render_variants,
+                    str(source),
+                    str(render_dir),
+                    content_hash[:16],
+                    VARIANT_WIDTHS,
+                    available_formats(),
+                    self.max_pixels
+                )
+            except ImageTooLarge as e:
+                logger.warning(f"Rejected image upload: {e}")
+                raise HTTPException(
+                    status_code=413,
+                    detail=f"Image is too large (max {self.max_pixels // 1_000_000} megapixels)"
+                )
+            except Exception as e:
+                logger.warning(f"Rejected image upload: {e}")
+                raise HTTPException(status_code=400, detail="File is not a supported image")
+
+            await asyncio.gather(*(
+                self.storage.put_file(variant_key(v), render_dir / variant_key(v), f"image/{v['format']}")
+                for v in variants
+            ))
+        finally:
+            shutil.rmtree(render_dir, ignore_errors=True)
+        return variants
+
+    async def process_upload(self, file: UploadFile) -> List[dict]:
+        """Store an uploaded image as resized variants named by content hash"""
+        tmp_path, content_hash = await self.save_upload(file)
+        try:
+            return await self.store_variants(tmp_path, content_hash)
+        finally:
+            tmp_path.unlink(missing_ok=True)
+
+    async def process_stored(self, key: str) -> List[dict]:
+        """Same as process_upload, for a file uploaded straight to storage.
+
+        The original is removed afterwards, whether or not it was an image.
+        """
+        self.work_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.work_dir / f".upload-{uuid.uuid4().hex}"
+        try:
+            await self.storage.fetch(key, tmp_path, self.max_bytes)
+            with open(tmp_path, "rb") as f:
+                content_hash = (await asyncio.to_thread(hashlib.file_digest, f, "sha256")).hexdigest()
+            return await self.store_variants(tmp_path, content_hash)
+        finally:
+            tmp_path.unlink(missing_ok=True)
+            await self.storage.delete(key)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+def variant_key(variant: dict) -> str:
+    """Storage key (and uploads filename) of a variant"""
+    return variant["url"].rsplit("/", 1)[-1]
+
+
+def default_url(variants: List[dict]) -> str:
+    name, fmt = DEFAULT_VARIANT
+    for variant in variants:
+        if variant["name"] == name and variant["format"] == fmt:
+            return variant["url"]
+    # Small originals have no separate card size; use the largest WebP
+    webp = [v for v in variants if v["format"] == "webp"]
+    return max(webp or variants, key=lambda v: v["width"])["url"]
+
+
+def srcsets(variants: List[dict]) -> Dict[str, str]:
+    """srcset attribute value per format, e.g. {"webp": "/a-thumb.webp 320w, ..."}"""
+    by_format: Dict[str, List[dict]] = {}
+    for variant in variants:
+        by_format.setdefault(variant["format"], []).append(variant)
+    return {
+        fmt: ", ".join(f"{v['url']} {v['width']}w" for v in sorted(items, key=lambda v: v["width"]))
+        for fmt, items in by_format.items()
+    }
+
+
+def is_processed_url(url: Optional[str]) -> bool:
+    """Whether an image_url is one of our generated variants"""
+    return bool(url) and PROCESSED_URL_RE.match(url) is not None
+
+
+def is_processed_name(filename: str) -> bool:
+    """Whether an uploads filename is a generated (content-hashed) variant"""
+    return PROCESSED_NAME_RE.match(filename) is not None
+
+
+image_processor = ImageProcessor(
+    settings.upload_dir,
+    max_bytes=settings.image_max_upload_bytes,
+    workers=settings.image_workers,
+    max_pixels=settings.image_max_pixels,
+    storage=storage
+)
@@ -0,0 +1,168 @@
+from config import settings
+import logging
+from typing import Dict, List
+
+logger = logging.getLogger(__name__)
+
+# Every index the routers rely on, keyed by collection. Each entry gives the
+# key pattern and any options passed through to create_index. Index names
+# are left to Mongo's default "<field>_<direction>" scheme so entries here
+# line up with indexes created by earlier releases.
+INDEXES: Dict[str, List[dict]] = {
+    "users": [
+        {"keys": [("email", 1)], "unique": True},
+        {"keys": [("id", 1)], "unique": True},
+    ],
+    "households": [
+        {"keys": [("id", 1)], "unique": True},
+        {"keys": [("join_code", 1)], "sparse": True},
+    ],
+    "recipes": [
+        {"keys": [("id", 1)], "unique": True},
+        {"keys": [("author_id", 1)]},
+        {"keys": [("household_id", 1)]},
+        # Library listing: newest first with id as the keyset tie-breaker
+        {"keys": [("household_id", 1), ("created_at", -1), ("id", -1)]},
+        {"keys": [("author_id", 1), ("created_at", -1), ("id", -1)]},
+        # Whether an image variant is still used before it's deleted
+        {"keys": [("image_variants.url", 1)], "sparse": True},
+    ],
+    "recipe_shares": [
+        {"keys": [("id", 1)], "unique": True},
+    ],
+    "meal_plans": [
+        {"keys": [("id", 1)], "unique": True},
+        {"keys": [("household_id", 1), ("date", 1)]},
+    ],
+    "shopping_lists": [
+        {"keys": [("id", 1)], "unique": True},
+        {"keys": [("household_id", 1), ("created_at", -1)]},
+    ],
+    "recipe_feedback": [
+        {"keys": [("user_id", 1), ("recipe_id", 1)], "unique": True},
+        {"keys": [("user_id", 1), ("feedback", 1)]},
+    ],
+    "cook_sessions": [
+        {"keys": [("id", 1), ("user_id", 1)]},
+        {"keys": [("user_id", 1), ("completed_at", 1)]},
+    ],
+    "user_stats": [
+        {"keys": [("user_id", 1)], "unique": True},
+    ],
+    "collection_versions": [
+        {"keys": [("scope", 1)], "unique": True},
+    ],
+    "llm_cache": [
+        {"keys": [("hash", 1)], "unique": True},
+        {"keys": [("cached_at", 1)], "expireAfterSeconds": settings.llm_cache_ttl},
+        # Eviction order for the size cap
+        {"keys": [("last_hit_at", 1)]},
+    ],
+    "page_cache": [
+        {"keys": [("url_hash", 1)], "unique": True},
+        # Pages nobody imported for a while expire; also the size cap's eviction order
+        {"keys": [("last_hit_at", 1)], "expireAfterSeconds": settings.page_cache_ttl},
+    ],
+    "llm_leases": [
+        {"keys": [("hash", 1)], "unique": True},
+        # Mongo removes leases left behind by crashed workers
+        {"keys": [("expires_at", 1)], "expireAfterSeconds": 0},
+    ],
+    "jobs": [
+        {"keys": [("id", 1)], "unique": True},
+        {"keys": [("user_id", 1), ("created_at", -1)]},
+        # Stale-job recovery
+        {"keys": [("status", 1), ("heartbeat_at", 1)]},
+        {"keys": [("expires_at", 1)], "expireAfterSeconds": 0},
+    ],
+    "llm_settings": [
+        {"keys": [("user_id", 1)], "unique": True},
+    ],
+    "custom_prompts": [
+        {"keys": [("user_id", 1)], "unique": True},
+    ],
+    "favorites": [
+        {"keys": [("user_id", 1)]},
+    ],
+    "push_subscriptions": [
+        {"keys": [("user_id", 1)], "unique": True},
+    ],
+    "notification_settings": [
+        {"keys": [("user_id", 1)], "unique": True},
+    ],
+}
+
+# Index options compared against what the server reports
+COMPARED_OPTIONS = ("unique", "sparse", "expireAfterSeconds")
+
+
+def index_name(keys: list) -> str:
+    return "_".join(f"{field}_{direction}" for field, direction in keys)
+
+
+def describe_drift(spec: dict, existing: dict) -> List[str]:
+    """List the differences between a declared index and the live one"""
+    differences = []
+    existing_keys = [(field, int(direction)) for field, direction in existing.get("key", [])]
+    if existing_keys != list(spec["keys"]):
+        differences.append(f"keys {existing_keys} != {spec['keys']}")
+    for option in COMPARED_OPTIONS:
+        declared = spec.get(option, False if option != "expireAfterSeconds" else None)
+        live = existing.get(option, False if option != "expireAfterSeconds" else None)
+        if declared != live:
+            differences.append(f"{option} {live!r} != {declared!r}")
+    return differences
+
+
+async def update_ttl(db, collection_name: str, spec: dict) -> None:
+    try:
+        await db.command(
+            "collMod", collection_name,
+            index={"keyPattern": dict(spec["keys"]), "expireAfterSeconds": spec["expireAfterSeconds"]}
+        )
+        logger.info(f"Updated TTL of {collection_name}.{index_name(spec['keys'])} to {spec['expireAfterSeconds']}s")
+    except Exception as e:
+        logger.error(f"Failed to update TTL of {collection_name}.{index_name(spec['keys'])}: {e}")
+
+
+async def ensure_indexes(db) -> None:
+    """Create missing indexes and log drift from the registry.
+
+    Safe to run on every startup: existing indexes that match are left
+    alone, and indexes that differ are reported rather than rebuilt since
+    dropping them could lock a large collection.
+    """
+    for collection_name, specs in INDEXES.items():
+        collection = getattr(db, collection_name)
+        try:
+            existing = await collection.index_information()
+        except Exception as e:
+            logger.warning(f"Could not read indexes for {collection_name}: {e}")
+            existing = {}
+
+        declared_names = set()
+        for spec in specs:
+            name = index_name(spec["keys"])
+            declared_names.add(name)
+
+            if name in existing:
+                differences = describe_drift(spec, existing[name])
+                if differences and all(d.startswith("expireAfterSeconds") for d in differences):
+                    # A changed TTL can be applied in place without a rebuild
+                    await update_ttl(db, collection_name, spec)
+                elif differences:
+                    logger.warning(
+                        f"Index drift on {collection_name}.{name}: {'; '.join(differences)}"
+                    )
+                continue
+
+            options = {k: v for k, v in spec.items() if k != "keys"}
+            try:
+                await collection.create_index(spec["keys"], **options)
+                logger.info(f"Created index {collection_name}.{name}")
+            except Exception as e:
+                logger.error(f"Failed to create index {collection_name}.{name}: {e}")
+
+        for name in existing:
+            if name != "_id_" and name not in declared_names:
+                logger.warning(f"Index {collection_name}.{name} is not in the index registry")
@@ -0,0 +1,138 @@
+import asyncio
+import contextvars
+import itertools
+import logging
+import math
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+from fastapi import HTTPException
+
+logger = logging.getLogger(__name__)
+
+# Lower values run first
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BACKGROUND = 10
+
+# Priority for work submitted from the current task; background runners
+# set this so their calls queue behind interactive requests.
+inference_priority: contextvars.ContextVar[int] = contextvars.ContextVar(
+    "inference_priority", default=PRIORITY_INTERACTIVE
+)
+
+
+class InferenceQueue:
+    """Bounded priority queue drained by one dedicated worker thread.
+
+    Embedded model calls are CPU bound and the model object isn't thread
+    safe, so they run one at a time on their own thread instead of the
+    default executor that auth uses for bcrypt. When the queue is full new
+    work is rejected with 429 and a Retry-After estimate.
+    """
+
+    def __init__(self, max_queue: int, name: str = "inference"):
+        self.max_queue = max_queue
+        self.name = name
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._queue: Optional[asyncio.PriorityQueue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        # Futures of queued entries whose callers are still waiting; entries
+        # cancelled in the queue stay there until the worker reaches them,
+        # but they don't count against max_queue
+        self._waiting: set = set()
+        self._seq = itertools.count()
+        self.running = False
+        self.processed = 0
+        self.rejected = 0
+        self.avg_wait = 0.0
+        self.avg_service = 0.0
+
+    def _ensure_worker(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._worker is None or self._worker.done() or self._loop is not loop:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=self.name)
+            self._loop = loop
+            self._queue = asyncio.PriorityQueue()
+            self._waiting = set()
+            self._worker = loop.create_task(self._consume())
+
+    def depth(self) -> int:
+        return len(self._waiting)
+
+    def retry_after(self) -> int:
+        return max(1, math.ceil((self.depth() + 1) * (self.avg_service or 1.0)))
+
+    def submit(self, fn: Callable[..., Any], *args, priority: Optional[int] = None) -> asyncio.Future:
+        """Queue fn(*args) for the worker thread and return a future for its result"""
+        self._ensure_worker()
+        if self.depth() >= self.max_queue:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=429,
+                detail="The local AI model is busy. Please try again shortly.",
+                headers={"Retry-After": str(self.retry_after())}
+            )
+
+        if priority is None:
+            priority = inference_priority.get()
+        future = asyncio.get_running_loop().create_future()
+        self._waiting.add(future)
+        future.add_done_callback(self._waiting.discard)
+        self._queue.put_nowait((priority, next(self._seq), time.monotonic(), fn, args, future))
+        return future
+
+    async def run(self, fn: Callable[..., Any], *args, priority: Optional[int] = None) -> Any:
+        return await self.submit(fn, *args, priority=priority)
+
+    async def _consume(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            _, _, enqueued_at, fn, args, future = await self._queue.get()
+            self._waiting.discard(future)
+            if future.done():
+                # The caller gave up while waiting
+                continue
+
+            started_at = time.monotonic()
+            self.running = True
+            try:
+                result = await loop.run_in_executor(self._executor, fn, *args)
+            except Exception as e:
+                if not future.done():
+                    future.set_exception(e)
+            else:
+                if not future.done():
+                    future.set_result(result)
+            finally:
+                self.running = False
+
+            finished_at = time.monotonic()
+            self.processed += 1
+            self.avg_wait = self._average(self.avg_wait, started_at - enqueued_at)
+            self.avg_service = self._average(self.avg_service, finished_at - started_at)
+
+    def _average(self, current: float, sample: float) -> float:
+        # Exponential moving average so the estimate follows recent load
+        return sample if self.processed == 1 else current * 0.8 + sample * 0.2
+
+    def shutdown(self) -> None:
+        if self._worker is not None:
+            self._worker.cancel()
+            self._worker = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def stats(self) -> dict:
+        return {
+            "queue_depth": self.depth(),
+            "max_queue": self.max_queue,
+            "running": self.running,
+            "processed": self.processed,
+            "rejected": self.rejected,
+            "avg_wait_seconds": round(self.avg_wait, 3),
+            "avg_service_seconds": round(self.avg_service, 3)
+        }
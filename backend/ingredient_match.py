@@ -0,0 +1,201 @@
+import re
+from collections import defaultdict
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+from config import settings
+from recipe_parser import UNITS
+from search import SearchIndexes, tokenize
+
+# Words that describe how an ingredient is bought or prepared, not what it is
+DESCRIPTORS = {
+    "a", "an", "and", "or", "of", "to", "for", "the", "about", "optional", "taste",
+    "fresh", "freshly", "frozen", "dried", "canned", "tinned", "cooked", "raw", "ripe",
+    "chopped", "diced", "minced", "sliced", "grated", "shredded", "crushed", "cubed",
+    "peeled", "trimmed", "halved", "quartered", "beaten", "softened", "melted",
+    "finely", "roughly", "thinly", "coarsely", "large", "small", "medium", "whole",
+    "boneless", "skinless", "unsalted", "salted", "extra", "virgin", "ground",
+    "room", "temperature", "organic", "plain", "all", "purpose", "piece", "pieces",
+    "pinch", "dash", "handful", "bunch", "clove", "cloves", "can", "cans", "package",
+}
+
+# Regional and alternative names, applied after singularizing
+SYNONYMS = {
+    "scallion": "green onion",
+    "spring onion": "green onion",
+    "cilantro": "coriander",
+    "garbanzo": "chickpea",
+    "garbanzo bean": "chickpea",
+    "courgette": "zucchini",
+    "aubergine": "eggplant",
+    "capsicum": "bell pepper",
+    "rocket": "arugula",
+    "prawn": "shrimp",
+    "yoghurt": "yogurt",
+    "chilli": "chili",
+    "chile": "chili",
+    "cornflour": "cornstarch",
+    "corn starch": "cornstarch",
+    "icing sugar": "powdered sugar",
+    "confectioner sugar": "powdered sugar",
+    "caster sugar": "sugar",
+    "granulated sugar": "sugar",
+    "mince": "beef",
+    "beef mince": "beef",
+    "minced beef": "beef",
+}
+
+# Assumed to be in every kitchen: never required, never reported missing
+PANTRY_STAPLES = {
+    "salt", "pepper", "black pepper", "salt pepper", "water", "ice",
+    "oil", "olive oil", "vegetable oil", "cooking spray", "sugar",
+}
+
+PARENTHESES_RE = re.compile(r"\([^)]*\)")
+
+INGREDIENT_PROJECTION = {
+    "_id": 0, "id": 1, "ingredients": 1, "created_at": 1, "author_id": 1, "household_id": 1
+}
+
+IngredientKey = FrozenSet[str]
+
+
+def singularize(token: str) -> str:
+    """Crude English plural stripping; consistent is what matters here"""
+    if len(token) <= 3:
+        return token
+    if token.endswith("ies"):
+        return token[:-3] + "y"
+    if token.endswith("oes"):
+        return token[:-2]
+    if token.endswith(("ches", "shes", "sses", "xes", "zes")):
+        return token[:-2]
+    if token.endswith("s") and not token.endswith(("ss", "us", "is")):
+        return token[:-1]
+    return token
+
+
+def ingredient_name(ingredient) -> str:
+    """Name of a stored ingredient ({"name": ...} or a plain string)"""
+    if isinstance(ingredient, dict):
+        return str(ingredient.get("name") or "")
+    return str(ingredient or "")
+
+
+def normalize_ingredient(name: str) -> str:
+    """Canonical phrase for an ingredient: "2 Large Tomatoes, diced" -> "tomato" """
+    name = PARENTHESES_RE.sub(" ", name).split(",")[0]
+    tokens = [
+        singularize(token) for token in tokenize(name)
+        if not token.isdigit() and token not in UNITS and token not in DESCRIPTORS
+    ]
+    phrase = " ".join(tokens)
+    if phrase in SYNONYMS:
+        return SYNONYMS[phrase]
+    return " ".join(SYNONYMS.get(token, token) for token in tokens)
+
+
+def ingredient_key(name: str) -> Optional[IngredientKey]:
+    """Token set used for matching, or None for staples and empty names"""
+    phrase = normalize_ingredient(name)
+    if not phrase or phrase in PANTRY_STAPLES:
+        return None
+    return frozenset(phrase.split())
+
+
+def covers(available: IngredientKey, required: IngredientKey) -> bool:
+    """"onion" covers "red onion", and "chicken breast" covers "chicken" """
+    return available <= required or required <= available
+
+
+class IngredientIndex:
+    """Inverted index from ingredient tokens to the recipes one user can see"""
+
+    def __init__(self, user_id: str, household_id: Optional[str]):
+        self.user_id = user_id
+        self.household_id = household_id
+        self.postings: Dict[str, set] = defaultdict(set)
+        self.docs: Dict[str, dict] = {}
+
+    def visible(self, doc: dict) -> bool:
+        if doc.get("author_id") == self.user_id:
+            return True
+        return bool(self.household_id) and doc.get("household_id") == self.household_id
+
+    def add(self, doc: dict) -> None:
+        recipe_id = doc["id"]
+        self.remove(recipe_id)
+
+        required: Dict[IngredientKey, str] = {}
+        for ingredient in doc.get("ingredients") or []:
+            name = ingredient_name(ingredient)
+            key = ingredient_key(name)
+            if key and key not in required:
+                required[key] = name.strip()
+
+        tokens = set()
+        for key in required:
+            tokens.update(key)
+        for token in tokens:
+            self.postings[token].add(recipe_id)
+
+        self.docs[recipe_id] = {
+            "required": list(required.items()),
+            "created_at": doc.get("created_at") or "",
+            "tokens": tokens
+        }
+
+    def remove(self, recipe_id: str) -> None:
+        entry = self.docs.pop(recipe_id, None)
+        if not entry:
+            return
+        for token in entry["tokens"]:
+            posting = self.postings.get(token)
+            if posting is None:
+                continue
+            posting.discard(recipe_id)
+            if not posting:
+                del self.postings[token]
+
+    def match(self, ingredients: List[str], limit: int) -> List[dict]:
+        """Recipes sharing an ingredient with the list, best coverage first.
+
+        Coverage is the share of a recipe's non-staple ingredients that the
+        list covers; the rest are reported as missing.
+        """
+        available = [key for key in map(ingredient_key, ingredients) if key]
+        candidates = set()
+        for key in available:
+            for token in key:
+                candidates.update(self.postings.get(token, ()))
+
+        # Libraries share most ingredients, so check each one once
+        on_hand: Dict[IngredientKey, bool] = {}
+
+        def is_on_hand(key: IngredientKey) -> bool:
+            if key not in on_hand:
+                on_hand[key] = any(covers(have, key) for have in available)
+            return on_hand[key]
+
+        ranked: List[Tuple[float, int, str, str, List[str]]] = []
+        for recipe_id in candidates:
+            entry = self.docs[recipe_id]
+            missing = [name for key, name in entry["required"] if not is_on_hand(key)]
+            matched = len(entry["required"]) - len(missing)
+            if matched == 0:
+                continue
+            coverage = matched / len(entry["required"])
+            ranked.append((coverage, matched, entry["created_at"], recipe_id, missing))
+
+        ranked.sort(key=lambda r: (r[0], r[1], r[2]), reverse=True)
+        return [
+            {"recipe_id": recipe_id, "coverage": coverage, "missing_ingredients": missing}
+            for coverage, _, _, recipe_id, missing in ranked[:limit]
+        ]
+
+
+ingredient_index = SearchIndexes(
+    maxsize=settings.search_index_size,
+    ttl=settings.search_index_ttl,
+    index_class=IngredientIndex,
+    projection=INGREDIENT_PROJECTION
+)
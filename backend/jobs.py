@@ -0,0 +1,360 @@
+import asyncio
+import logging
+import os
+import socket
+import uuid
+from datetime import datetime, timezone, timedelta
+from typing import Any, Awaitable, Callable, Dict, Optional, Type
+
+from fastapi import HTTPException
+from pydantic import BaseModel, ValidationError
+from pymongo import ReturnDocument
+
+from config import settings
+from dependencies import db
+from inference import inference_priority, PRIORITY_BACKGROUND
+
+logger = logging.getLogger(__name__)
+
+ACTIVE_STATUSES = ["queued", "running"]
+
+# What status endpoints return; params and results can be large
+JOB_STATUS_PROJECTION = {"_id": 0, "params": 0, "result": 0}
+
+# Far in the past, so a job released at shutdown is picked up straight away
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def _now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+class JobCancelled(Exception):
+    """Raised inside a handler once its job is no longer running"""
+
+
+class JobContext:
+    """Handle a running job uses to record progress on its document"""
+
+    def __init__(self, collection, job: dict):
+        self.collection = collection
+        self.job = job
+        self.job_id = job["id"]
+
+    async def update(self, set_fields: Optional[dict] = None, inc: Optional[dict] = None) -> None:
+        """Apply progress fields; raises JobCancelled if the job was cancelled"""
+        update: Dict[str, Any] = {"$set": {**(set_fields or {}), "updated_at": _now_iso()}}
+        if inc:
+            update["$inc"] = inc
+        result = await self.collection.update_one({"id": self.job_id, "status": "running"}, update)
+        if result.matched_count == 0:
+            raise JobCancelled()
+
+
+class JobManager:
+    """In-process job runner backed by the jobs collection.
+
+    Jobs are run by the worker that accepted them, with a concurrency limit
+    per job type. Workers heartbeat their jobs; queued or running jobs whose
+    heartbeat goes stale (the worker died or restarted) are claimed by
+    another worker and run again, up to max_attempts times.
+    """
+
+    def __init__(
+        self,
+        collection,
+        users,
+        default_concurrency: int,
+        heartbeat_interval: float,
+        stale_after: float,
+        max_attempts: int,
+        result_ttl: float
+    ):
+        self.collection = collection
+        self.users = users
+        self.default_concurrency = default_concurrency
+        self.heartbeat_interval = heartbeat_interval
+        self.stale_after = stale_after
+        self.max_attempts = max_attempts
+        self.result_ttl = result_ttl
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self._types: Dict[str, dict] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._cancelling: set = set()
+        self._monitor: Optional[asyncio.Task] = None
+
+    def register(
+        self,
+        job_type: str,
+        handler: Callable[[Any, dict, JobContext], Awaitable[Any]],
+        params_model: Type[BaseModel],
+        concurrency: Optional[int] = None,
+        progress: Optional[Callable[[Any], dict]] = None
+    ) -> None:
+        """Make a job type available; handler(params, user, ctx) returns the result.
+
+        progress(params) builds the initial progress fields of a new job, so
+        every way of submitting it starts from the same document.
+        """
+        limit = concurrency or self.default_concurrency
+        self._types[job_type] = {
+            "handler": handler,
+            "params_model": params_model,
+            "progress": progress,
+            "concurrency": limit,
+            "semaphore": asyncio.Semaphore(limit),
+            "running": 0
+        }
+
+    @property
+    def job_types(self) -> list:
+        return sorted(self._types)
+
+    async def submit(self, job_type: str, user_id: str, params: dict, **fields) -> dict:
+        """Validate params, record a queued job and start it on this worker.
+
+        Extra fields are stored on the job document as initial progress.
+        """
+        spec = self._types.get(job_type)
+        if spec is None:
+            raise HTTPException(status_code=400, detail=f"Unknown job type: {job_type}")
+        try:
+            validated = spec["params_model"](**params)
+        except ValidationError as e:
+            raise HTTPException(status_code=422, detail=e.errors(include_url=False, include_context=False))
+        params = validated.model_dump()
+        if spec["progress"]:
+            fields = {**spec["progress"](validated), **fields}
+
+        now = _now_iso()
+        job = {
+            "id": str(uuid.uuid4()),
+            "type": job_type,
+            "user_id": user_id,
+            "params": params,
+            "status": "queued",
+            "result": None,
+            "error": None,
+            "attempts": 0,
+            "worker": self.worker_id,
+            "heartbeat_at": datetime.now(timezone.utc),
+            "created_at": now,
+            "updated_at": now,
+            **fields
+        }
+        await self.collection.insert_one(job)
+        job.pop("_id", None)
+        self._spawn(job)
+        return job
+
+    def _spawn(self, job: dict) -> None:
+        task = asyncio.create_task(self._run(job))
+        self._tasks[job["id"]] = task
+        task.add_done_callback(lambda _: self._forget(job["id"]))
+
+    def _forget(self, job_id: str) -> None:
+        self._tasks.pop(job_id, None)
+        self._cancelling.discard(job_id)
+
+    async def _run(self, job: dict) -> None:
+        # LLM work from jobs queues behind interactive requests
+        inference_priority.set(PRIORITY_BACKGROUND)
+        spec = self._types[job["type"]]
+        job_id = job["id"]
+
+        async with spec["semaphore"]:
+            now = _now_iso()
+            claimed = await self.collection.find_one_and_update(
+                {"id": job_id, "status": "queued", "worker": self.worker_id},
+                {
+                    "$set": {
+                        "status": "running",
+                        "started_at": now,
+                        "updated_at": now,
+                        "heartbeat_at": datetime.now(timezone.utc)
+                    },
+                    "$inc": {"attempts": 1}
+                },
+                projection={"_id": 0},
+                return_document=ReturnDocument.AFTER
+            )
+            if not claimed:
+                # Cancelled, or claimed by another worker, while queued
+                return
+
+            spec["running"] += 1
+            try:
+                user = await self.users.find_one({"id": claimed["user_id"]}, {"_id": 0, "password": 0})
+                if not user:
+                    raise HTTPException(status_code=404, detail="User not found")
+                params = spec["params_model"](**claimed["params"])
+                result = await spec["handler"](params, user, JobContext(self.collection, claimed))
+            except JobCancelled:
+                return
+            except asyncio.CancelledError:
+                if job_id in self._cancelling:
+                    return
+                # Worker shutting down; leave the job for recovery
+                raise
+            except HTTPException as e:
+                await self._finish(job_id, "failed", error=e.detail)
+            except Exception as e:
+                logger.error(f"Job {job_id} ({claimed['type']}) failed: {e}")
+                await self._finish(job_id, "failed", error=str(e))
+            else:
+                await self._finish(job_id, "completed", result=result)
+            finally:
+                spec["running"] -= 1
+
+    async def _finish(
+        self,
+        job_id: str,
+        status: str,
+        result: Any = None,
+        error: Any = None,
+        from_status: str = "running"
+    ) -> None:
+        now = datetime.now(timezone.utc)
+        await self.collection.update_one(
+            {"id": job_id, "status": from_status},
+            {"$set": {
+                "status": status,
+                "result": result,
+                "error": error,
+                "finished_at": now.isoformat(),
+                "updated_at": now.isoformat(),
+                "expires_at": now + timedelta(seconds=self.result_ttl)
+            }}
+        )
+
+    async def cancel(self, job_id: str, user_id: str) -> Optional[dict]:
+        """Cancel a queued or running job. Returns the job, or None if not found.
+
+        A job running on another worker notices at its next progress update
+        or heartbeat.
+        """
+        now = datetime.now(timezone.utc)
+        job = await self.collection.find_one_and_update(
+            {"id": job_id, "user_id": user_id, "status": {"$in": ACTIVE_STATUSES}},
+            {"$set": {
+                "status": "cancelled",
+                "finished_at": now.isoformat(),
+                "updated_at": now.isoformat(),
+                "expires_at": now + timedelta(seconds=self.result_ttl)
+            }},
+            projection=JOB_STATUS_PROJECTION,
+            return_document=ReturnDocument.AFTER
+        )
+        if job is None:
+            return await self.collection.find_one({"id": job_id, "user_id": user_id}, JOB_STATUS_PROJECTION)
+
+        self._cancel_local(job_id)
+        return job
+
+    def _cancel_local(self, job_id: str) -> None:
+        task = self._tasks.get(job_id)
+        if task and not task.done():
+            self._cancelling.add(job_id)
+            task.cancel()
+
+    def start(self) -> None:
+        """Recover jobs left behind by dead workers, then keep heartbeating"""
+        self._monitor = asyncio.create_task(self._monitor_loop())
+
+    async def _monitor_loop(self) -> None:
+        while True:
+            try:
+                await self._heartbeat()
+                await self.recover()
+            except Exception as e:
+                logger.error(f"Job monitor error: {e}")
+            await asyncio.sleep(self.heartbeat_interval)
+
+    async def _heartbeat(self) -> None:
+        job_ids = list(self._tasks)
+        if not job_ids:
+            return
+        await self.collection.update_many(
+            {"id": {"$in": job_ids}, "status": {"$in": ACTIVE_STATUSES}},
+            {"$set": {"heartbeat_at": datetime.now(timezone.utc)}}
+        )
+        # Pick up cancellations made through other workers
+        cancelled = await self.collection.find(
+            {"id": {"$in": job_ids}, "status": "cancelled"}, {"_id": 0, "id": 1}
+        ).to_list(len(job_ids))
+        for job in cancelled:
+            self._cancel_local(job["id"])
+
+    async def recover(self) -> int:
+        """Claim and restart jobs whose worker stopped heartbeating"""
+        if not self._types:
+            return 0
+        recovered = 0
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=self.stale_after)
+        while True:
+            job = await self.collection.find_one_and_update(
+                {
+                    "status": {"$in": ACTIVE_STATUSES},
+                    "type": {"$in": self.job_types},
+                    "heartbeat_at": {"$lt": cutoff}
+                },
+                {"$set": {
+                    "status": "queued",
+                    "worker": self.worker_id,
+                    "heartbeat_at": datetime.now(timezone.utc),
+                    "updated_at": _now_iso()
+                }},
+                projection={"_id": 0},
+                return_document=ReturnDocument.AFTER
+            )
+            if job is None:
+                return recovered
+
+            if job.get("attempts", 0) >= self.max_attempts:
+                await self._finish(
+                    job["id"], "failed", error="Job was interrupted too many times", from_status="queued"
+                )
+                continue
+
+            logger.info(f"Recovered {job['type']} job {job['id']}")
+            self._spawn(job)
+            recovered += 1
+
+    async def shutdown(self) -> None:
+        if self._monitor is not None:
+            self._monitor.cancel()
+            self._monitor = None
+
+        job_ids = list(self._tasks)
+        for task in list(self._tasks.values()):
+            task.cancel()
+        if job_ids:
+            # Hand unfinished jobs to the next worker without waiting for staleness
+            try:
+                await self.collection.update_many(
+                    {"id": {"$in": job_ids}, "status": {"$in": ACTIVE_STATUSES}},
+                    {"$set": {"status": "queued", "heartbeat_at": EPOCH}}
+                )
+            except Exception as e:
+                logger.error(f"Failed to release jobs: {e}")
+
+    def stats(self) -> dict:
+        return {
+            "worker": self.worker_id,
+            "active": len(self._tasks),
+            "types": {
+                name: {"running": spec["running"], "concurrency": spec["concurrency"]}
+                for name, spec in self._types.items()
+            }
+        }
+
+
+job_manager = JobManager(
+    db.jobs,
+    db.users,
+    default_concurrency=settings.job_concurrency,
+    heartbeat_interval=settings.job_heartbeat_interval,
+    stale_after=settings.job_stale_after,
+    max_attempts=settings.job_max_attempts,
+    result_ttl=settings.job_result_ttl
+)
@@ -0,0 +1,74 @@
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import List, Optional
+
+from cache import MongoLRUCache
+
+
+class LLMCache(MongoLRUCache):
+    """Two-level cache of LLM responses keyed by prompt hash.
+
+    L1 is a small per-worker TTLCache for hot prompts. L2 is the llm_cache
+    collection: entries expire through a TTL index on cached_at and the
+    collection is trimmed to max_entries, evicting the least recently hit
+    entries first. L1 hits don't refresh last_hit_at in Mongo, so the L1
+    TTL should stay short relative to the L2 TTL.
+    """
+
+    key_field = "hash"
+    label = "LLM cache"
+    victim_fields = ("provider",)
+
+    def __init__(
+        self,
+        collection,
+        max_entries: int,
+        l1_size: int,
+        l1_ttl: float,
+        trim_every: int = 50
+    ):
+        super().__init__(collection, max_entries, l1_size, l1_ttl, trim_every)
+        self._stats = defaultdict(lambda: {"hits": 0, "l1_hits": 0, "misses": 0, "evictions": 0})
+
+    async def get(self, cache_hash: str, provider: str) -> Optional[str]:
+        stats = self._stats[provider]
+        response = self.l1.get(cache_hash)
+        if response is not None:
+            stats["hits"] += 1
+            stats["l1_hits"] += 1
+            return response
+
+        cached = await self._find(cache_hash, {"_id": 0, "response": 1})
+        if cached and cached.get("response"):
+            stats["hits"] += 1
+            self.l1.set(cache_hash, cached["response"])
+            return cached["response"]
+
+        stats["misses"] += 1
+        return None
+
+    async def put(self, cache_hash: str, response: str, provider: str, model: str) -> None:
+        now = datetime.now(timezone.utc)
+        self.l1.set(cache_hash, response)
+        await self._store(cache_hash, {
+            "hash": cache_hash,
+            "response": response,
+            "created_at": time.time(),
+            "cached_at": now,
+            "last_hit_at": now,
+            "size": len(response.encode()),
+            "provider": provider,
+            "model": model
+        })
+
+    def _evicted(self, victims: List[dict], deleted: int) -> None:
+        for victim in victims:
+            self._stats[victim.get("provider", "unknown")]["evictions"] += 1
+
+    def stats(self) -> dict:
+        return {
+            "max_entries": self.max_entries,
+            "providers": {provider: dict(counts) for provider, counts in self._stats.items()},
+            "l1": self.l1.stats()
+        }
@@ -0,0 +1,134 @@
+import logging
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+# Available embedded models (GPT4All)
+EMBEDDED_MODELS = [
+    {"id": "Phi-3-mini-4k-instruct.Q4_0.gguf", "name": "Phi-3 Mini (Recommended)", "size": "2.2GB", "ram": "4GB"},
+    {"id": "Llama-3.2-3B-Instruct-Q4_K_M.gguf", "name": "Llama 3.2 3B", "size": "2.0GB", "ram": "4GB"},
+    {"id": "Mistral-7B-Instruct-v0.3-Q4_K_M.gguf", "name": "Mistral 7B", "size": "4.4GB", "ram": "8GB"},
+    {"id": "Meta-Llama-3-8B-Instruct-Q4_K_M.gguf", "name": "Llama 3 8B", "size": "4.9GB", "ram": "8GB"},
+]
+
+GB = 1024 ** 3
+
+# Assumed footprint of a model that isn't listed and isn't on disk yet
+DEFAULT_MODEL_BYTES = 4 * GB
+
+
+def parse_size(size: str) -> Optional[int]:
+    """Turn a size label like "2.2GB" or "900MB" into bytes"""
+    match = re.fullmatch(r"\s*([\d.]+)\s*([KMG]B)\s*", size or "", re.IGNORECASE)
+    if not match:
+        return None
+    units = {"KB": 1024, "MB": 1024 ** 2, "GB": GB}
+    return int(float(match.group(1)) * units[match.group(2).upper()])
+
+
+class EmbeddedModelRegistry:
+    """Keeps recently used GPT4All models resident, evicting the least
+    recently used when either the model count or the RAM budget is exceeded.
+
+    A model bigger than the whole budget is still loaded, on its own.
+    """
+
+    def __init__(
+        self,
+        models_path: str,
+        max_models: int,
+        ram_budget_bytes: int,
+        loader: Optional[Callable[[str, str], Any]] = None
+    ):
+        self.models_path = models_path
+        self.max_models = max(1, max_models)
+        self.ram_budget_bytes = ram_budget_bytes
+        self._loader = loader or self._load_gpt4all
+        self._models: "OrderedDict[str, Any]" = OrderedDict()
+        self._sizes: dict = {}
+        self._lock = threading.Lock()
+        self.loads = 0
+        self.evictions = 0
+
+    def model_size(self, model_name: str) -> int:
+        """Memory a loaded model holds, which is what the budget is about.
+
+        Listed models declare it; anything else falls back to its file size.
+        """
+        for model in EMBEDDED_MODELS:
+            if model["id"] == model_name:
+                size = parse_size(model["ram"])
+                if size:
+                    return size
+        path = os.path.join(self.models_path, model_name)
+        if os.path.exists(path):
+            return os.path.getsize(path)
+        return DEFAULT_MODEL_BYTES
+
+    def resident_bytes(self) -> int:
+        return sum(self._sizes.values())
+
+    def get(self, model_name: str) -> Any:
+        """Return a loaded model, loading it (and evicting others) if needed.
+
+        Blocks for the whole load, so call it from the inference thread.
+        """
+        with self._lock:
+            model = self._models.get(model_name)
+            if model is not None:
+                self._models.move_to_end(model_name)
+                return model
+
+            size = self.model_size(model_name)
+            while self._models and (
+                len(self._models) >= self.max_models
+                or self.resident_bytes() + size > self.ram_budget_bytes
+            ):
+                self._evict_oldest()
+
+            logger.info(f"Loading embedded model: {model_name}")
+            model = self._loader(model_name, self.models_path)
+            self._models[model_name] = model
+            self._sizes[model_name] = size
+            self.loads += 1
+            logger.info(f"Embedded model loaded successfully")
+            return model
+
+    def _evict_oldest(self) -> None:
+        name, model = self._models.popitem(last=False)
+        self._sizes.pop(name, None)
+        self.evictions += 1
+        logger.info(f"Unloading embedded model: {name}")
+        close = getattr(model, "close", None)
+        if callable(close):
+            try:
+                close()
+            except Exception as e:
+                logger.warning(f"Failed to close embedded model {name}: {e}")
+
+    @staticmethod
+    def _load_gpt4all(model_name: str, models_path: str) -> Any:
+        from gpt4all import GPT4All
+
+        # Ensure models directory exists
+        os.makedirs(models_path, exist_ok=True)
+        return GPT4All(
+            model_name=model_name,
+            model_path=models_path,
+            allow_download=True,
+            verbose=False
+        )
+
+    def stats(self) -> dict:
+        return {
+            "resident": list(self._models),
+            "resident_gb": round(self.resident_bytes() / GB, 2),
+            "ram_budget_gb": round(self.ram_budget_bytes / GB, 2),
+            "max_models": self.max_models,
+            "loads": self.loads,
+            "evictions": self.evictions
+        }
@@ -1,5 +1,6 @@
 from pydantic import BaseModel, EmailStr, Field
-from typing import List, Optional
+from typing import List, Literal, Optional
+from config import settings
 
 # Auth Models
 class UserCreate(BaseModel):
@@ -61,6 +62,20 @@ class RecipeCreate(BaseModel):
     tags: Optional[List[str]] = []
     image_url: Optional[str] = ""
 
+class ImageVariant(BaseModel):
+    """One resized rendition of an uploaded recipe photo"""
+    name: str  # 'thumb', 'card' or 'full'
+    url: str
+    width: int
+    height: int
+    format: str  # 'webp' or 'avif'
+
+class ImageUploadRequest(BaseModel):
+    content_type: str
+
+class ImageUploadComplete(BaseModel):
+    upload_id: str
+
 class RecipeResponse(BaseModel):
     id: str
     title: str
@@ -73,12 +88,24 @@ class RecipeResponse(BaseModel):
     category: str
     tags: List[str]
     image_url: str
+    image_variants: List[ImageVariant] = []
     author_id: str
     household_id: Optional[str]
     created_at: str
     updated_at: str
     is_favorite: Optional[bool] = False
 
+class RecipeSummaryResponse(BaseModel):
+    """Card-sized recipe for library grids (GET /recipes?view=summary)"""
+    id: str
+    title: str
+    image_url: str = ""
+    image_variants: List[ImageVariant] = []
+    category: str = "Other"
+    prep_time: int = 0
+    cook_time: int = 0
+    is_favorite: Optional[bool] = False
+
 class ShareRecipeRequest(BaseModel):
     recipe_id: str
     expires_days: Optional[int] = 30
@@ -132,6 +159,28 @@ class ImportURLRequest(BaseModel):
 class ImportTextRequest(BaseModel):
     text: str
 
+class BatchImportRequest(BaseModel):
+    urls: List[str] = []
+    texts: List[str] = []
+
+# Only the first 3000 characters of a pasted text reach the model
+BATCH_IMPORT_TEXT_CHARS = 3000
+
+class BatchImportItem(BaseModel):
+    kind: Literal["url", "text"]
+    source: str = Field(min_length=1, max_length=BATCH_IMPORT_TEXT_CHARS)
+
+class BatchImportJob(BaseModel):
+    items: List[BatchImportItem] = Field(min_length=1, max_length=settings.batch_import_max_items)
+
+class DownloadModelRequest(BaseModel):
+    model_name: str = "Phi-3-mini-4k-instruct.Q4_0.gguf"
+
+# Background Job Models
+class JobSubmit(BaseModel):
+    type: str  # 'import_url', 'import_text', 'auto_meal_plan', 'batch_import', 'download_model'
+    params: dict = {}
+
 class FridgeSearchRequest(BaseModel):
     ingredients: List[str]
     search_online: bool = False
@@ -0,0 +1,151 @@
+import copy
+import hashlib
+import logging
+from collections import Counter
+from datetime import datetime, timezone, timedelta
+from typing import List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from cache import MongoLRUCache
+
+logger = logging.getLogger(__name__)
+
+# Query parameters that never change the page content
+TRACKING_PARAMS = {"fbclid", "gclid", "dclid", "msclkid", "mc_cid", "mc_eid", "igshid", "ref", "ref_src", "_ga"}
+
+
+def normalize_url(url: str) -> str:
+    """Canonical form of a URL so trivially different links share an entry"""
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower() or "https"
+    host = (parts.hostname or "").lower()
+    if parts.port and not ((scheme == "http" and parts.port == 80) or (scheme == "https" and parts.port == 443)):
+        host = f"{host}:{parts.port}"
+    query = sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith("utm_") and key.lower() not in TRACKING_PARAMS
+    )
+    return urlunsplit((scheme, host, parts.path or "/", urlencode(query), ""))
+
+
+def url_hash(url: str) -> str:
+    return hashlib.sha256(normalize_url(url).encode()).hexdigest()
+
+
+class PageCache(MongoLRUCache):
+    """Cache of what URL imports extracted from a page, keyed by normalized URL.
+
+    Entries hold the locally parsed recipe (if any) and the page text for the
+    LLM, plus the validators needed to revalidate with a conditional GET.
+    Entries younger than fresh_for are served without touching the network.
+    Like LLMCache, the page_cache collection is shared by all workers, with a
+    small per-worker L1 in front and trimming to max_entries by last hit.
+    """
+
+    key_field = "url_hash"
+    label = "Page cache"
+
+    def __init__(
+        self,
+        collection,
+        max_entries: int,
+        fresh_for: float,
+        l1_size: int,
+        trim_every: int = 50
+    ):
+        super().__init__(collection, max_entries, l1_size, fresh_for, trim_every)
+        self.fresh_for = fresh_for
+        self._stats = Counter()
+
+    def fresh_remaining(self, entry: dict) -> float:
+        """Seconds until the entry has to be revalidated (<= 0 when stale)"""
+        checked_at = entry["checked_at"]
+        if checked_at.tzinfo is None:
+            checked_at = checked_at.replace(tzinfo=timezone.utc)
+        age = datetime.now(timezone.utc) - checked_at
+        return (timedelta(seconds=self.fresh_for) - age).total_seconds()
+
+    def is_fresh(self, entry: dict) -> bool:
+        return self.fresh_remaining(entry) > 0
+
+    async def get(self, url: str) -> Optional[dict]:
+        """Entry for a URL, fresh or not; None when the page was never cached"""
+        key = url_hash(url)
+        # L1 only holds entries for as long as they are fresh
+        entry = self.l1.get(key)
+        if entry is not None:
+            return entry
+        entry = await self._find(key, {"_id": 0})
+        if entry and self.is_fresh(entry):
+            self.l1.set(key, entry, ttl=self.fresh_remaining(entry))
+        return entry
+
+    def result(self, entry: dict) -> Tuple[Optional[dict], str]:
+        """(recipe, text) from an entry; a copy, so callers can't alter the L1 entry"""
+        return copy.deepcopy(entry["recipe"]), entry["text"]
+
+    def conditional_headers(self, entry: Optional[dict]) -> dict:
+        headers = {}
+        if entry:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def record(self, outcome: str) -> None:
+        """Count a lookup outcome: hit, revalidated or miss"""
+        self._stats[outcome] += 1
+
+    async def touch(self, entry: dict) -> dict:
+        """Mark an entry as just revalidated (the server answered 304)"""
+        now = datetime.now(timezone.utc)
+        entry = {**entry, "checked_at": now, "last_hit_at": now}
+        self.l1.set(entry["url_hash"], entry)
+        try:
+            await self.collection.update_one(
+                {"url_hash": entry["url_hash"]},
+                {"$set": {"checked_at": now, "last_hit_at": now}, "$inc": {"hits": 1}}
+            )
+        except Exception as e:
+            logger.error(f"Page cache update failed: {e}")
+        return entry
+
+    async def put(
+        self,
+        url: str,
+        recipe: Optional[dict],
+        text: str,
+        etag: Optional[str],
+        last_modified: Optional[str]
+    ) -> None:
+        now = datetime.now(timezone.utc)
+        entry = {
+            "url_hash": url_hash(url),
+            "url": normalize_url(url),
+            "recipe": copy.deepcopy(recipe),
+            "text": text,
+            "etag": etag,
+            "last_modified": last_modified,
+            "fetched_at": now,
+            "checked_at": now,
+            "last_hit_at": now,
+        }
+        self.l1.set(entry["url_hash"], entry)
+        await self._store(entry["url_hash"], entry)
+
+    def _evicted(self, victims: List[dict], deleted: int) -> None:
+        self._stats["evictions"] += deleted
+
+    def stats(self) -> dict:
+        lookups = self._stats["hit"] + self._stats["revalidated"] + self._stats["miss"]
+        return {
+            "max_entries": self.max_entries,
+            "fresh_for": self.fresh_for,
+            "hits": self._stats["hit"],
+            "revalidated": self._stats["revalidated"],
+            "misses": self._stats["miss"],
+            "evictions": self._stats["evictions"],
+            "hit_rate": round((self._stats["hit"] + self._stats["revalidated"]) / lookups, 3) if lookups else 0.0,
+            "l1": self.l1.stats()
+        }
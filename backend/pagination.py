@@ -0,0 +1,23 @@
+from fastapi import HTTPException
+import base64
+import json
+
+# List endpoints return the next page token in this response header so the
+# JSON body stays a plain list for existing clients.
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+def encode_cursor(data: dict) -> str:
+    """Encode cursor state as an opaque URL-safe token"""
+    raw = json.dumps(data, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> dict:
+    """Decode a token produced by encode_cursor, rejecting anything else"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not isinstance(data, dict):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return data
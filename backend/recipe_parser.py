@@ -0,0 +1,441 @@
+import json
+import logging
+import re
+from collections import Counter
+from typing import Any, List, Optional, Tuple
+
+from bs4 import BeautifulSoup
+
+logger = logging.getLogger(__name__)
+
+# lxml builds the tree several times faster than the pure-Python parser
+try:
+    import lxml  # noqa: F401
+    HTML_PARSER = "lxml"
+except ImportError:
+    HTML_PARSER = "html.parser"
+
+# Page text sent to the LLM, sized for small embedded model context windows
+# (~2048 tokens)
+PAGE_TEXT_LIMIT = 3000
+
+# Extraction stages, in the order they're tried. "llm" is the fallback the
+# caller runs when none of the local stages find a complete recipe.
+STAGES = ["json_ld", "microdata", "heuristic", "llm"]
+
+CATEGORIES = ["Breakfast", "Lunch", "Dinner", "Dessert", "Appetizer", "Snack", "Beverage", "Other"]
+
+CATEGORY_KEYWORDS = [
+    ("Breakfast", ("breakfast", "brunch")),
+    ("Dessert", ("dessert", "cake", "cookie", "pie", "sweet", "baking")),
+    ("Appetizer", ("appetizer", "starter", "hors d", "side")),
+    ("Snack", ("snack",)),
+    ("Beverage", ("beverage", "drink", "cocktail", "smoothie")),
+    ("Lunch", ("lunch", "salad", "sandwich", "soup")),
+    ("Dinner", ("dinner", "main", "entree", "entrée", "supper")),
+]
+
+UNICODE_FRACTIONS = {
+    "½": "1/2", "⅓": "1/3", "⅔": "2/3", "¼": "1/4", "¾": "3/4",
+    "⅕": "1/5", "⅖": "2/5", "⅗": "3/5", "⅘": "4/5", "⅙": "1/6",
+    "⅚": "5/6", "⅛": "1/8", "⅜": "3/8", "⅝": "5/8", "⅞": "7/8",
+}
+
+UNITS = {
+    "cup", "cups", "c",
+    "tablespoon", "tablespoons", "tbsp", "tbs", "tbl", "tb",
+    "teaspoon", "teaspoons", "tsp", "ts",
+    "gram", "grams", "g", "kilogram", "kilograms", "kg",
+    "milliliter", "milliliters", "millilitre", "millilitres", "ml",
+    "liter", "liters", "litre", "litres", "l", "dl", "cl",
+    "ounce", "ounces", "oz", "fl oz", "pound", "pounds", "lb", "lbs",
+    "pint", "pints", "pt", "quart", "quarts", "qt", "gallon", "gallons",
+    "pinch", "pinches", "dash", "dashes", "clove", "cloves",
+    "can", "cans", "tin", "tins", "jar", "jars", "package", "packages", "pkg",
+    "packet", "packets", "slice", "slices", "stick", "sticks", "piece", "pieces",
+    "bunch", "bunches", "sprig", "sprigs", "handful", "handfuls", "head", "heads",
+}
+
+# Leading quantity: "2", "1.5", "1 1/2", "1/2", "2-3", "2 to 3"
+QUANTITY_RE = re.compile(
+    r"^\s*((?:\d+\s+)?\d+/\d+|\d+(?:[.,]\d+)?)"
+    r"(?:\s*(?:-|–|to)\s*((?:\d+\s+)?\d+/\d+|\d+(?:[.,]\d+)?))?\s*"
+)
+
+ISO_DURATION_RE = re.compile(
+    r"^P(?:(?P<days>\d+(?:\.\d+)?)D)?"
+    r"(?:T(?:(?P<hours>\d+(?:\.\d+)?)H)?(?:(?P<minutes>\d+(?:\.\d+)?)M)?(?:(?P<seconds>\d+(?:\.\d+)?)S)?)?$",
+    re.IGNORECASE
+)
+
+JSON_LD_RE = re.compile(
+    r"<script[^>]*type\s*=\s*[\"']?application/ld\+json[\"']?[^>]*>(.*?)</script\s*>",
+    re.IGNORECASE | re.DOTALL
+)
+
+# Blocks none of the tree-based stages look at; ad-heavy pages are mostly
+# these, so dropping them first makes the tree much cheaper to build
+HEAVY_MARKUP_RE = re.compile(
+    r"<(script|style|svg|noscript|template|iframe)\b[^>]*>.*?</\1\s*>|<!--.*?-->",
+    re.IGNORECASE | re.DOTALL
+)
+
+HEURISTIC_INGREDIENTS = re.compile(r"ingredient", re.IGNORECASE)
+HEURISTIC_INSTRUCTIONS = re.compile(r"instruction|direction|method|step|preparation", re.IGNORECASE)
+
+
+def parse_duration(value: Any) -> int:
+    """Minutes from an ISO 8601 duration ("PT1H30M") or text ("1 hr 30 mins")"""
+    if value is None:
+        return 0
+    if isinstance(value, (int, float)):
+        return int(value)
+    value = str(value).strip()
+    match = ISO_DURATION_RE.match(value)
+    if match and any(match.groupdict().values()):
+        parts = {k: float(v or 0) for k, v in match.groupdict().items()}
+        return round(parts["days"] * 1440 + parts["hours"] * 60 + parts["minutes"] + parts["seconds"] / 60)
+
+    hours = re.search(r"(\d+(?:\.\d+)?)\s*(?:h|hr|hrs|hour|hours)\b", value, re.IGNORECASE)
+    minutes = re.search(r"(\d+)\s*(?:m|min|mins|minute|minutes)\b", value, re.IGNORECASE)
+    total = (float(hours.group(1)) * 60 if hours else 0) + (int(minutes.group(1)) if minutes else 0)
+    if not total and value.isdigit():
+        return int(value)
+    return round(total)
+
+
+def parse_servings(value: Any) -> int:
+    """Servings from recipeYield, which may be a number, "4 servings" or a list"""
+    if isinstance(value, list):
+        for item in value:
+            servings = parse_servings(item)
+            if servings:
+                return servings
+        return 0
+    if isinstance(value, (int, float)):
+        return int(value)
+    match = re.search(r"\d+", str(value or ""))
+    return int(match.group()) if match else 0
+
+
+def parse_ingredient(text: str) -> dict:
+    """Split "1 1/2 cups flour, sifted" into amount, unit and name"""
+    text = " ".join(str(text).split())
+    for char, fraction in UNICODE_FRACTIONS.items():
+        # "1½" -> "1 1/2"
+        text = re.sub(rf"(\d){char}", rf"\1 {fraction}", text).replace(char, fraction)
+
+    amount = ""
+    match = QUANTITY_RE.match(text)
+    if match:
+        amount = match.group(1) if not match.group(2) else f"{match.group(1)}-{match.group(2)}"
+        text = text[match.end():]
+
+    unit = ""
+    words = text.split(" ")
+    if words:
+        first = words[0].lower().rstrip(".")
+        two = " ".join(words[:2]).lower().rstrip(".")
+        if two in UNITS:
+            unit, text = two, " ".join(words[2:])
+        elif first in UNITS and len(words) > 1:
+            unit, text = first, " ".join(words[1:])
+
+    name = text.strip(" ,")
+    if name.lower().startswith("of "):
+        name = name[3:]
+    return {"name": name or text, "amount": amount, "unit": unit}
+
+
+def _text(value: Any) -> str:
+    if isinstance(value, dict):
+        value = value.get("text") or value.get("name") or ""
+    if isinstance(value, list):
+        value = " ".join(_text(v) for v in value)
+    text = str(value or "")
+    if "<" in text:
+        text = BeautifulSoup(text, "html.parser").get_text(" ")
+    return " ".join(text.split())
+
+
+def parse_instructions(value: Any) -> List[str]:
+    """Flatten recipeInstructions: text, a list, HowToStep or HowToSection"""
+    steps: List[str] = []
+    if isinstance(value, str):
+        if "<" in value:
+            value = BeautifulSoup(value, "html.parser").get_text("\n")
+        steps = [line.strip() for line in re.split(r"\n+", value) if line.strip()]
+    elif isinstance(value, list):
+        for item in value:
+            steps.extend(parse_instructions(item))
+    elif isinstance(value, dict):
+        if value.get("itemListElement"):
+            steps.extend(parse_instructions(value["itemListElement"]))
+        else:
+            text = _text(value)
+            if text:
+                steps.append(text)
+    return steps
+
+
+def parse_category(*values: Any) -> str:
+    text = " ".join(_text(v) for v in values if v).lower()
+    for category, keywords in CATEGORY_KEYWORDS:
+        if any(keyword in text for keyword in keywords):
+            return category
+    return "Other"
+
+
+def parse_tags(*values: Any) -> List[str]:
+    tags: List[str] = []
+    for value in values:
+        if not value:
+            continue
+        for item in value if isinstance(value, list) else [value]:
+            for tag in _text(item).lower().split(","):
+                tag = tag.strip()
+                if tag and tag not in tags:
+                    tags.append(tag)
+    return tags[:10]
+
+
+def parse_image(value: Any) -> str:
+    if isinstance(value, list):
+        return parse_image(value[0]) if value else ""
+    if isinstance(value, dict):
+        return str(value.get("url") or value.get("contentUrl") or "")
+    return str(value or "")
+
+
+def normalize_recipe(data: dict) -> dict:
+    """Map schema.org Recipe properties onto the shape the LLM returns"""
+    ingredients = data.get("recipeIngredient") or data.get("ingredients") or []
+    if isinstance(ingredients, str):
+        ingredients = [line for line in ingredients.split("\n")]
+    return {
+        "title": _text(data.get("name")),
+        "description": _text(data.get("description")),
+        "ingredients": [parse_ingredient(_text(i)) for i in ingredients if _text(i)],
+        "instructions": parse_instructions(data.get("recipeInstructions")),
+        "prep_time": parse_duration(data.get("prepTime")),
+        "cook_time": parse_duration(data.get("cookTime")),
+        "servings": parse_servings(data.get("recipeYield")) or 4,
+        "category": parse_category(data.get("recipeCategory"), data.get("name")),
+        "tags": parse_tags(data.get("keywords"), data.get("recipeCuisine")),
+        "image_url": parse_image(data.get("image")),
+    }
+
+
+def is_complete(recipe: Optional[dict]) -> bool:
+    return bool(recipe and recipe["title"] and recipe["ingredients"] and recipe["instructions"])
+
+
+def _is_recipe_type(node: dict) -> bool:
+    types = node.get("@type")
+    types = types if isinstance(types, list) else [types]
+    return any(isinstance(t, str) and t.split("/")[-1] == "Recipe" for t in types)
+
+
+def _find_recipe_node(node: Any) -> Optional[dict]:
+    if isinstance(node, list):
+        for item in node:
+            found = _find_recipe_node(item)
+            if found:
+                return found
+    elif isinstance(node, dict):
+        if _is_recipe_type(node):
+            return node
+        for key in ("@graph", "mainEntity", "mainEntityOfPage", "itemListElement"):
+            if key in node:
+                found = _find_recipe_node(node[key])
+                if found:
+                    return found
+    return None
+
+
+def from_json_ld(html: str) -> Optional[dict]:
+    """JSON-LD is read straight from the markup, so the common case never
+    has to build a tree for the whole page"""
+    for match in JSON_LD_RE.finditer(html):
+        raw = match.group(1)
+        if "Recipe" not in raw:
+            continue
+        try:
+            data = json.loads(raw.strip(), strict=False)
+        except json.JSONDecodeError:
+            continue
+        node = _find_recipe_node(data)
+        if node:
+            return normalize_recipe(node)
+    return None
+
+
+def _microdata_value(element) -> str:
+    if element.name == "meta":
+        return element.get("content", "")
+    if element.name in ("link", "a") and element.get("href"):
+        return element["href"]
+    if element.name == "img":
+        return element.get("src", "")
+    if element.name == "time" and element.get("datetime"):
+        return element["datetime"]
+    if element.get("content"):
+        return element["content"]
+    return element.get_text(" ", strip=True)
+
+
+def from_microdata(soup: BeautifulSoup) -> Optional[dict]:
+    scope = soup.find(attrs={"itemtype": re.compile(r"schema\.org/Recipe", re.IGNORECASE)})
+    if scope is None:
+        return None
+
+    multi = {"recipeIngredient", "ingredients", "recipeInstructions", "keywords"}
+    data: dict = {}
+    for element in scope.find_all(attrs={"itemprop": True}):
+        # Nested items (authors, HowToSteps) are taken whole, not property by property
+        if element.find_parent(attrs={"itemscope": True}) is not scope:
+            continue
+        for prop in element["itemprop"].split():
+            if prop == "recipeInstructions" and element.find("li"):
+                # One element holding the whole list of steps
+                data.setdefault(prop, []).extend(_list_items(element))
+                continue
+            value = _microdata_value(element)
+            if prop in multi:
+                data.setdefault(prop, []).append(value)
+            else:
+                data.setdefault(prop, value)
+    return normalize_recipe(data)
+
+
+def _list_items(container) -> List[str]:
+    items = [li.get_text(" ", strip=True) for li in container.find_all("li")]
+    if not items:
+        items = [p.get_text(" ", strip=True) for p in container.find_all("p")]
+    return [item for item in items if item]
+
+
+def _section(soup: BeautifulSoup, pattern: re.Pattern) -> List[str]:
+    """Items of the first list-bearing element whose class or id matches"""
+    for element in soup.find_all(["ul", "ol", "div", "section"]):
+        attrs = " ".join(element.get("class", [])) + " " + (element.get("id") or "")
+        if pattern.search(attrs):
+            items = _list_items(element)
+            if items:
+                return items
+
+    # A heading ("Ingredients") followed by a list
+    for heading in soup.find_all(["h2", "h3", "h4"]):
+        if pattern.search(heading.get_text()):
+            container = heading.find_next(["ul", "ol"])
+            if container:
+                items = _list_items(container)
+                if items:
+                    return items
+    return []
+
+
+def from_heuristics(soup: BeautifulSoup) -> Optional[dict]:
+    ingredients = _section(soup, HEURISTIC_INGREDIENTS)
+    instructions = _section(soup, HEURISTIC_INSTRUCTIONS)
+    if len(ingredients) < 2 or not instructions:
+        return None
+
+    title = ""
+    og_title = soup.find("meta", property="og:title")
+    if og_title and og_title.get("content"):
+        title = og_title["content"]
+    elif soup.find("h1"):
+        title = soup.find("h1").get_text(" ", strip=True)
+    elif soup.title:
+        title = soup.title.get_text(strip=True)
+
+    description = soup.find("meta", attrs={"name": "description"})
+    image = soup.find("meta", property="og:image")
+    return {
+        "title": " ".join(title.split()),
+        "description": description.get("content", "") if description else "",
+        "ingredients": [parse_ingredient(i) for i in ingredients],
+        "instructions": instructions,
+        "prep_time": 0,
+        "cook_time": 0,
+        "servings": 4,
+        "category": parse_category(title),
+        "tags": [],
+        "image_url": image.get("content", "") if image else "",
+    }
+
+
+class ParserStats:
+    """Per-worker counts of which stage produced each imported recipe"""
+
+    def __init__(self):
+        self.attempts = 0
+        self.hits = Counter()
+
+    def record(self, stage: str) -> None:
+        self.attempts += 1
+        self.hits[stage] += 1
+
+    def stats(self) -> dict:
+        return {
+            "attempts": self.attempts,
+            "hits": {stage: self.hits[stage] for stage in STAGES},
+            "hit_rates": {
+                stage: round(self.hits[stage] / self.attempts, 3) if self.attempts else 0.0
+                for stage in STAGES
+            }
+        }
+
+
+parser_stats = ParserStats()
+
+
+def page_text(soup: BeautifulSoup, limit: int = PAGE_TEXT_LIMIT) -> str:
+    """Visible page text, stopping once limit characters are collected"""
+    # Remove scripts and styles
+    for element in soup(['script', 'style', 'nav', 'footer', 'header', 'noscript', 'template']):
+        element.decompose()
+
+    parts: List[str] = []
+    size = 0
+    for text in (soup.body or soup).stripped_strings:
+        parts.append(text)
+        size += len(text) + 1
+        if size >= limit:
+            break
+    return "\n".join(parts)[:limit]
+
+
+def _attempt(stage: str, parse, source) -> Optional[dict]:
+    try:
+        recipe = parse(source)
+    except Exception as e:
+        logger.warning(f"Recipe {stage} parsing failed: {e}")
+        return None
+    return recipe if is_complete(recipe) else None
+
+
+def _parse_local(html: str) -> Tuple[Optional[dict], str, Optional[BeautifulSoup]]:
+    recipe = _attempt("json_ld", from_json_ld, html)
+    if recipe:
+        return recipe, "json_ld", None
+
+    soup = BeautifulSoup(HEAVY_MARKUP_RE.sub("", html), HTML_PARSER)
+    for stage, parse in (("microdata", from_microdata), ("heuristic", from_heuristics)):
+        recipe = _attempt(stage, parse, soup)
+        if recipe:
+            return recipe, stage, soup
+    return None, "llm", soup
+
+
+def read_page(html: str) -> Tuple[Optional[dict], str]:
+    """Parse a page: (recipe, "") on a local hit, else (None, text for the LLM).
+
+    CPU bound; callers on the event loop should run it in a thread.
+    """
+    recipe, stage, soup = _parse_local(html)
+    parser_stats.record(stage)
+    if recipe:
+        return recipe, ""
+    return None, page_text(soup)
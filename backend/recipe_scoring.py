@@ -0,0 +1,213 @@
+import logging
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from cache import TTLCache
+from config import settings
+from dependencies import db
+
+logger = logging.getLogger(__name__)
+
+FEEDBACK_VALUES = {"yes": 1, "no": -1}
+
+DAY = 86400.0
+
+
+@dataclass(frozen=True)
+class ScoringWeights:
+    """Points added to (or taken off) a recipe's score for /cooking/tonight"""
+    base: float = 50
+    liked: float = 30
+    disliked: float = 50
+    quick: float = 20          # total time <= 30 min
+    moderate: float = 10       # total time <= 45 min
+    slow: float = 10           # total time > 60 min
+    recently_cooked: float = 25
+    recent_days: float = 7
+
+    @classmethod
+    def from_settings(cls) -> "ScoringWeights":
+        return cls(
+            liked=settings.tonight_liked_weight,
+            disliked=settings.tonight_disliked_weight,
+            quick=settings.tonight_quick_weight,
+            moderate=settings.tonight_moderate_weight,
+            slow=settings.tonight_slow_weight,
+            recently_cooked=settings.tonight_recent_weight,
+            recent_days=settings.tonight_recent_days
+        )
+
+
+def effort_level(total_time: int, ingredient_count: int) -> str:
+    effort = "Low"
+    if total_time > 45 or ingredient_count > 10:
+        effort = "Medium"
+    if total_time > 75 or ingredient_count > 15:
+        effort = "High"
+    return effort
+
+
+def _timestamp(value) -> float:
+    if isinstance(value, datetime):
+        dt = value
+    else:
+        try:
+            dt = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+        except ValueError:
+            return np.nan
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.timestamp()
+
+
+class RecipeSnapshot:
+    """Columnar view of the recipes one user can see, for vectorized scoring.
+
+    Holds only what scoring needs: total time, ingredient count, the user's
+    feedback and when they last cooked each recipe. Full documents are
+    fetched for the winners only.
+    """
+
+    def __init__(
+        self,
+        ids: List[str],
+        total_time: np.ndarray,
+        ingredient_count: np.ndarray,
+        feedback: np.ndarray,
+        last_cooked: np.ndarray
+    ):
+        self.ids = ids
+        self.positions = {recipe_id: i for i, recipe_id in enumerate(ids)}
+        self.total_time = total_time
+        self.ingredient_count = ingredient_count
+        self.feedback = feedback
+        self.last_cooked = last_cooked
+
+    @classmethod
+    def build(
+        cls,
+        recipes: List[dict],
+        feedback: Dict[str, str],
+        last_cooked: Dict[str, float]
+    ) -> "RecipeSnapshot":
+        ids = [r["id"] for r in recipes]
+        return cls(
+            ids,
+            total_time=np.array([r.get("total_time") or 0 for r in recipes], dtype=np.int32),
+            ingredient_count=np.array([r.get("ingredient_count") or 0 for r in recipes], dtype=np.int32),
+            feedback=np.array([FEEDBACK_VALUES.get(feedback.get(i), 0) for i in ids], dtype=np.int8),
+            last_cooked=np.array([last_cooked.get(i, np.nan) for i in ids], dtype=np.float64)
+        )
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def scores(self, weights: ScoringWeights, now: Optional[float] = None) -> np.ndarray:
+        now = time.time() if now is None else now
+        t = self.total_time
+        scores = np.full(len(self.ids), weights.base, dtype=np.float64)
+        scores += np.where(self.feedback > 0, weights.liked, 0.0)
+        scores -= np.where(self.feedback < 0, weights.disliked, 0.0)
+        scores += np.select(
+            [t <= 30, t <= 45, t > 60],
+            [weights.quick, weights.moderate, -weights.slow],
+            default=0.0
+        )
+        if weights.recently_cooked and weights.recent_days > 0:
+            # Full penalty when cooked just now, fading to none after recent_days
+            days_ago = (now - self.last_cooked) / DAY
+            fade = np.clip(1.0 - days_ago / weights.recent_days, 0.0, 1.0)
+            scores -= weights.recently_cooked * np.nan_to_num(fade, nan=0.0)
+        return scores
+
+    def top(self, k: int, weights: ScoringWeights, now: Optional[float] = None) -> List[int]:
+        """Positions of the k best scoring recipes, best first"""
+        n = len(self.ids)
+        if n == 0 or k <= 0:
+            return []
+        scores = self.scores(weights, now)
+        if k < n:
+            # Everything scoring at least the k-th best, including all the
+            # recipes tied with it, so ties can be settled by library order
+            threshold = -np.partition(-scores, k - 1)[k - 1]
+            candidates = np.flatnonzero(scores >= threshold)
+        else:
+            candidates = np.arange(n)
+        # Best score first, then library order among equal scores
+        order = candidates[np.lexsort((candidates, -scores[candidates]))]
+        return order[:k].tolist()
+
+
+class RecipeSnapshots:
+    """Per-worker cache of scoring snapshots, dropped on recipe, feedback
+    and cooking writes. Writes through other workers show up once the
+    snapshot expires.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self._snapshots = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    async def for_user(self, user: dict) -> RecipeSnapshot:
+        key = (user["id"], user.get("household_id"))
+        snapshot = self._snapshots.get(key)
+        if snapshot is not None:
+            return snapshot
+
+        user_id, household_id = key
+        if household_id:
+            query = {"$or": [{"author_id": user_id}, {"household_id": household_id}]}
+        else:
+            query = {"author_id": user_id}
+
+        # Let Mongo reduce each recipe to the two numbers scoring needs
+        recipes = await db.recipes.aggregate([
+            {"$match": query},
+            {"$project": {
+                "_id": 0,
+                "id": 1,
+                "total_time": {"$add": [{"$ifNull": ["$prep_time", 0]}, {"$ifNull": ["$cook_time", 0]}]},
+                "ingredient_count": {"$size": {"$ifNull": ["$ingredients", []]}}
+            }}
+        ]).to_list(None)
+
+        feedback = {
+            fb["recipe_id"]: fb["feedback"]
+            async for fb in db.recipe_feedback.find(
+                {"user_id": user_id}, {"_id": 0, "recipe_id": 1, "feedback": 1}
+            )
+        }
+
+        last_cooked = {
+            row["_id"]: _timestamp(row["last"])
+            async for row in db.cook_sessions.aggregate([
+                {"$match": {"user_id": user_id, "completed_at": {"$ne": None}}},
+                {"$group": {"_id": "$recipe_id", "last": {"$max": "$completed_at"}}}
+            ])
+        }
+
+        snapshot = RecipeSnapshot.build(recipes, feedback, last_cooked)
+        logger.info(f"Built scoring snapshot for user {user_id} ({len(snapshot)} recipes)")
+        self._snapshots.set(key, snapshot)
+        return snapshot
+
+    def invalidate_recipe(self, doc: dict) -> None:
+        """Drop snapshots that could include a created, updated or deleted recipe"""
+        for key in self._snapshots.keys():
+            user_id, household_id = key
+            if doc.get("author_id") == user_id or (household_id and doc.get("household_id") == household_id):
+                self._snapshots.pop(key)
+
+    def invalidate_user(self, user_id: str) -> None:
+        """Drop a user's snapshots, e.g. after new feedback or a cook session"""
+        for key in [k for k in self._snapshots.keys() if k[0] == user_id]:
+            self._snapshots.pop(key)
+
+    def stats(self) -> dict:
+        return self._snapshots.stats()
+
+
+recipe_snapshots = RecipeSnapshots(maxsize=settings.search_index_size, ttl=settings.search_index_ttl)
@@ -0,0 +1,33 @@
+from typing import List, Optional, Type
+
+from fastapi import Response
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel
+
+
+def response_projection(model: Type[BaseModel]) -> dict:
+    """Mongo projection returning just the fields of a response model"""
+    return {"_id": 0, **{name: 1 for name in model.model_fields}}
+
+
+def with_defaults(docs: List[dict], model: Type[BaseModel]) -> List[dict]:
+    """Fill in optional fields that older documents predate"""
+    defaults = {
+        name: field.get_default(call_default_factory=True)
+        for name, field in model.model_fields.items() if not field.is_required()
+    }
+    for doc in docs:
+        for name, value in defaults.items():
+            doc.setdefault(name, value)
+    return docs
+
+
+def json_list(docs: List[dict], model: Type[BaseModel], response: Optional[Response] = None) -> ORJSONResponse:
+    """Send stored documents as-is instead of validating each one against
+    the route's response_model, which dominates the time of large lists.
+
+    The documents should be read with response_projection(model) so they
+    already have the model's shape. Headers set on the injected response
+    (e.g. the next page cursor) are kept.
+    """
+    return ORJSONResponse(with_defaults(docs, model), headers=dict(response.headers) if response else None)
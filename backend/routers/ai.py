@@ -1,56 +1,177 @@
 from fastapi import APIRouter, HTTPException, Depends, Request
-from models import ImportURLRequest, ImportTextRequest, AutoMealPlanRequest, FridgeSearchRequest
-from dependencies import db, get_current_user, call_llm, clean_llm_json
+from models import (
+    ImportURLRequest, ImportTextRequest, BatchImportRequest, BatchImportJob, BATCH_IMPORT_TEXT_CHARS,
+    AutoMealPlanRequest, FridgeSearchRequest, RecipeCreate
+)
+from dependencies import (
+    db, get_current_user, call_llm, stream_llm, clean_llm_json, resolve_llm_config, settings,
+    provider_clients, page_cache
+)
 from routers.prompts import get_user_prompt
-from bs4 import BeautifulSoup
+from search import recipe_search
+from ingredient_match import ingredient_index
+from recipe_scoring import recipe_snapshots
+from collection_versions import collection_versions, recipe_scopes, RECIPES
+from jobs import job_manager, JobCancelled, JobContext, JOB_STATUS_PROJECTION
+from streaming import ndjson_response, stream_json_events
+from recipe_parser import read_page, parser_stats
+from datetime import datetime, timezone
+import asyncio
+import httpx
 import json
 import logging
+import uuid
+from typing import Optional, Tuple
+from pydantic import ValidationError
+from pymongo.errors import BulkWriteError
 
 router = APIRouter(prefix="/ai", tags=["AI"])
 logger = logging.getLogger(__name__)
 
-@router.post("/import-url")
-async def import_recipe_from_url(
-    request: Request,
-    data: ImportURLRequest,
-    user: dict = Depends(get_current_user)
-):
-    """Extract recipe from URL using AI"""
-    try:
-        client = request.app.state.http_client
-        response = await client.get(data.url, timeout=30.0, follow_redirects=True)
-        html = response.text
+HTML_CONTENT_TYPES = ("text/html", "application/xhtml+xml", "text/plain")
 
-        soup = BeautifulSoup(html, 'html.parser')
+async def fetch_html(client, url: str, headers: Optional[dict] = None) -> Tuple[Optional[str], httpx.Headers]:
+    """Download a page, reading at most FETCH_MAX_BYTES of it within FETCH_TOTAL_TIMEOUT.
 
-        # Remove scripts and styles
-        for element in soup(['script', 'style', 'nav', 'footer', 'header']):
-            element.decompose()
+    Returns (html, response headers); html is None when a conditional
+    request came back 304 Not Modified.
+    """
+    try:
+        async with asyncio.timeout(settings.fetch_total_timeout):
+            return await _fetch_html(client, url, headers)
+    except TimeoutError:
+        raise HTTPException(status_code=400, detail="Page took too long to download")
+
+async def _fetch_html(client, url: str, headers: Optional[dict]) -> Tuple[Optional[str], httpx.Headers]:
+    async with client.stream("GET", url, headers=headers, follow_redirects=True) as response:
+        if response.status_code == 304:
+            return None, response.headers
+        if response.status_code >= 400:
+            raise HTTPException(status_code=400, detail=f"Page returned HTTP {response.status_code}")
+        content_type = response.headers.get("content-type", "").split(";")[0].strip().lower()
+        if content_type and content_type not in HTML_CONTENT_TYPES:
+            raise HTTPException(status_code=400, detail=f"Not a web page ({content_type})")
+
+        body = bytearray()
+        async for chunk in response.aiter_bytes():
+            body.extend(chunk)
+            if len(body) >= settings.fetch_max_bytes:
+                # Recipe markup is near the top; skip the megabytes of ads below
+                logger.info(f"Truncated {url} at {settings.fetch_max_bytes} bytes")
+                break
+        html = bytes(body[:settings.fetch_max_bytes]).decode(response.encoding or "utf-8", errors="replace")
+        return html, response.headers
+
+async def read_recipe_page(client, url: str) -> Tuple[Optional[dict], str]:
+    """Download a page and try the local parsers (JSON-LD, microdata, heuristics).
+
+    Returns (recipe, "") when one of them finds a complete recipe, otherwise
+    (None, page text) for the LLM. Parsing runs in a thread so large pages
+    don't stall the event loop.
+
+    Results are kept in the page cache: fresh entries skip the network, stale
+    ones are revalidated with a conditional GET and reused on 304.
+    """
+    cached = await page_cache.get(url)
+    if cached and page_cache.is_fresh(cached):
+        page_cache.record("hit")
+        return page_cache.result(cached)
+
+    html, headers = await fetch_html(client, url, page_cache.conditional_headers(cached))
+    if html is None and cached:
+        page_cache.record("revalidated")
+        return page_cache.result(await page_cache.touch(cached))
+    if html is None:
+        # 304 to a request we didn't make conditional
+        raise HTTPException(status_code=400, detail="Page returned HTTP 304")
+
+    page_cache.record("miss")
+    recipe, text_content = await asyncio.to_thread(read_page, html)
+    await page_cache.put(url, recipe, text_content, headers.get("etag"), headers.get("last-modified"))
+    return recipe, text_content
+
+async def extract_recipe_from_url(client, url: str, user: dict) -> dict:
+    recipe, text_content = await read_recipe_page(client, url)
+    if recipe:
+        return recipe
 
-        # Truncate content to fit in small model context windows (embedded models have ~2048 tokens)
-        text_content = soup.get_text(separator='\n', strip=True)[:3000]
+    # Get custom or default prompt
+    system_prompt = await get_user_prompt(user["id"], "recipe_extraction")
 
-        # Get custom or default prompt
-        system_prompt = await get_user_prompt(user["id"], "recipe_extraction")
+    result = await call_llm(
+        client,
+        system_prompt,
+        f"Extract recipe from:\n{text_content}",
+        user["id"]
+    )
 
-        result = await call_llm(
-            request.app.state.http_client,
-            system_prompt,
-            f"Extract recipe from:\n{text_content}",
-            user["id"]
-        )
+    return json.loads(clean_llm_json(result))
 
-        result = clean_llm_json(result)
+async def extract_recipe_from_text(client, text: str, user: dict) -> dict:
+    # Get custom or default prompt
+    system_prompt = await get_user_prompt(user["id"], "recipe_extraction")
 
-        recipe_data = json.loads(result)
+    # Truncate to fit embedded model context windows (~2048 tokens)
+    result = await call_llm(
+        client,
+        system_prompt,
+        f"Parse this recipe:\n{text[:3000]}",
+        user["id"]
+    )
 
-        return recipe_data
+    return json.loads(clean_llm_json(result))
+
+@router.post("/import-url")
+async def import_recipe_from_url(
+    request: Request,
+    data: ImportURLRequest,
+    user: dict = Depends(get_current_user)
+):
+    """Extract recipe from URL using AI"""
+    try:
+        return await extract_recipe_from_url(request.app.state.http_client, data.url, user)
     except json.JSONDecodeError as e:
         raise HTTPException(status_code=400, detail=f"Failed to parse recipe data: {str(e)}")
+    except HTTPException as e:
+        # Let "model busy" through so clients can honour Retry-After
+        if e.status_code == 429:
+            raise
+        logger.error(f"Import error: {e.detail}")
+        raise HTTPException(status_code=400, detail=f"Failed to import recipe: {e.detail}")
     except Exception as e:
         logger.error(f"Import error: {e}")
         raise HTTPException(status_code=400, detail=f"Failed to import recipe: {str(e)}")
 
+@router.post("/import-url/stream")
+async def import_recipe_from_url_stream(
+    request: Request,
+    data: ImportURLRequest,
+    user: dict = Depends(get_current_user)
+):
+    """Extract recipe from URL, streaming progress and tokens as NDJSON"""
+    client = request.app.state.http_client
+
+    async def events():
+        yield {"type": "status", "stage": "fetching"}
+        try:
+            recipe, text_content = await read_recipe_page(client, data.url)
+        except Exception as e:
+            logger.error(f"Import error: {e}")
+            yield {"type": "error", "detail": f"Failed to import recipe: {str(e)}"}
+            return
+
+        if recipe:
+            yield {"type": "result", "data": recipe}
+            return
+
+        system_prompt = await get_user_prompt(user["id"], "recipe_extraction")
+        yield {"type": "status", "stage": "extracting"}
+        tokens = stream_llm(client, system_prompt, f"Extract recipe from:\n{text_content}", user["id"])
+        async for event in stream_json_events(tokens):
+            yield event
+
+    return ndjson_response(events())
+
 @router.post("/import-text")
 async def import_recipe_from_text(
     request: Request,
@@ -58,32 +179,219 @@ async def import_recipe_from_text(
     user: dict = Depends(get_current_user)
 ):
     """Extract recipe from pasted text using AI"""
-    # Get custom or default prompt
-    system_prompt = await get_user_prompt(user["id"], "recipe_extraction")
+    try:
+        return await extract_recipe_from_text(request.app.state.http_client, data.text, user)
+    except json.JSONDecodeError as e:
+        raise HTTPException(status_code=400, detail=f"Failed to parse recipe: {str(e)}")
 
-    # Truncate to fit embedded model context windows (~2048 tokens)
-    result = await call_llm(
+@router.post("/import-text/stream")
+async def import_recipe_from_text_stream(
+    request: Request,
+    data: ImportTextRequest,
+    user: dict = Depends(get_current_user)
+):
+    """Extract recipe from pasted text, streaming tokens as NDJSON"""
+    system_prompt = await get_user_prompt(user["id"], "recipe_extraction")
+    tokens = stream_llm(
         request.app.state.http_client,
         system_prompt,
         f"Parse this recipe:\n{data.text[:3000]}",
         user["id"]
     )
+    return ndjson_response(stream_json_events(tokens))
+
+def build_recipe_doc(data: dict, user: dict) -> dict:
+    """Recipe document for an AI-extracted recipe, owned by user.
+
+    The extraction is validated as a RecipeCreate first, so nothing is
+    stored that RecipeResponse can't read back; raises ValueError if it
+    doesn't fit.
+    """
+    fields = {
+        name: value for name, value in data.items()
+        if name in RecipeCreate.model_fields and value not in (None, "")
+    }
+    fields.setdefault("title", "Untitled")
+    fields.setdefault("ingredients", [])
+    fields.setdefault("instructions", [])
+    try:
+        recipe = RecipeCreate(**fields)
+    except ValidationError as e:
+        error = e.errors(include_url=False)[0]
+        location = ".".join(str(part) for part in error["loc"])
+        raise ValueError(f"Invalid recipe ({location}: {error['msg']})")
 
-    result = clean_llm_json(result)
+    now = datetime.now(timezone.utc).isoformat()
+    return {
+        "id": str(uuid.uuid4()),
+        **recipe.model_dump(),
+        "author_id": user["id"],
+        "household_id": user.get("household_id"),
+        "created_at": now,
+        "updated_at": now
+    }
 
+# Shared by every batch on this worker so concurrent batches don't multiply
+# the load on a provider
+_batch_fetch_limit = asyncio.Semaphore(settings.batch_fetch_concurrency)
+_batch_llm_limits: dict = {}
+
+def batch_llm_limit(provider: str) -> asyncio.Semaphore:
+    if provider not in _batch_llm_limits:
+        if provider == "embedded":
+            limit = 1
+        elif provider == "ollama":
+            limit = settings.ollama_max_connections
+        else:
+            limit = settings.batch_llm_concurrency
+        _batch_llm_limits[provider] = asyncio.Semaphore(limit)
+    return _batch_llm_limits[provider]
+
+async def run_batch_import(params: BatchImportJob, user: dict, ctx: JobContext) -> dict:
+    """Extract every item of a batch, recording progress on the job document.
+
+    Items are only marked done once their recipe is inserted, so a batch
+    resumed after a restart skips them and retries the rest.
+    """
+    client = provider_clients.get("fetch")
+    config = await resolve_llm_config(user["id"])
+    llm_limit = batch_llm_limit(config["provider"])
+    system_prompt = await get_user_prompt(user["id"], "recipe_extraction")
+    pending: list = []
+
+    async def flush():
+        batch = pending[:]
+        pending.clear()
+        if not batch:
+            return
+        # Unordered, so one bad document doesn't stop the rest of the batch
+        try:
+            await db.recipes.insert_many([doc for _, doc in batch], ordered=False)
+            errors = {}
+        except BulkWriteError as e:
+            errors = {err["index"]: err.get("errmsg", "Insert failed") for err in e.details.get("writeErrors", [])}
+        except Exception as e:
+            logger.error(f"Batch insert failed: {e}")
+            errors = {position: "Could not save recipe" for position in range(len(batch))}
+
+        inserted = [(index, doc) for position, (index, doc) in enumerate(batch) if position not in errors]
+        update = {}
+        for position, error in errors.items():
+            index = batch[position][0]
+            logger.warning(f"Batch import item failed: {error}")
+            update[f"items.{index}.status"] = "failed"
+            update[f"items.{index}.error"] = error
+        for index, doc in inserted:
+            recipe_search.upsert(doc)
+            ingredient_index.upsert(doc)
+            recipe_snapshots.invalidate_recipe(doc)
+            update[f"items.{index}.status"] = "done"
+            update[f"items.{index}.recipe_id"] = doc["id"]
+            update[f"items.{index}.title"] = doc["title"]
+        if inserted:
+            await collection_versions.bump(RECIPES, *(s for _, doc in inserted for s in recipe_scopes(doc)))
+        await ctx.update(update, inc={"completed": len(inserted), "failed": len(errors)})
+
+    async def process(index: int, item):
+        try:
+            recipe_data = None
+            if item.kind == "url":
+                async with _batch_fetch_limit:
+                    recipe_data, text_content = await read_recipe_page(client, item.source)
+                user_prompt = f"Extract recipe from:\n{text_content}"
+            else:
+                user_prompt = f"Parse this recipe:\n{item.source[:BATCH_IMPORT_TEXT_CHARS]}"
+
+            if recipe_data is None:
+                async with llm_limit:
+                    result = await call_llm(client, system_prompt, user_prompt, user["id"])
+                recipe_data = json.loads(clean_llm_json(result))
+            if not isinstance(recipe_data, dict):
+                raise ValueError("No recipe found")
+            pending.append((index, build_recipe_doc(recipe_data, user)))
+            if len(pending) >= settings.batch_insert_size:
+                await flush()
+        except JobCancelled:
+            raise
+        except Exception as e:
+            detail = e.detail if isinstance(e, HTTPException) else str(e)
+            logger.warning(f"Batch import item failed: {detail}")
+            await ctx.update(
+                {f"items.{index}.status": "failed", f"items.{index}.error": detail},
+                inc={"failed": 1}
+            )
+
+    done = {i for i, item in enumerate(ctx.job.get("items", [])) if item.get("status") == "done"}
+    # Failures are retried when a batch is resumed
+    await ctx.update({"failed": 0})
+    tasks = [
+        asyncio.create_task(process(i, item))
+        for i, item in enumerate(params.items) if i not in done
+    ]
     try:
-        recipe_data = json.loads(result)
-        return recipe_data
-    except json.JSONDecodeError as e:
-        raise HTTPException(status_code=400, detail=f"Failed to parse recipe: {str(e)}")
+        await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        raise
+    await flush()
+
+    job = await db.jobs.find_one({"id": ctx.job_id}, {"_id": 0, "completed": 1, "failed": 1})
+    return {"completed": job["completed"], "failed": job["failed"]}
+
+def batch_import_progress(params: BatchImportJob) -> dict:
+    """Initial progress of a batch, however it was submitted"""
+    return {
+        "total": len(params.items),
+        "completed": 0,
+        "failed": 0,
+        "items": [
+            # Keep long pasted texts out of the status document
+            {
+                "kind": item.kind,
+                "source": item.source if item.kind == "url" else item.source[:80],
+                "status": "pending"
+            }
+            for item in params.items
+        ]
+    }
 
-@router.post("/auto-meal-plan")
-async def auto_generate_meal_plan(
-    request: Request,
-    data: AutoMealPlanRequest,
+@router.post("/import-batch")
+async def import_recipes_batch(
+    data: BatchImportRequest,
     user: dict = Depends(get_current_user)
 ):
-    """Auto-generate a meal plan for the week using AI"""
+    """Import many recipes from URLs and/or pasted texts as a background job"""
+    items = [{"kind": "url", "source": url} for url in data.urls if url.strip()]
+    items += [{"kind": "text", "source": text[:BATCH_IMPORT_TEXT_CHARS]} for text in data.texts if text.strip()]
+    if not items:
+        raise HTTPException(status_code=400, detail="Provide at least one URL or text")
+    if len(items) > settings.batch_import_max_items:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many items (max {settings.batch_import_max_items} per batch)"
+        )
+
+    job = await job_manager.submit("batch_import", user["id"], {"items": items})
+
+    return {"job_id": job["id"], "status": job["status"], "total": len(items)}
+
+@router.get("/import-stats")
+async def get_import_stats(user: dict = Depends(get_current_user)):
+    """How often URL imports were parsed locally vs. sent to the LLM (this worker)"""
+    return parser_stats.stats()
+
+@router.get("/import-batch/{job_id}")
+async def get_batch_import(job_id: str, user: dict = Depends(get_current_user)):
+    """Progress and per-item results of a batch import"""
+    job = await db.jobs.find_one(
+        {"id": job_id, "user_id": user["id"], "type": "batch_import"}, JOB_STATUS_PROJECTION
+    )
+    if not job:
+        raise HTTPException(status_code=404, detail="Import job not found")
+    return job
+
+async def generate_meal_plan(client, data: AutoMealPlanRequest, user: dict) -> dict:
     # Get user's recipes
     query = {"$or": [{"author_id": user["id"]}]}
     if user.get("household_id"):
@@ -107,7 +415,7 @@ Exclude recipes: {data.exclude_recipes or 'none'}
 Available recipes:
 {json.dumps(recipes_summary)}"""
 
-    result = await call_llm(request.app.state.http_client, system_prompt, user_prompt, user["id"])
+    result = await call_llm(client, system_prompt, user_prompt, user["id"])
 
     result = clean_llm_json(result)
 
@@ -117,76 +425,142 @@ Available recipes:
     except json.JSONDecodeError:
         raise HTTPException(status_code=500, detail="Failed to generate meal plan")
 
-@router.post("/fridge-search")
-async def fridge_search(
+@router.post("/auto-meal-plan")
+async def auto_generate_meal_plan(
     request: Request,
-    data: FridgeSearchRequest,
+    data: AutoMealPlanRequest,
     user: dict = Depends(get_current_user)
 ):
-    """Find recipes matching available ingredients"""
-    ingredients_str = ", ".join(data.ingredients)
+    """Auto-generate a meal plan for the week using AI"""
+    return await generate_meal_plan(request.app.state.http_client, data, user)
 
-    # First, search existing recipes
-    query = {"$or": [{"author_id": user["id"]}]}
-    if user.get("household_id"):
-        query["$or"].append({"household_id": user["household_id"]})
+async def match_fridge_recipes(data: FridgeSearchRequest, user: dict) -> dict:
+    """Rank the user's whole library by how much of each recipe is on hand"""
+    index = await ingredient_index.for_user(user)
+    matches = index.match(data.ingredients, limit=settings.fridge_max_results)
 
-    all_recipes = await db.recipes.find(query, {"_id": 0}).to_list(500)
+    matching_ids = [m["recipe_id"] for m in matches if m["coverage"] >= settings.fridge_min_coverage]
+    docs = {}
+    if matching_ids:
+        async for doc in db.recipes.find({"id": {"$in": matching_ids}}, {"_id": 0}):
+            docs[doc["id"]] = doc
 
-    # Get custom or default prompt
+    return {
+        "matching_recipes": [docs[recipe_id] for recipe_id in matching_ids if recipe_id in docs],
+        "suggestions": [
+            {
+                "recipe_id": m["recipe_id"],
+                "missing_ingredients": m["missing_ingredients"],
+                "match_percentage": round(m["coverage"] * 100)
+            }
+            for m in matches
+        ],
+        "ai_recipe_suggestion": None
+    }
+
+async def build_fridge_prompts(data: FridgeSearchRequest, user: dict, results: dict):
+    """Build the prompts asking the LLM for a new recipe from the ingredients"""
     system_prompt = await get_user_prompt(user["id"], "fridge_search")
+    ingredients_str = ", ".join(data.ingredients)
+    titles = [r["title"] for r in results["matching_recipes"][:10]]
 
-    # If no recipes and user wants AI suggestions, just ask for a new recipe
-    if len(all_recipes) == 0 and data.search_online:
-        user_prompt = f"I have these ingredients: {ingredients_str}. Suggest a simple recipe I can make."
-    else:
-        # Limit recipes and use compact JSON to fit in context window
-        recipes_info = [{"id": r["id"], "title": r["title"], "ingredients": [i.get("name", i) if isinstance(i, dict) else i for i in r.get("ingredients", [])][:10]} for r in all_recipes[:25]]
+    user_prompt = f"I have these ingredients: {ingredients_str}."
+    if titles:
+        user_prompt += f"\nRecipes I already have with them: {', '.join(titles)}."
+    user_prompt += "\nSuggest a new simple recipe I can make."
+    return system_prompt, user_prompt
 
-        user_prompt = f"""Available ingredients: {ingredients_str}
+def fridge_results(results: dict, ai_result) -> dict:
+    suggestion = None
+    if isinstance(ai_result, dict):
+        # Custom prompts may return the recipe itself rather than wrapping it
+        suggestion = ai_result.get("ai_suggestion") or (ai_result if ai_result.get("title") else None)
+    return {**results, "ai_recipe_suggestion": suggestion}
 
-Existing recipes:
-{json.dumps(recipes_info) if recipes_info else "No existing recipes yet."}
+@router.post("/fridge-search")
+async def fridge_search(
+    request: Request,
+    data: FridgeSearchRequest,
+    user: dict = Depends(get_current_user)
+):
+    """Find recipes matching available ingredients.
 
-Find matching recipes{" and suggest a new simple recipe" if data.search_online else ""}."""
+    Matching is done locally across the whole library; the LLM is only
+    asked for a new recipe when search_online is set.
+    """
+    results = await match_fridge_recipes(data, user)
+    if not data.search_online:
+        return results
 
+    system_prompt, user_prompt = await build_fridge_prompts(data, user, results)
     try:
         result = await call_llm(request.app.state.http_client, system_prompt, user_prompt, user["id"])
         logger.info(f"LLM response length: {len(result) if result else 0}")
 
         if not result or len(result.strip()) == 0:
             logger.warning("LLM returned empty response")
-            return {
-                "matching_recipes": [],
-                "suggestions": [],
-                "ai_recipe_suggestion": None,
-                "error": "AI returned empty response. Try again or use a different AI provider."
-            }
+            return {**results, "error": "AI returned empty response. Try again or use a different AI provider."}
 
         result = clean_llm_json(result)
         ai_result = json.loads(result)
     except json.JSONDecodeError as e:
         logger.warning(f"Failed to parse AI fridge-search response: {e}, raw: {result[:500] if result else 'empty'}")
         return {
-            "matching_recipes": [],
-            "suggestions": [],
-            "ai_recipe_suggestion": None,
+            **results,
             "error": f"AI response was not valid JSON. The embedded AI may have crashed. Try using Ollama or a cloud API instead."
         }
+    except HTTPException as e:
+        if e.status_code == 429:
+            raise
+        logger.error(f"AI fridge-search error: {e.detail}")
+        return {**results, "error": e.detail}
     except Exception as e:
         logger.error(f"AI fridge-search error: {e}")
-        return {
-            "matching_recipes": [],
-            "suggestions": [],
-            "ai_recipe_suggestion": None,
-            "error": str(e)
-        }
+        return {**results, "error": str(e)}
 
-    # Get full recipe data for matches
-    matching_recipes = [r for r in all_recipes if r["id"] in ai_result.get("matching_recipe_ids", [])]
+    return fridge_results(results, ai_result)
 
-    return {
-        "matching_recipes": matching_recipes,
-        "suggestions": ai_result.get("suggestions", []),
-        "ai_recipe_suggestion": ai_result.get("ai_suggestion")
-    }
+@router.post("/fridge-search/stream")
+async def fridge_search_stream(
+    request: Request,
+    data: FridgeSearchRequest,
+    user: dict = Depends(get_current_user)
+):
+    """Find recipes matching available ingredients, streaming the AI suggestion as NDJSON"""
+    results = await match_fridge_recipes(data, user)
+
+    async def local():
+        yield {"type": "result", "data": results}
+
+    if not data.search_online:
+        return ndjson_response(local())
+
+    system_prompt, user_prompt = await build_fridge_prompts(data, user, results)
+    tokens = stream_llm(request.app.state.http_client, system_prompt, user_prompt, user["id"])
+
+    async def events():
+        # Local matches are ready long before the model's suggestion
+        yield {"type": "matches", "data": results}
+        async for event in stream_json_events(tokens):
+            if event["type"] == "result":
+                event = {"type": "result", "data": fridge_results(results, event["data"])}
+            yield event
+
+    return ndjson_response(events())
+
+
+# Background job handlers: the same work as the endpoints above, run through
+# /jobs so it survives dropped connections and proxy timeouts
+async def import_url_job(params: ImportURLRequest, user: dict, ctx: JobContext) -> dict:
+    return await extract_recipe_from_url(provider_clients.get("fetch"), params.url, user)
+
+async def import_text_job(params: ImportTextRequest, user: dict, ctx: JobContext) -> dict:
+    return await extract_recipe_from_text(provider_clients.get("fetch"), params.text, user)
+
+async def auto_meal_plan_job(params: AutoMealPlanRequest, user: dict, ctx: JobContext) -> dict:
+    return await generate_meal_plan(provider_clients.get("fetch"), params, user)
+
+job_manager.register("import_url", import_url_job, ImportURLRequest)
+job_manager.register("import_text", import_text_job, ImportTextRequest)
+job_manager.register("auto_meal_plan", auto_meal_plan_job, AutoMealPlanRequest)
+job_manager.register("batch_import", run_batch_import, BatchImportJob, progress=batch_import_progress)
@@ -1,6 +1,12 @@
 from fastapi import APIRouter, HTTPException, Depends
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
 from models import UserCreate, UserLogin, UserResponse, UserUpdate
-from dependencies import db, hash_password, verify_password, create_token, get_current_user
+from dependencies import db, hash_password, verify_password, create_token, get_current_user, invalidate_user
+from search import recipe_search
+from ingredient_match import ingredient_index
+from recipe_scoring import recipe_snapshots
+from collection_versions import collection_versions, MEMBERS
 import uuid
 import asyncio
 from datetime import datetime, timezone
@@ -86,7 +92,7 @@ async def update_profile(data: UserUpdate, user: dict = Depends(get_current_user
         update_data["name"] = data.name
 
     if data.email is not None and data.email != user["email"]:
-        existing = await db.users.find_one({"email": data.email})
+        existing = await db.users.find_one({"email": data.email}, {"_id": 0, "id": 1})
         if existing and existing["id"] != user["id"]:
             raise HTTPException(status_code=400, detail="Email already in use")
         update_data["email"] = data.email
@@ -94,10 +100,23 @@ async def update_profile(data: UserUpdate, user: dict = Depends(get_current_user
     if data.allergies is not None:
         update_data["allergies"] = data.allergies
 
+    updated_user = user
     if update_data:
-        await db.users.update_one({"id": user["id"]}, {"$set": update_data})
+        try:
+            updated_user = await db.users.find_one_and_update(
+                {"id": user["id"]},
+                {"$set": update_data},
+                projection={"_id": 0, "password": 0},
+                return_document=ReturnDocument.AFTER
+            )
+        except DuplicateKeyError:
+            # Taken by someone else since the check above
+            raise HTTPException(status_code=400, detail="Email already in use")
+        invalidate_user(user["id"])
+        if updated_user is None:
+            raise HTTPException(status_code=404, detail="User not found")
+        await collection_versions.bump(MEMBERS, updated_user.get("household_id"))
 
-    updated_user = await db.users.find_one({"id": user["id"]}, {"_id": 0, "password": 0})
     return UserResponse(
         id=updated_user["id"],
         email=updated_user["email"],
@@ -134,6 +153,9 @@ async def delete_account(user: dict = Depends(get_current_user)):
 
     # Delete user's recipes (not shared with household)
     await db.recipes.delete_many({"author_id": user_id, "household_id": None})
+    recipe_search.invalidate_user(user_id)
+    ingredient_index.invalidate_user(user_id)
+    recipe_snapshots.invalidate_user(user_id)
 
     # Delete user's custom prompts
     await db.custom_prompts.delete_many({"user_id": user_id})
@@ -144,7 +166,12 @@ async def delete_account(user: dict = Depends(get_current_user)):
     # Delete user's LLM settings
     await db.llm_settings.delete_many({"user_id": user_id})
 
+    # Delete user's cooking stats summary
+    await db.user_stats.delete_many({"user_id": user_id})
+
     # Delete user account
     await db.users.delete_one({"id": user_id})
+    invalidate_user(user_id)
+    await collection_versions.bump(MEMBERS, household_id)
 
     return {"message": "Account deleted successfully"}
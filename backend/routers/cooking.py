@@ -1,6 +1,9 @@
 from fastapi import APIRouter, HTTPException, Depends
 from models import RecipeFeedback, CookSessionCreate, CookSessionComplete
 from dependencies import db, get_current_user
+from data_access import require_recipe
+from recipe_scoring import recipe_snapshots, ScoringWeights, effort_level
+from user_stats import get_user_stats, record_cook, record_feedback, summarize
 import uuid
 from datetime import datetime, timezone, date
 from typing import List, Optional
@@ -10,7 +13,6 @@ router = APIRouter(prefix="/cooking", tags=["Cooking"])
 @router.get("/tonight")
 async def get_tonight_suggestions(user: dict = Depends(get_current_user)):
     """Get 3 quick recipe suggestions for tonight based on user preferences"""
-    user_id = user["id"]
     household_id = user.get("household_id")
     today = date.today().isoformat()
 
@@ -29,94 +31,45 @@ async def get_tonight_suggestions(user: dict = Depends(get_current_user)):
         recipe = await db.recipes.find_one({"id": planned_meal["recipe_id"]}, {"_id": 0})
         if recipe:
             total_time = (recipe.get("prep_time", 0) or 0) + (recipe.get("cook_time", 0) or 0)
-            effort = "Low"
-            if total_time > 45 or len(recipe.get("ingredients", [])) > 10:
-                effort = "Medium"
-            if total_time > 75 or len(recipe.get("ingredients", [])) > 15:
-                effort = "High"
 
             return {
                 "planned": True,
                 "meal_type": planned_meal.get("meal_type", "Dinner"),
                 "recipe": {
                     **recipe,
-                    "effort": effort,
+                    "effort": effort_level(total_time, len(recipe.get("ingredients", []))),
                     "total_time": total_time
                 }
             }
 
-    # Get user's feedback history to boost/bury recipes
-    feedback_cursor = db.recipe_feedback.find({"user_id": user_id})
-    feedback_list = await feedback_cursor.to_list(500)
-
-    # Create score modifiers based on feedback
-    boosted = set()  # 'yes' recipes
-    buried = set()   # 'no' recipes
-
-    for fb in feedback_list:
-        if fb["feedback"] == "yes":
-            boosted.add(fb["recipe_id"])
-        elif fb["feedback"] == "no":
-            buried.add(fb["recipe_id"])
-
-    # Build query for user's recipes - get recipes they own OR in their household
-    if household_id:
-        query = {"$or": [{"author_id": user_id}, {"household_id": household_id}]}
-    else:
-        query = {"author_id": user_id}
-
-    # Get all available recipes
-    recipes = await db.recipes.find(query, {"_id": 0}).to_list(100)
-
-    # Score recipes
-    scored = []
-    for recipe in recipes:
-        score = 50  # Base score
-
-        # Boost 'yes' recipes
-        if recipe["id"] in boosted:
-            score += 30
-
-        # Bury 'no' recipes heavily
-        if recipe["id"] in buried:
-            score -= 50
-
-        # Prefer quick recipes (< 45 min total)
-        total_time = (recipe.get("prep_time", 0) or 0) + (recipe.get("cook_time", 0) or 0)
-        if total_time <= 30:
-            score += 20
-        elif total_time <= 45:
-            score += 10
-        elif total_time > 60:
-            score -= 10
-
-        # Calculate effort level
-        effort = "Low"
-        if total_time > 45 or len(recipe.get("ingredients", [])) > 10:
-            effort = "Medium"
-        if total_time > 75 or len(recipe.get("ingredients", [])) > 15:
-            effort = "High"
-
-        scored.append({
+    # Score the whole library from the cached snapshot (feedback boosts or
+    # buries recipes, quick ones are preferred, recently cooked ones fade)
+    snapshot = await recipe_snapshots.for_user(user)
+    top = snapshot.top(3, ScoringWeights.from_settings())
+    top_ids = [snapshot.ids[i] for i in top]
+
+    docs = {}
+    async for recipe in db.recipes.find({"id": {"$in": top_ids}}, {"_id": 0}):
+        docs[recipe["id"]] = recipe
+
+    suggestions = []
+    for i in top:
+        recipe = docs.get(snapshot.ids[i])
+        if recipe is None:
+            continue
+        total_time = int(snapshot.total_time[i])
+        suggestions.append({
             **recipe,
-            "_score": score,
-            "effort": effort,
+            "effort": effort_level(total_time, int(snapshot.ingredient_count[i])),
             "total_time": total_time
         })
 
-    # Sort by score and pick top 3
-    scored.sort(key=lambda x: x["_score"], reverse=True)
-    suggestions = scored[:3]
-
-    # Remove internal score from response
-    for s in suggestions:
-        del s["_score"]
-
     return {"planned": False, "suggestions": suggestions}
 
 @router.post("/session")
 async def start_cook_session(data: CookSessionCreate, user: dict = Depends(get_current_user)):
     """Start a cooking session for a recipe"""
+    await require_recipe(data.recipe_id)
     session_id = str(uuid.uuid4())
 
     session = {
@@ -141,24 +94,22 @@ async def complete_cook_session(session_id: str, data: CookSessionComplete, user
     if data.feedback not in ["yes", "no", "meh"]:
         raise HTTPException(status_code=400, detail="Feedback must be 'yes', 'no', or 'meh'")
 
-    # Update session
-    await db.cook_sessions.update_one(
+    # Update session; only the first completion counts as a cook
+    completed_at = datetime.now(timezone.utc).isoformat()
+    before = await db.cook_sessions.find_one_and_update(
         {"id": session_id},
         {"$set": {
-            "completed_at": datetime.now(timezone.utc).isoformat(),
+            "completed_at": completed_at,
             "feedback": data.feedback
-        }}
+        }},
+        projection={"_id": 0, "completed_at": 1}
     )
+    if before and not before.get("completed_at"):
+        await record_cook(user["id"], session["recipe_id"], completed_at)
 
     # Store/update feedback for this recipe
-    await db.recipe_feedback.update_one(
-        {"user_id": user["id"], "recipe_id": session["recipe_id"]},
-        {"$set": {
-            "feedback": data.feedback,
-            "updated_at": datetime.now(timezone.utc).isoformat()
-        }},
-        upsert=True
-    )
+    await record_feedback(user["id"], session["recipe_id"], data.feedback)
+    recipe_snapshots.invalidate_user(user["id"])
 
     return {"message": "Thanks for the feedback!", "feedback": data.feedback}
 
@@ -168,33 +119,13 @@ async def submit_feedback(data: RecipeFeedback, user: dict = Depends(get_current
     if data.feedback not in ["yes", "no", "meh"]:
         raise HTTPException(status_code=400, detail="Feedback must be 'yes', 'no', or 'meh'")
 
-    await db.recipe_feedback.update_one(
-        {"user_id": user["id"], "recipe_id": data.recipe_id},
-        {"$set": {
-            "feedback": data.feedback,
-            "updated_at": datetime.now(timezone.utc).isoformat()
-        }},
-        upsert=True
-    )
+    await record_feedback(user["id"], data.recipe_id, data.feedback)
+    recipe_snapshots.invalidate_user(user["id"])
 
     return {"message": "Feedback saved"}
 
 @router.get("/stats")
 async def get_cooking_stats(user: dict = Depends(get_current_user)):
-    """Get user's cooking statistics"""
-    user_id = user["id"]
-
-    # Count sessions
-    total_sessions = await db.cook_sessions.count_documents({"user_id": user_id, "completed_at": {"$ne": None}})
-
-    # Count feedback
-    yes_count = await db.recipe_feedback.count_documents({"user_id": user_id, "feedback": "yes"})
-    no_count = await db.recipe_feedback.count_documents({"user_id": user_id, "feedback": "no"})
-    meh_count = await db.recipe_feedback.count_documents({"user_id": user_id, "feedback": "meh"})
-
-    return {
-        "total_cooked": total_sessions,
-        "would_cook_again": yes_count,
-        "would_not_cook_again": no_count,
-        "meh": meh_count
-    }
+    """Get user's cooking statistics from their precomputed summary"""
+    stats = await get_user_stats(user["id"])
+    return summarize(stats, datetime.now(timezone.utc).date())
@@ -1,5 +1,6 @@
-from fastapi import APIRouter, HTTPException, Depends
-from dependencies import db, get_current_user
+from fastapi import APIRouter, Depends
+from dependencies import db, get_current_user, invalidate_user
+from data_access import require_recipe
 
 router = APIRouter(prefix="/favorites", tags=["favorites"])
 
@@ -11,14 +12,13 @@ async def get_favorites(user: dict = Depends(get_current_user)):
 @router.post("/{recipe_id}")
 async def add_favorite(recipe_id: str, user: dict = Depends(get_current_user)):
     """Add a recipe to favorites"""
-    recipe = await db.recipes.find_one({"id": recipe_id}, {"_id": 0})
-    if not recipe:
-        raise HTTPException(status_code=404, detail="Recipe not found")
-    
+    await require_recipe(recipe_id)
+
     await db.users.update_one(
         {"id": user["id"]},
         {"$addToSet": {"favorites": recipe_id}}
     )
+    invalidate_user(user["id"])
     return {"message": "Added to favorites", "is_favorite": True}
 
 @router.delete("/{recipe_id}")
@@ -28,4 +28,5 @@ async def remove_favorite(recipe_id: str, user: dict = Depends(get_current_user)
         {"id": user["id"]},
         {"$pull": {"favorites": recipe_id}}
     )
+    invalidate_user(user["id"])
     return {"message": "Removed from favorites", "is_favorite": False}
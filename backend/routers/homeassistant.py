@@ -1,5 +1,6 @@
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Query, Request, Response
 from dependencies import db, get_current_user
+from collection_versions import collection_versions, list_scope, MEAL_PLANS, SHOPPING_LISTS
 from datetime import datetime, timezone
 import uuid
 
@@ -37,10 +38,17 @@ rest:
     }
 
 @router.get("/today")
-async def homeassistant_today(user: dict = Depends(get_current_user)):
+async def homeassistant_today(request: Request, response: Response, user: dict = Depends(get_current_user)):
     """Get today's meals for Home Assistant"""
     today = datetime.now(timezone.utc).strftime("%Y-%m-%d")
 
+    # next_meal moves with the hour even when the plans don't change
+    not_modified = await collection_versions.conditional_get(
+        request, response, MEAL_PLANS, [list_scope(user)], today, datetime.now(timezone.utc).hour
+    )
+    if not_modified:
+        return not_modified
+
     query = {"date": today}
     if user.get("household_id"):
         query["household_id"] = user["household_id"]
@@ -69,8 +77,14 @@ async def homeassistant_today(user: dict = Depends(get_current_user)):
     }
 
 @router.get("/shopping")
-async def homeassistant_shopping(user: dict = Depends(get_current_user)):
+async def homeassistant_shopping(request: Request, response: Response, user: dict = Depends(get_current_user)):
     """Get shopping list summary for Home Assistant"""
+    not_modified = await collection_versions.conditional_get(
+        request, response, SHOPPING_LISTS, [list_scope(user)]
+    )
+    if not_modified:
+        return not_modified
+
     query = {}
     if user.get("household_id"):
         query["household_id"] = user["household_id"]
@@ -1,6 +1,7 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Request, Response
 from models import HouseholdCreate, HouseholdResponse, UserResponse, HouseholdInvite, JoinHouseholdRequest
-from dependencies import db, get_current_user
+from dependencies import db, get_current_user, invalidate_user
+from collection_versions import collection_versions, MEMBERS
 import uuid
 import secrets
 from datetime import datetime, timezone, timedelta
@@ -23,6 +24,7 @@ async def create_household(data: HouseholdCreate, user: dict = Depends(get_curre
     }
     await db.households.insert_one(household_doc)
     await db.users.update_one({"id": user["id"]}, {"$set": {"household_id": household_id}})
+    invalidate_user(user["id"])
 
     return HouseholdResponse(**household_doc)
 
@@ -36,9 +38,15 @@ async def get_my_household(user: dict = Depends(get_current_user)):
     return HouseholdResponse(**household)
 
 @router.get("/members", response_model=List[UserResponse])
-async def get_household_members(user: dict = Depends(get_current_user)):
+async def get_household_members(request: Request, response: Response, user: dict = Depends(get_current_user)):
     if not user.get("household_id"):
         return []
+    not_modified = await collection_versions.conditional_get(
+        request, response, MEMBERS, [user["household_id"]]
+    )
+    if not_modified:
+        return not_modified
+
     household = await db.households.find_one({"id": user["household_id"]}, {"_id": 0})
     if not household:
         return []
@@ -57,7 +65,9 @@ async def invite_to_household(data: HouseholdInvite, user: dict = Depends(get_cu
         raise HTTPException(status_code=400, detail="User already in a household")
 
     await db.users.update_one({"id": invitee["id"]}, {"$set": {"household_id": user["household_id"]}})
+    invalidate_user(invitee["id"])
     await db.households.update_one({"id": user["household_id"]}, {"$push": {"member_ids": invitee["id"]}})
+    await collection_versions.bump(MEMBERS, user["household_id"])
 
     return {"message": "User added to household"}
 
@@ -73,7 +83,9 @@ async def leave_household(user: dict = Depends(get_current_user)):
         raise HTTPException(status_code=400, detail="Owner cannot leave. Transfer ownership first.")
 
     await db.users.update_one({"id": user["id"]}, {"$set": {"household_id": None}})
+    invalidate_user(user["id"])
     await db.households.update_one({"id": user["household_id"]}, {"$pull": {"member_ids": user["id"]}})
+    await collection_versions.bump(MEMBERS, user["household_id"])
 
     return {"message": "Left household"}
 
@@ -141,6 +153,8 @@ async def join_with_code(data: JoinHouseholdRequest, user: dict = Depends(get_cu
 
     # Add user to household
     await db.users.update_one({"id": user["id"]}, {"$set": {"household_id": household["id"]}})
+    invalidate_user(user["id"])
     await db.households.update_one({"id": household["id"]}, {"$push": {"member_ids": user["id"]}})
+    await collection_versions.bump(MEMBERS, household["id"])
 
     return {"message": f"Joined household: {household['name']}", "household_id": household["id"]}
@@ -1,6 +1,10 @@
 from fastapi import APIRouter, HTTPException, Depends
 from models import ImportPlatformRequest
 from dependencies import db, get_current_user
+from search import recipe_search
+from ingredient_match import ingredient_index
+from recipe_scoring import recipe_snapshots
+from collection_versions import collection_versions, recipe_scopes, RECIPES
 import json
 import uuid
 from datetime import datetime, timezone
@@ -89,6 +93,11 @@ async def import_from_platform(data: ImportPlatformRequest, user: dict = Depends
 
         if recipe_docs:
             await db.recipes.insert_many(recipe_docs)
+            for recipe_doc in recipe_docs:
+                recipe_search.upsert(recipe_doc)
+                ingredient_index.upsert(recipe_doc)
+                recipe_snapshots.invalidate_recipe(recipe_doc)
+            await collection_versions.bump(RECIPES, *(s for doc in recipe_docs for s in recipe_scopes(doc)))
 
         saved_count = len(recipe_docs)
 
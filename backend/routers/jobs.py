@@ -0,0 +1,66 @@
+from fastapi import APIRouter, HTTPException, Depends, Query
+from models import JobSubmit
+from dependencies import db, get_current_user
+from jobs import job_manager, JOB_STATUS_PROJECTION
+from typing import Optional
+
+router = APIRouter(prefix="/jobs", tags=["Jobs"])
+
+@router.post("")
+async def submit_job(data: JobSubmit, user: dict = Depends(get_current_user)):
+    """Queue a long-running task (AI import, meal plan, model download)"""
+    job = await job_manager.submit(data.type, user["id"], data.params)
+    return {key: value for key, value in job.items() if key not in JOB_STATUS_PROJECTION}
+
+@router.get("")
+async def get_jobs(
+    status: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=200),
+    user: dict = Depends(get_current_user)
+):
+    """Recent jobs for the current user, newest first"""
+    query = {"user_id": user["id"]}
+    if status:
+        query["status"] = status
+    return await db.jobs.find(
+        query, {**JOB_STATUS_PROJECTION, "items": 0}
+    ).sort("created_at", -1).to_list(limit)
+
+@router.get("/types")
+async def get_job_types(user: dict = Depends(get_current_user)):
+    """Job types this server can run"""
+    return {"types": job_manager.job_types, "workers": job_manager.stats()}
+
+@router.get("/{job_id}")
+async def get_job(job_id: str, user: dict = Depends(get_current_user)):
+    """Status and progress of a job"""
+    job = await db.jobs.find_one({"id": job_id, "user_id": user["id"]}, JOB_STATUS_PROJECTION)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@router.get("/{job_id}/result")
+async def get_job_result(job_id: str, user: dict = Depends(get_current_user)):
+    """Result of a completed job"""
+    job = await db.jobs.find_one(
+        {"id": job_id, "user_id": user["id"]},
+        {"_id": 0, "status": 1, "result": 1, "error": 1}
+    )
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job["status"] != "completed":
+        raise HTTPException(
+            status_code=409,
+            detail=job.get("error") or f"Job is {job['status']}"
+        )
+    return job["result"]
+
+@router.post("/{job_id}/cancel")
+async def cancel_job(job_id: str, user: dict = Depends(get_current_user)):
+    """Cancel a queued or running job"""
+    job = await job_manager.cancel(job_id, user["id"])
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job["status"] != "cancelled":
+        raise HTTPException(status_code=409, detail=f"Job is already {job['status']}")
+    return job
@@ -1,19 +1,18 @@
 from fastapi import APIRouter, Depends, HTTPException, Request
-from models import LLMSettingsUpdate
-from dependencies import db, get_current_user, settings
+from models import LLMSettingsUpdate, DownloadModelRequest
+from dependencies import db, get_current_user, settings, inference_queue, embedded_models, provider_clients
+from model_registry import EMBEDDED_MODELS
+from jobs import job_manager, JobContext
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
 import httpx
 import os
 
 router = APIRouter(prefix="/settings/llm", tags=["LLM Settings"])
 
-# Available embedded models (GPT4All)
-EMBEDDED_MODELS = [
-    {"id": "Phi-3-mini-4k-instruct.Q4_0.gguf", "name": "Phi-3 Mini (Recommended)", "size": "2.2GB", "ram": "4GB"},
-    {"id": "Llama-3.2-3B-Instruct-Q4_K_M.gguf", "name": "Llama 3.2 3B", "size": "2.0GB", "ram": "4GB"},
-    {"id": "Mistral-7B-Instruct-v0.3-Q4_K_M.gguf", "name": "Mistral 7B", "size": "4.4GB", "ram": "8GB"},
-    {"id": "Meta-Llama-3-8B-Instruct-Q4_K_M.gguf", "name": "Llama 3 8B", "size": "4.9GB", "ram": "8GB"},
-]
+# Multi-GB downloads get their own thread instead of holding one of the
+# default pool's, which password hashing and file I/O share
+_download_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="model-download")
 
 # Store LLM settings in memory (per-session) or DB for persistence
 # Initialize from env
@@ -66,6 +65,16 @@ async def update_llm_settings(llm_settings: LLMSettingsUpdate, user: dict = Depe
 
     return {"message": "LLM settings updated", "settings": settings_doc}
 
+@router.get("/queue")
+async def get_embedded_queue_status(user: dict = Depends(get_current_user)):
+    """Queue depth, wait times and resident models for the embedded model on this worker"""
+    return {**inference_queue.stats(), "models": embedded_models.stats()}
+
+@router.get("/connections")
+async def get_provider_connections(user: dict = Depends(get_current_user)):
+    """Connection pool usage per LLM provider on this worker"""
+    return provider_clients.stats()
+
 @router.post("/test")
 async def test_llm_connection(
     request: Request,
@@ -104,7 +113,7 @@ async def test_llm_connection(
     
     elif llm_settings.provider == "ollama":
         try:
-            client = request.app.state.http_client
+            client = provider_clients.get("ollama")
             # Test Ollama connection
             response = await client.get(f"{llm_settings.ollama_url}/api/tags", timeout=10.0)
             if response.status_code == 200:
@@ -130,6 +139,37 @@ async def test_llm_connection(
             return {"success": False, "message": "No API key configured"}
 
 
+async def download_model(model_name: str) -> dict:
+    """Download an embedded model; raises ValueError for an invalid name"""
+    from gpt4all import GPT4All
+    import asyncio
+    from pathlib import Path
+
+    # Security: Validate model_name to prevent path traversal
+    if '..' in model_name or '/' in model_name or '\\' in model_name:
+        raise ValueError("Invalid model name")
+
+    # Only allow known model file extensions
+    if not model_name.endswith('.gguf'):
+        raise ValueError("Invalid model format")
+
+    models_path = settings.embedded_models_path
+    os.makedirs(models_path, exist_ok=True)
+
+    # Check if already downloaded
+    model_file = Path(models_path) / model_name
+    if model_file.exists():
+        return {"success": True, "message": "Model already downloaded", "model": model_name}
+
+    # GPT4All handles the download automatically when we create the instance
+    def download():
+        GPT4All(model_name=model_name, model_path=models_path, allow_download=True)
+
+    loop = asyncio.get_running_loop()
+    await loop.run_in_executor(_download_executor, download)
+
+    return {"success": True, "message": f"Model {model_name} downloaded successfully"}
+
 @router.post("/download-model")
 async def download_embedded_model(
     model_name: str = "Phi-3-mini-4k-instruct.Q4_0.gguf",
@@ -137,34 +177,12 @@ async def download_embedded_model(
 ):
     """Trigger download of an embedded model"""
     try:
-        from gpt4all import GPT4All
-        import asyncio
-        from pathlib import Path
-
-        # Security: Validate model_name to prevent path traversal
-        if '..' in model_name or '/' in model_name or '\\' in model_name:
-            return {"success": False, "message": "Invalid model name"}
-
-        # Only allow known model file extensions
-        if not model_name.endswith('.gguf'):
-            return {"success": False, "message": "Invalid model format"}
-
-        models_path = settings.embedded_models_path
-        os.makedirs(models_path, exist_ok=True)
-
-        # Check if already downloaded
-        model_file = Path(models_path) / model_name
-        if model_file.exists():
-            return {"success": True, "message": "Model already downloaded", "model": model_name}
-        
-        # Download in background - this will take a while
-        # GPT4All handles the download automatically when we create the instance
-        def download():
-            GPT4All(model_name=model_name, model_path=models_path, allow_download=True)
-        
-        loop = asyncio.get_event_loop()
-        await loop.run_in_executor(None, download)
-        
-        return {"success": True, "message": f"Model {model_name} downloaded successfully"}
+        return await download_model(model_name)
     except Exception as e:
         return {"success": False, "message": str(e)}
+
+async def download_model_job(params: DownloadModelRequest, user: dict, ctx: JobContext) -> dict:
+    return await download_model(params.model_name)
+
+# Multi-GB downloads; one at a time per worker is plenty
+job_manager.register("download_model", download_model_job, DownloadModelRequest, concurrency=1)
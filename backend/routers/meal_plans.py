@@ -1,6 +1,9 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Request, Response
 from models import MealPlanCreate, MealPlanResponse
 from dependencies import db, get_current_user
+from data_access import get_recipe_ref
+from responses import json_list, response_projection
+from collection_versions import collection_versions, list_scope, MEAL_PLANS
 import uuid
 from datetime import datetime, timezone
 from typing import List, Optional
@@ -9,9 +12,7 @@ router = APIRouter(prefix="/meal-plans", tags=["Meal Plans"])
 
 @router.post("", response_model=MealPlanResponse)
 async def create_meal_plan(plan: MealPlanCreate, user: dict = Depends(get_current_user)):
-    recipe = await db.recipes.find_one({"id": plan.recipe_id}, {"_id": 0})
-    if not recipe:
-        raise HTTPException(status_code=404, detail="Recipe not found")
+    recipe = await get_recipe_ref(plan.recipe_id, ["title"])
 
     plan_id = str(uuid.uuid4())
     plan_doc = {
@@ -25,15 +26,24 @@ async def create_meal_plan(plan: MealPlanCreate, user: dict = Depends(get_curren
         "created_at": datetime.now(timezone.utc).isoformat()
     }
     await db.meal_plans.insert_one(plan_doc)
+    await collection_versions.bump(MEAL_PLANS, plan_doc["household_id"])
 
     return MealPlanResponse(**plan_doc)
 
 @router.get("", response_model=List[MealPlanResponse])
 async def get_meal_plans(
+    request: Request,
+    response: Response,
     start_date: Optional[str] = None,
     end_date: Optional[str] = None,
     user: dict = Depends(get_current_user)
 ):
+    not_modified = await collection_versions.conditional_get(
+        request, response, MEAL_PLANS, [list_scope(user)], request.url.query
+    )
+    if not_modified:
+        return not_modified
+
     query = {}
     if user.get("household_id"):
         query["household_id"] = user["household_id"]
@@ -48,8 +58,8 @@ async def get_meal_plans(
         else:
             query["date"] = {"$lte": end_date}
 
-    plans = await db.meal_plans.find(query, {"_id": 0}).sort("date", 1).to_list(500)
-    return [MealPlanResponse(**p) for p in plans]
+    plans = await db.meal_plans.find(query, response_projection(MealPlanResponse)).sort("date", 1).to_list(500)
+    return json_list(plans, MealPlanResponse, response)
 
 @router.delete("/{plan_id}")
 async def delete_meal_plan(plan_id: str, user: dict = Depends(get_current_user)):
@@ -66,4 +76,5 @@ async def delete_meal_plan(plan_id: str, user: dict = Depends(get_current_user))
          raise HTTPException(status_code=403, detail="Not authorized")
 
     await db.meal_plans.delete_one({"id": plan_id})
+    await collection_versions.bump(MEAL_PLANS, plan["household_id"])
     return {"message": "Meal plan deleted"}
@@ -36,21 +36,22 @@ Return ONLY valid JSON in this format:
 }
 Consider variety, nutrition balance, and user preferences. Use actual recipe IDs from the provided list.""",
 
-    "fridge_search": """You are a recipe matching assistant. Given a list of available ingredients and a list of recipes, identify which recipes can be made with the available ingredients (allowing for minor missing seasonings/staples).
+    "fridge_search": """You are a cooking assistant. Given a list of available ingredients and the recipes the user already has that use them, suggest ONE new simple recipe that can be made mostly from the available ingredients (basic pantry staples are fine).
 
 Return ONLY valid JSON in this format (no markdown, no explanation):
 {
-  "matching_recipe_ids": ["id1", "id2"],
-  "suggestions": [
-    {
-      "recipe_id": "id",
-      "missing_ingredients": ["ingredient1"],
-      "match_percentage": 90
-    }
-  ],
-  "ai_suggestion": null
-}
-If search_online is true and you want to suggest a NEW recipe, set ai_suggestion to a recipe object instead of null."""
+  "ai_suggestion": {
+    "title": "Recipe Title",
+    "description": "Brief description",
+    "ingredients": [{"name": "ingredient", "amount": "1", "unit": "cup"}],
+    "instructions": ["Step 1", "Step 2"],
+    "prep_time": 15,
+    "cook_time": 30,
+    "servings": 4,
+    "category": "Dinner",
+    "tags": []
+  }
+}"""
 }
 
 
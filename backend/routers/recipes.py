@@ -1,21 +1,42 @@
-from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, Query
-from models import RecipeCreate, RecipeResponse
-from dependencies import db, get_current_user
+from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, Header, Query, Request, Response
+from pymongo import ReturnDocument
+from models import RecipeCreate, RecipeResponse, RecipeSummaryResponse, ImageUploadRequest, ImageUploadComplete
+from dependencies import db, get_current_user, invalidate_user
 from config import settings
-import uuid
-import aiofiles
+from search import recipe_search
+from ingredient_match import ingredient_index
+from recipe_scoring import recipe_snapshots
+from pagination import NEXT_CURSOR_HEADER, encode_cursor, decode_cursor
+from data_access import RECIPE_REF_FIELDS, etag, get_own_recipe_ref, if_match_filter, projection, require_recipe
+from images import image_processor, default_url, srcsets, is_processed_url, variant_key
+from storage import storage
+from responses import json_list, response_projection
+from collection_versions import collection_versions, recipe_scopes, RECIPES
+import logging
 import re
+import uuid
 from datetime import datetime, timezone, timedelta
-from typing import List, Optional
+from typing import List, Literal, Optional, Union
 from pathlib import Path
 
 router = APIRouter(prefix="/recipes", tags=["Recipes"])
+logger = logging.getLogger(__name__)
+
+# Fields Mongo returns for view=summary: a recipe card plus the sort key
+SUMMARY_PROJECTION = {
+    "_id": 0, "id": 1, "title": 1, "image_url": 1, "image_variants": 1,
+    "category": 1, "prep_time": 1, "cook_time": 1, "created_at": 1
+}
 
-def escape_regex(text: str) -> str:
-    """Escape special regex characters to prevent ReDoS attacks"""
-    return re.escape(text)
+# The full view reads only what RecipeResponse returns, so list pages can be
+# sent without a validation pass
+FULL_PROJECTION = response_projection(RecipeResponse)
 
-# Ensure upload directory exists
+# Direct uploads to object storage
+IMAGE_CONTENT_TYPES = {"image/jpeg", "image/png", "image/gif", "image/webp"}
+UPLOAD_ID_RE = re.compile(r"^[0-9a-f]{32}$")
+
+# Ensure upload directory exists (the image work dir when storing in S3)
 UPLOAD_DIR = Path(settings.upload_dir)
 UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
 
@@ -42,16 +63,36 @@ async def create_recipe(recipe: RecipeCreate, user: dict = Depends(get_current_u
         "updated_at": now
     }
     await db.recipes.insert_one(recipe_doc)
+    recipe_search.upsert(recipe_doc)
+    ingredient_index.upsert(recipe_doc)
+    recipe_snapshots.invalidate_recipe(recipe_doc)
+    await collection_versions.bump(RECIPES, *recipe_scopes(recipe_doc))
     
     return RecipeResponse(**recipe_doc)
 
-@router.get("", response_model=List[RecipeResponse])
+@router.get("", response_model=List[Union[RecipeResponse, RecipeSummaryResponse]])
 async def get_recipes(
+    request: Request,
+    response: Response,
     category: Optional[str] = None,
     search: Optional[str] = None,
     favorites_only: Optional[bool] = False,
+    cursor: Optional[str] = None,
+    limit: int = Query(500, ge=1, le=500),
+    view: Literal["full", "summary"] = "full",
     user: dict = Depends(get_current_user)
 ):
+    # Own and household recipes; favorites come from the user document
+    # this request sees, which may lag other workers by USER_CACHE_TTL
+    not_modified = await collection_versions.conditional_get(
+        request, response, RECIPES, [user["id"], user.get("household_id")],
+        request.url.query, sorted(user.get("favorites", []))
+    )
+    if not_modified:
+        return not_modified
+
+    model = RecipeSummaryResponse if view == "summary" else RecipeResponse
+    fields = SUMMARY_PROJECTION if view == "summary" else FULL_PROJECTION
     query = {}
     user_favorites = user.get("favorites", [])
     
@@ -74,30 +115,62 @@ async def get_recipes(
         query["category"] = category
     
     if search:
-        # Escape special regex characters to prevent ReDoS attacks
-        safe_search = escape_regex(search)
-        query["$and"] = query.get("$and", [])
-        query["$and"].append({
-            "$or": [
-                {"title": {"$regex": safe_search, "$options": "i"}},
-                {"description": {"$regex": safe_search, "$options": "i"}},
-                {"tags": {"$regex": safe_search, "$options": "i"}}
-            ]
-        })
-    
-    recipes = await db.recipes.find(query, {"_id": 0}).sort("created_at", -1).to_list(500)
+        # Ranked ids come from the in-process index; only the page is read from Mongo
+        index = await recipe_search.for_user(user)
+        ranked_ids = index.search(
+            search,
+            category=category if category and category != "All" else None,
+            only_ids=set(user_favorites) if favorites_only else None
+        )
+        offset = decode_cursor(cursor).get("offset", 0) if cursor else 0
+        if not isinstance(offset, int) or offset < 0:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+
+        page_ids = ranked_ids[offset:offset + limit]
+        if offset + limit < len(ranked_ids):
+            response.headers[NEXT_CURSOR_HEADER] = encode_cursor({"offset": offset + limit})
+
+        recipes = []
+        if page_ids:
+            docs = await db.recipes.find({"id": {"$in": page_ids}}, fields).to_list(len(page_ids))
+            by_id = {d["id"]: d for d in docs}
+            recipes = [by_id[rid] for rid in page_ids if rid in by_id]
+    else:
+        # Keyset pagination: newest first, id breaks created_at ties
+        if cursor:
+            position = decode_cursor(cursor)
+            if not isinstance(position.get("created_at"), str) or not isinstance(position.get("id"), str):
+                raise HTTPException(status_code=400, detail="Invalid cursor")
+            query = {"$and": [query, {"$or": [
+                {"created_at": {"$lt": position["created_at"]}},
+                {"created_at": position["created_at"], "id": {"$lt": position["id"]}}
+            ]}]}
+
+        recipes = await db.recipes.find(query, fields).sort(
+            [("created_at", -1), ("id", -1)]
+        ).limit(limit + 1).to_list(limit + 1)
+
+        if len(recipes) > limit:
+            recipes = recipes[:limit]
+            response.headers[NEXT_CURSOR_HEADER] = encode_cursor({
+                "created_at": recipes[-1]["created_at"],
+                "id": recipes[-1]["id"]
+            })
     
     # Add is_favorite flag to each recipe
     for r in recipes:
         r["is_favorite"] = r["id"] in user_favorites
     
-    return [RecipeResponse(**r) for r in recipes]
+    return json_list(recipes, model, response)
 
 @router.get("/{recipe_id}", response_model=RecipeResponse)
-async def get_recipe(recipe_id: str, user: dict = Depends(get_current_user)):
+async def get_recipe(recipe_id: str, response: Response, user: dict = Depends(get_current_user)):
     recipe = await db.recipes.find_one({"id": recipe_id}, {"_id": 0})
     if not recipe:
         raise HTTPException(status_code=404, detail="Recipe not found")
+
+    # Send back as If-Match when updating to avoid overwriting someone else's edit
+    response.headers["ETag"] = etag(recipe)
     
     user_favorites = user.get("favorites", [])
     recipe["is_favorite"] = recipe["id"] in user_favorites
@@ -105,17 +178,13 @@ async def get_recipe(recipe_id: str, user: dict = Depends(get_current_user)):
     return RecipeResponse(**recipe)
 
 @router.put("/{recipe_id}", response_model=RecipeResponse)
-async def update_recipe(recipe_id: str, recipe: RecipeCreate, user: dict = Depends(get_current_user)):
-    existing = await db.recipes.find_one({"id": recipe_id}, {"_id": 0})
-    if not existing:
-        raise HTTPException(status_code=404, detail="Recipe not found")
-    
-    # Allow updates by author or household members? Assuming strict ownership or household for now
-    # The original code checked for author_id. Let's keep it but also allow household members to edit if it's a household recipe?
-    # Original logic: if existing["author_id"] != user["id"]: raise 403
-
-    if existing["author_id"] != user["id"]:
-        raise HTTPException(status_code=403, detail="Not authorized")
+async def update_recipe(
+    recipe_id: str,
+    recipe: RecipeCreate,
+    response: Response,
+    if_match: Optional[str] = Header(None),
+    user: dict = Depends(get_current_user)
+):
     
     update_data = {
         "title": recipe.title,
@@ -130,29 +199,49 @@ async def update_recipe(recipe_id: str, recipe: RecipeCreate, user: dict = Depen
         "image_url": recipe.image_url or "",
         "updated_at": datetime.now(timezone.utc).isoformat()
     }
+    if not is_processed_url(update_data["image_url"]):
+        # Image replaced by a link (or removed); the old variants no longer apply
+        update_data["image_variants"] = []
     
-    await db.recipes.update_one({"id": recipe_id}, {"$set": update_data})
-    updated = await db.recipes.find_one({"id": recipe_id}, {"_id": 0})
+    # Ownership (only the author may edit) and version checks are part of the
+    # filter, so nothing can change between the check and the write
+    # The document before the write, so replaced image variants can be cleaned up
+    previous = await db.recipes.find_one_and_update(
+        {"id": recipe_id, "author_id": user["id"], **if_match_filter(if_match)},
+        {"$set": update_data},
+        projection={"_id": 0},
+        return_document=ReturnDocument.BEFORE
+    )
+    if previous is None:
+        await get_own_recipe_ref(recipe_id, user)
+        raise HTTPException(status_code=412, detail="Recipe was changed by someone else; reload and try again")
+    updated = {**previous, **update_data}
+    if "image_variants" in update_data:
+        await delete_unused_variants(previous.get("image_variants"))
+
+    response.headers["ETag"] = etag(updated)
+    recipe_search.upsert(updated)
+    ingredient_index.upsert(updated)
+    recipe_snapshots.invalidate_recipe(updated)
+    await collection_versions.bump(RECIPES, *recipe_scopes(updated))
     return RecipeResponse(**updated)
 
 @router.delete("/{recipe_id}")
 async def delete_recipe(recipe_id: str, user: dict = Depends(get_current_user)):
-    existing = await db.recipes.find_one({"id": recipe_id}, {"_id": 0})
-    if not existing:
-        raise HTTPException(status_code=404, detail="Recipe not found")
-    
-    if existing["author_id"] != user["id"]:
-        raise HTTPException(status_code=403, detail="Not authorized")
-    
+    existing = await get_own_recipe_ref(recipe_id, user, [*RECIPE_REF_FIELDS, "image_variants"])
+
     await db.recipes.delete_one({"id": recipe_id})
+    recipe_search.remove(recipe_id)
+    ingredient_index.remove(recipe_id)
+    recipe_snapshots.invalidate_recipe(existing)
+    await collection_versions.bump(RECIPES, *recipe_scopes(existing))
+    await delete_unused_variants(existing.get("image_variants"))
     return {"message": "Recipe deleted"}
 
 @router.post("/{recipe_id}/favorite")
 async def toggle_favorite(recipe_id: str, user: dict = Depends(get_current_user)):
     """Toggle favorite status for a recipe"""
-    recipe = await db.recipes.find_one({"id": recipe_id}, {"_id": 0})
-    if not recipe:
-        raise HTTPException(status_code=404, detail="Recipe not found")
+    await require_recipe(recipe_id)
     
     user_favorites = user.get("favorites", [])
     
@@ -161,12 +250,14 @@ async def toggle_favorite(recipe_id: str, user: dict = Depends(get_current_user)
             {"id": user["id"]},
             {"$pull": {"favorites": recipe_id}}
         )
+        invalidate_user(user["id"])
         return {"is_favorite": False, "message": "Removed from favorites"}
     else:
         await db.users.update_one(
             {"id": user["id"]},
             {"$addToSet": {"favorites": recipe_id}}
         )
+        invalidate_user(user["id"])
         return {"is_favorite": True, "message": "Added to favorites"}
 
 @router.get("/{recipe_id}/scaled")
@@ -249,11 +340,56 @@ async def get_print_recipe(recipe_id: str, user: dict = Depends(get_current_user
         "printed_at": datetime.now(timezone.utc).isoformat()
     }
 
+def incoming_key(recipe_id: str, upload_id: str) -> str:
+    # Scoped to the recipe so an upload id can't be replayed against another one
+    return f"incoming/{recipe_id}/{upload_id}"
+
+async def delete_unused_variants(variants: list) -> None:
+    """Remove a replaced or deleted image's variants from storage.
+
+    Variants are named by content hash, so another recipe with the same
+    photo may still use them.
+    """
+    urls = [v["url"] for v in variants or [] if is_processed_url(v.get("url", ""))]
+    if not urls:
+        return
+    in_use = set(await db.recipes.distinct("image_variants.url", {"image_variants.url": {"$in": urls}}))
+    for url in set(urls) - in_use:
+        try:
+            await storage.delete(variant_key({"url": url}))
+        except Exception as e:
+            # A leftover file is harmless; the write that replaced it has landed
+            logger.warning(f"Failed to delete image {url}: {e}")
+
+async def set_recipe_image(recipe_id: str, user: dict, variants: list, response: Response) -> dict:
+    image_url = default_url(variants)
+    updated_at = datetime.now(timezone.utc).isoformat()
+    recipe = await db.recipes.find_one_and_update(
+        {"id": recipe_id, "author_id": user["id"]},
+        {"$set": {
+            "image_url": image_url,
+            "image_variants": variants,
+            "updated_at": updated_at
+        }},
+        projection=projection([*RECIPE_REF_FIELDS, "image_variants"])
+    )
+    if recipe:
+        # The photo is a new version of the recipe; an open edit form saves against it
+        response.headers["ETag"] = etag({"updated_at": updated_at})
+        await collection_versions.bump(RECIPES, *recipe_scopes(recipe))
+        await delete_unused_variants(recipe.get("image_variants"))
+
+    return {"image_url": image_url, "image_variants": variants, "srcset": srcsets(variants)}
+
 @router.post("/{recipe_id}/image")
-async def upload_recipe_image(recipe_id: str, file: UploadFile = File(...), user: dict = Depends(get_current_user)):
-    existing = await db.recipes.find_one({"id": recipe_id}, {"_id": 0})
-    if not existing:
-        raise HTTPException(status_code=404, detail="Recipe not found")
+async def upload_recipe_image(
+    recipe_id: str,
+    response: Response,
+    file: UploadFile = File(...),
+    user: dict = Depends(get_current_user)
+):
+    # Only the author may replace the photo (and so delete the old one)
+    await get_own_recipe_ref(recipe_id, user)
 
     # Whitelist allowed extensions
     ALLOWED_EXTENSIONS = {'jpg', 'jpeg', 'png', 'gif', 'webp'}
@@ -262,24 +398,50 @@ async def upload_recipe_image(recipe_id: str, file: UploadFile = File(...), user
     if ext not in ALLOWED_EXTENSIONS:
         raise HTTPException(status_code=400, detail="Invalid file type. Allowed: jpg, jpeg, png, gif, webp")
 
-    filename = f"{recipe_id}.{ext}"
-    file_path = UPLOAD_DIR / filename
+    # Resized WebP/AVIF variants instead of the full-resolution original
+    variants = await image_processor.process_upload(file)
+    return await set_recipe_image(recipe_id, user, variants, response)
 
-    async with aiofiles.open(file_path, 'wb') as f:
-        content = await file.read()
-        await f.write(content)
+@router.post("/{recipe_id}/image/upload-url")
+async def create_image_upload(recipe_id: str, data: ImageUploadRequest, user: dict = Depends(get_current_user)):
+    """Presigned form for uploading a photo straight to object storage.
 
-    image_url = f"/api/uploads/{filename}"
-    await db.recipes.update_one({"id": recipe_id}, {"$set": {"image_url": image_url}})
+    POST the file there with the returned fields, then call
+    /image/complete with the upload_id. Not available with local storage;
+    use POST /image instead.
+    """
+    await get_own_recipe_ref(recipe_id, user)
+    if not storage.supports_direct_upload:
+        raise HTTPException(status_code=400, detail="Direct uploads are not supported by this storage")
+    if data.content_type not in IMAGE_CONTENT_TYPES:
+        raise HTTPException(status_code=400, detail="Invalid file type. Allowed: jpg, jpeg, png, gif, webp")
 
-    return {"image_url": image_url}
+    upload_id = uuid.uuid4().hex
+    form = storage.presigned_upload(
+        incoming_key(recipe_id, upload_id), data.content_type, settings.image_max_upload_bytes
+    )
+    return {"upload_id": upload_id, "url": form["url"], "fields": form["fields"]}
+
+@router.post("/{recipe_id}/image/complete")
+async def complete_image_upload(
+    recipe_id: str,
+    data: ImageUploadComplete,
+    response: Response,
+    user: dict = Depends(get_current_user)
+):
+    await get_own_recipe_ref(recipe_id, user)
+    if not storage.supports_direct_upload:
+        raise HTTPException(status_code=400, detail="Direct uploads are not supported by this storage")
+    if not UPLOAD_ID_RE.match(data.upload_id):
+        raise HTTPException(status_code=400, detail="Invalid upload id")
+
+    variants = await image_processor.process_stored(incoming_key(recipe_id, data.upload_id))
+    return await set_recipe_image(recipe_id, user, variants, response)
 
 @router.post("/{recipe_id}/share")
 async def create_share_link(recipe_id: str, user: dict = Depends(get_current_user)):
     """Create a public share link for a recipe"""
-    recipe = await db.recipes.find_one({"id": recipe_id}, {"_id": 0})
-    if not recipe:
-        raise HTTPException(status_code=404, detail="Recipe not found")
+    await require_recipe(recipe_id)
 
     share_id = str(uuid.uuid4())[:8]
     share_doc = {
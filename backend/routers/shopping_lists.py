@@ -1,14 +1,18 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Header, Request, Response
+from pymongo import ReturnDocument
 from models import ShoppingListCreate, ShoppingListResponse
 from dependencies import db, get_current_user
+from data_access import etag, get_shopping_list_ref, if_match_filter
+from responses import json_list, response_projection
+from collection_versions import collection_versions, list_scope, SHOPPING_LISTS
 import uuid
 from datetime import datetime, timezone
-from typing import List
+from typing import List, Optional
 
 router = APIRouter(prefix="/shopping-lists", tags=["Shopping Lists"])
 
 @router.post("", response_model=ShoppingListResponse)
-async def create_shopping_list(data: ShoppingListCreate, user: dict = Depends(get_current_user)):
+async def create_shopping_list(data: ShoppingListCreate, response: Response, user: dict = Depends(get_current_user)):
     list_id = str(uuid.uuid4())
     now = datetime.now(timezone.utc).isoformat()
 
@@ -21,22 +25,30 @@ async def create_shopping_list(data: ShoppingListCreate, user: dict = Depends(ge
         "updated_at": now
     }
     await db.shopping_lists.insert_one(list_doc)
+    await collection_versions.bump(SHOPPING_LISTS, list_doc["household_id"])
 
+    response.headers["ETag"] = etag(list_doc)
     return ShoppingListResponse(**list_doc)
 
 @router.get("", response_model=List[ShoppingListResponse])
-async def get_shopping_lists(user: dict = Depends(get_current_user)):
+async def get_shopping_lists(request: Request, response: Response, user: dict = Depends(get_current_user)):
+    not_modified = await collection_versions.conditional_get(
+        request, response, SHOPPING_LISTS, [list_scope(user)]
+    )
+    if not_modified:
+        return not_modified
+
     query = {}
     if user.get("household_id"):
         query["household_id"] = user["household_id"]
     else:
         query["household_id"] = user["id"]
 
-    lists = await db.shopping_lists.find(query, {"_id": 0}).sort("created_at", -1).to_list(100)
-    return [ShoppingListResponse(**l) for l in lists]
+    lists = await db.shopping_lists.find(query, response_projection(ShoppingListResponse)).sort("created_at", -1).to_list(100)
+    return json_list(lists, ShoppingListResponse, response)
 
 @router.get("/{list_id}", response_model=ShoppingListResponse)
-async def get_shopping_list(list_id: str, user: dict = Depends(get_current_user)):
+async def get_shopping_list(list_id: str, response: Response, user: dict = Depends(get_current_user)):
     shopping_list = await db.shopping_lists.find_one({"id": list_id}, {"_id": 0})
     if not shopping_list:
         raise HTTPException(status_code=404, detail="Shopping list not found")
@@ -45,43 +57,58 @@ async def get_shopping_list(list_id: str, user: dict = Depends(get_current_user)
     if shopping_list.get("household_id") != user.get("household_id") and shopping_list.get("household_id") != user["id"]:
          raise HTTPException(status_code=403, detail="Not authorized")
 
+    response.headers["ETag"] = etag(shopping_list)
     return ShoppingListResponse(**shopping_list)
 
 @router.put("/{list_id}", response_model=ShoppingListResponse)
-async def update_shopping_list(list_id: str, data: ShoppingListCreate, user: dict = Depends(get_current_user)):
-    # Auth check logic first
-    shopping_list = await db.shopping_lists.find_one({"id": list_id})
-    if not shopping_list:
-        raise HTTPException(status_code=404, detail="Shopping list not found")
-
-    if shopping_list.get("household_id") != user.get("household_id") and shopping_list.get("household_id") != user["id"]:
-         raise HTTPException(status_code=403, detail="Not authorized")
-
+async def update_shopping_list(
+    list_id: str,
+    data: ShoppingListCreate,
+    response: Response,
+    if_match: Optional[str] = Header(None),
+    user: dict = Depends(get_current_user)
+):
     update_data = {
         "name": data.name,
         "items": [i.model_dump() for i in data.items] if data.items else [],
         "updated_at": datetime.now(timezone.utc).isoformat()
     }
 
-    await db.shopping_lists.update_one({"id": list_id}, {"$set": update_data})
-    updated = await db.shopping_lists.find_one({"id": list_id}, {"_id": 0})
+    # Household members share lists; If-Match stops one member's edit from
+    # silently overwriting another's
+    updated = await db.shopping_lists.find_one_and_update(
+        {
+            "id": list_id,
+            "household_id": {"$in": [user.get("household_id"), user["id"]]},
+            **if_match_filter(if_match)
+        },
+        {"$set": update_data},
+        projection={"_id": 0},
+        return_document=ReturnDocument.AFTER
+    )
+    if updated is None:
+        await get_shopping_list_ref(list_id, user)
+        raise HTTPException(status_code=412, detail="Shopping list was changed by someone else; reload and try again")
+    await collection_versions.bump(SHOPPING_LISTS, updated["household_id"])
+
+    response.headers["ETag"] = etag(updated)
     return ShoppingListResponse(**updated)
 
 @router.delete("/{list_id}")
 async def delete_shopping_list(list_id: str, user: dict = Depends(get_current_user)):
     # Auth check logic first
-    shopping_list = await db.shopping_lists.find_one({"id": list_id})
-    if not shopping_list:
-        raise HTTPException(status_code=404, detail="Shopping list not found")
-
-    if shopping_list.get("household_id") != user.get("household_id") and shopping_list.get("household_id") != user["id"]:
-         raise HTTPException(status_code=403, detail="Not authorized")
+    shopping_list = await get_shopping_list_ref(list_id, user)
 
     await db.shopping_lists.delete_one({"id": list_id})
+    await collection_versions.bump(SHOPPING_LISTS, shopping_list["household_id"])
     return {"message": "Shopping list deleted"}
 
 @router.post("/from-recipes")
-async def generate_shopping_list_from_recipes(recipe_ids: List[str], user: dict = Depends(get_current_user)):
+async def generate_shopping_list_from_recipes(
+    recipe_ids: List[str],
+    response: Response,
+    user: dict = Depends(get_current_user)
+):
     """Generate a shopping list from selected recipes"""
     recipes = await db.recipes.find({"id": {"$in": recipe_ids}}, {"_id": 0}).to_list(100)
 
@@ -108,5 +135,7 @@ async def generate_shopping_list_from_recipes(recipe_ids: List[str], user: dict
         "updated_at": now
     }
     await db.shopping_lists.insert_one(list_doc)
+    await collection_versions.bump(SHOPPING_LISTS, list_doc["household_id"])
 
+    response.headers["ETag"] = etag(list_doc)
     return ShoppingListResponse(**list_doc)
@@ -0,0 +1,200 @@
+from dependencies import db
+from cache import TTLCache
+from config import settings
+import bisect
+import logging
+import math
+import re
+import unicodedata
+from typing import Dict, List, Optional, Set, Type
+
+logger = logging.getLogger(__name__)
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+# Relative weight of a match in each indexed field
+FIELD_WEIGHTS = {"title": 3.0, "tags": 2.0, "description": 1.0}
+
+# A term that only matches as a prefix ("chick" -> "chicken") scores lower
+# than an exact token match so complete words rank first while typing.
+PREFIX_MATCH_FACTOR = 0.6
+
+INDEX_PROJECTION = {
+    "_id": 0, "id": 1, "title": 1, "description": 1, "tags": 1,
+    "category": 1, "created_at": 1, "author_id": 1, "household_id": 1
+}
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase, strip accents and split into alphanumeric tokens"""
+    if not text:
+        return []
+    text = unicodedata.normalize("NFKD", str(text))
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return TOKEN_RE.findall(text.lower())
+
+
+class RecipeSearchIndex:
+    """Inverted index over the recipes one user can see"""
+
+    def __init__(self, user_id: str, household_id: Optional[str]):
+        self.user_id = user_id
+        self.household_id = household_id
+        self.postings: Dict[str, Dict[str, float]] = {}
+        self.docs: Dict[str, dict] = {}
+        self._vocab: List[str] = []
+        self._vocab_dirty = False
+
+    def visible(self, doc: dict) -> bool:
+        if doc.get("author_id") == self.user_id:
+            return True
+        return bool(self.household_id) and doc.get("household_id") == self.household_id
+
+    def add(self, doc: dict) -> None:
+        recipe_id = doc["id"]
+        self.remove(recipe_id)
+
+        weights: Dict[str, float] = {}
+        for field, weight in FIELD_WEIGHTS.items():
+            value = doc.get(field) or ""
+            if isinstance(value, list):
+                value = " ".join(str(v) for v in value)
+            for token in tokenize(value):
+                weights[token] = max(weights.get(token, 0.0), weight)
+
+        for token, weight in weights.items():
+            if token not in self.postings:
+                self.postings[token] = {}
+                self._vocab_dirty = True
+            self.postings[token][recipe_id] = weight
+
+        self.docs[recipe_id] = {
+            "category": doc.get("category"),
+            "created_at": doc.get("created_at") or "",
+            "tokens": list(weights)
+        }
+
+    def remove(self, recipe_id: str) -> None:
+        entry = self.docs.pop(recipe_id, None)
+        if not entry:
+            return
+        for token in entry["tokens"]:
+            posting = self.postings.get(token)
+            if posting is None:
+                continue
+            posting.pop(recipe_id, None)
+            if not posting:
+                del self.postings[token]
+                self._vocab_dirty = True
+
+    def _expand(self, term: str) -> List[str]:
+        """Indexed tokens equal to or starting with term"""
+        if self._vocab_dirty:
+            self._vocab = sorted(self.postings)
+            self._vocab_dirty = False
+        start = bisect.bisect_left(self._vocab, term)
+        end = bisect.bisect_left(self._vocab, term + "\uffff")
+        return self._vocab[start:end]
+
+    def search(
+        self,
+        query: str,
+        category: Optional[str] = None,
+        only_ids: Optional[Set[str]] = None
+    ) -> List[str]:
+        """Return recipe ids matching every query term, best match first"""
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return []
+
+        total = max(len(self.docs), 1)
+        scores: Optional[Dict[str, float]] = None
+        for term in terms:
+            term_scores: Dict[str, float] = {}
+            for token in self._expand(term):
+                posting = self.postings[token]
+                idf = math.log(1 + total / len(posting))
+                factor = 1.0 if token == term else PREFIX_MATCH_FACTOR
+                for recipe_id, weight in posting.items():
+                    score = weight * idf * factor
+                    if score > term_scores.get(recipe_id, 0.0):
+                        term_scores[recipe_id] = score
+
+            if scores is None:
+                scores = term_scores
+            else:
+                scores = {rid: s + term_scores[rid] for rid, s in scores.items() if rid in term_scores}
+            if not scores:
+                return []
+
+        results = []
+        for recipe_id, score in scores.items():
+            if only_ids is not None and recipe_id not in only_ids:
+                continue
+            if category and self.docs[recipe_id]["category"] != category:
+                continue
+            results.append((score, self.docs[recipe_id]["created_at"], recipe_id))
+
+        results.sort(reverse=True)
+        return [recipe_id for _, _, recipe_id in results]
+
+
+class SearchIndexes:
+    """Per-worker registry of search indexes kept current by recipe writes.
+
+    Writes made through other workers only show up after the index expires,
+    so the TTL bounds how stale search results can get. index_class and
+    projection let other per-user recipe indexes reuse the same registry.
+    """
+
+    def __init__(
+        self,
+        maxsize: int,
+        ttl: float,
+        index_class: Type = RecipeSearchIndex,
+        projection: Optional[dict] = None
+    ):
+        self._indexes = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.index_class = index_class
+        self.projection = projection or INDEX_PROJECTION
+
+    async def for_user(self, user: dict) -> RecipeSearchIndex:
+        key = (user["id"], user.get("household_id"))
+        index = self._indexes.get(key)
+        if index is not None:
+            return index
+
+        index = self.index_class(user["id"], user.get("household_id"))
+        if index.household_id:
+            query = {"$or": [{"author_id": index.user_id}, {"household_id": index.household_id}]}
+        else:
+            query = {"author_id": index.user_id}
+
+        async for doc in db.recipes.find(query, self.projection):
+            index.add(doc)
+
+        logger.info(f"Built {self.index_class.__name__} for user {index.user_id} ({len(index.docs)} recipes)")
+        self._indexes.set(key, index)
+        return index
+
+    def upsert(self, doc: dict) -> None:
+        """Apply a created or updated recipe to every live index"""
+        for index in self._indexes.values():
+            if index.visible(doc):
+                index.add(doc)
+            else:
+                index.remove(doc["id"])
+
+    def remove(self, recipe_id: str) -> None:
+        for index in self._indexes.values():
+            index.remove(recipe_id)
+
+    def invalidate_user(self, user_id: str) -> None:
+        """Drop a user's indexes so the next search rebuilds them"""
+        for key in [k for k in self._indexes.keys() if k[0] == user_id]:
+            self._indexes.pop(key)
+
+    def stats(self) -> dict:
+        return self._indexes.stats()
+
+
+recipe_search = SearchIndexes(maxsize=settings.search_index_size, ttl=settings.search_index_ttl)
@@ -1,17 +1,32 @@
-from fastapi import FastAPI, APIRouter, HTTPException
+from fastapi import FastAPI, APIRouter, HTTPException, Depends, Request
+from fastapi.responses import ORJSONResponse
 from fastapi.staticfiles import StaticFiles
 from starlette.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
+import asyncio
 import logging
-import httpx
 from config import settings
-from dependencies import db, client
+from dependencies import (
+    db, client, get_current_user, user_cache, llm_flight, llm_cache, page_cache,
+    inference_queue, warm_up_embedded_model, provider_clients
+)
+from search import recipe_search
+from ingredient_match import ingredient_index
+from recipe_scoring import recipe_snapshots
+from pagination import NEXT_CURSOR_HEADER
+from indexes import ensure_indexes
+from jobs import job_manager
+from images import image_processor
+from storage import storage
+from uploads import get_stored_upload
+from compression import SelectiveGZipMiddleware
+from upload_limit import UploadSizeLimitMiddleware
 
 # Import routers
 from routers import (
     auth, households, recipes, ai, meal_plans, shopping_lists,
     homeassistant, notifications, calendar, import_data, llm_settings,
-    favorites, prompts, cooking
+    favorites, prompts, cooking, jobs
 )
 
 # Setup Logging
@@ -24,24 +39,41 @@ logger = logging.getLogger(__name__)
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
-    app.state.http_client = httpx.AsyncClient()
+    # General-purpose client for page fetches; LLM calls use per-provider pools
+    app.state.http_client = provider_clients.get("fetch")
 
     # Create indices
-    try:
-        await db.users.create_index("email", unique=True)
-        await db.users.create_index("id", unique=True)
-        await db.recipes.create_index("id", unique=True)
-        await db.recipes.create_index("author_id")
-        await db.recipes.create_index("household_id")
-    except Exception as e:
-        logger.error(f"Failed to create indices: {e}")
+    await ensure_indexes(db)
+
+    # Resume jobs interrupted by a restart and start heartbeating
+    job_manager.start()
+
+    if settings.embedded_warmup:
+        # Runs in the background so startup isn't held up by a multi-GB load
+        app.state.warmup_task = asyncio.create_task(warm_up_embedded_model())
 
     yield
     # Shutdown
-    await app.state.http_client.aclose()
+    warmup_task = getattr(app.state, "warmup_task", None)
+    if warmup_task and not warmup_task.done():
+        warmup_task.cancel()
+    await job_manager.shutdown()
+    inference_queue.shutdown()
+    image_processor.shutdown()
+    await provider_clients.aclose()
     client.close()
 
-app = FastAPI(lifespan=lifespan, title="Mise API")
+app = FastAPI(lifespan=lifespan, title="Mise API", default_response_class=ORJSONResponse)
+
+# Innermost, so its 413s still get CORS headers
+app.add_middleware(UploadSizeLimitMiddleware, max_bytes=settings.image_max_upload_bytes)
+
+if settings.gzip_minimum_size > 0:
+    app.add_middleware(
+        SelectiveGZipMiddleware,
+        minimum_size=settings.gzip_minimum_size,
+        compresslevel=settings.gzip_level
+    )
 
 # CORS - must be added before routes
 app.add_middleware(
@@ -50,6 +82,8 @@ app.add_middleware(
     allow_origins=settings.cors_origins.split(','),
     allow_methods=["*"],
     allow_headers=["*"],
+    # ETag is sent back as If-Match on updates
+    expose_headers=[NEXT_CURSOR_HEADER, "ETag"],
 )
 
 api_router = APIRouter(prefix="/api")
@@ -69,6 +103,7 @@ api_router.include_router(llm_settings.router)
 api_router.include_router(favorites.router)
 api_router.include_router(prompts.router)
 api_router.include_router(cooking.router)
+api_router.include_router(jobs.router)
 
 # Categories endpoint (simple enough to keep here or move to recipes)
 @api_router.get("/categories")
@@ -91,7 +126,9 @@ async def get_config():
         "features": {
             "ai_import": True,
             "ai_fridge_search": True,
-            "local_llm": settings.llm_provider == 'ollama'
+            "local_llm": settings.llm_provider == 'ollama',
+            # Photos go straight to object storage (/image/upload-url) instead of POST /image
+            "direct_uploads": storage.supports_direct_upload
         }
     }
 
@@ -105,6 +142,19 @@ async def health_check():
         "llm_provider": settings.llm_provider
     }
 
+@api_router.get("/cache/stats")
+async def get_cache_stats(user: dict = Depends(get_current_user)):
+    """In-process cache counters for this worker"""
+    return {
+        "user_cache": user_cache.stats(),
+        "search_indexes": recipe_search.stats(),
+        "ingredient_indexes": ingredient_index.stats(),
+        "scoring_snapshots": recipe_snapshots.stats(),
+        "llm_single_flight": llm_flight.stats(),
+        "llm_cache": llm_cache.stats(),
+        "page_cache": page_cache.stats()
+    }
+
 @api_router.get("/shared/{share_id}")
 async def get_shared_recipe(share_id: str):
     """Get a publicly shared recipe (no auth required)"""
@@ -127,21 +177,8 @@ async def get_shared_recipe(share_id: str):
     return recipe
 
 # Static Files
-@api_router.get("/uploads/{filename}")
-async def get_upload(filename: str):
-    from fastapi.responses import FileResponse
-    from pathlib import Path
-
-    upload_dir = Path(settings.upload_dir)
-    try:
-        file_path = (upload_dir / filename).resolve()
-        if not file_path.is_relative_to(upload_dir.resolve()):
-            raise HTTPException(status_code=404, detail="File not found")
-    except ValueError:
-        raise HTTPException(status_code=404, detail="File not found")
-
-    if not file_path.exists():
-        raise HTTPException(status_code=404, detail="File not found")
-    return FileResponse(file_path)
+@api_router.api_route("/uploads/{filename}", methods=["GET", "HEAD"])
+async def get_upload(filename: str, request: Request):
+    return get_stored_upload(request, storage, settings.upload_dir, filename)
 
 app.include_router(api_router)
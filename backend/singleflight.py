@@ -0,0 +1,117 @@
+import asyncio
+import logging
+import os
+import socket
+import time
+import uuid
+from datetime import datetime, timezone, timedelta
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from pymongo.errors import DuplicateKeyError
+
+logger = logging.getLogger(__name__)
+
+
+class SingleFlight:
+    """Run one coroutine per key and share its result with concurrent callers.
+
+    The shared task is shielded, so a caller whose request is cancelled
+    (client disconnect) doesn't cancel the work the other callers await.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.started = 0
+        self.coalesced = 0
+
+    async def do(self, key: str, factory: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(factory())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._forget(key, t))
+            self.started += 1
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    def _forget(self, key: str, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Mark the exception as retrieved when every caller went away
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": len(self._inflight),
+            "started": self.started,
+            "coalesced": self.coalesced
+        }
+
+
+class MongoLease:
+    """Cross-worker single-flight using short-lived lease documents.
+
+    Needs a unique index on "hash" in the lease collection. A worker that
+    can't take the lease polls for the holder's result instead of running
+    the same work itself; an expired lease (holder crashed) can be taken
+    over by the next caller.
+    """
+
+    def __init__(self, collection, ttl: float, poll_interval: float = 1.0):
+        self.collection = collection
+        self.ttl = ttl
+        self.poll_interval = poll_interval
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+    async def acquire(self, key: str) -> bool:
+        now = datetime.now(timezone.utc)
+        try:
+            await self.collection.update_one(
+                {"hash": key, "expires_at": {"$lt": now}},
+                {"$set": {"owner": self.owner, "expires_at": now + timedelta(seconds=self.ttl)}},
+                upsert=True
+            )
+            return True
+        except DuplicateKeyError:
+            return False
+
+    async def release(self, key: str) -> None:
+        try:
+            await self.collection.delete_one({"hash": key, "owner": self.owner})
+        except Exception as e:
+            logger.error(f"Lease release failed: {e}")
+
+    async def run(
+        self,
+        key: str,
+        factory: Callable[[], Awaitable[Any]],
+        lookup: Callable[[str], Awaitable[Optional[Any]]]
+    ) -> Any:
+        """Run factory under the lease, or wait for the holder's result via lookup"""
+        deadline = time.monotonic() + self.ttl
+        while True:
+            try:
+                acquired = await self.acquire(key)
+            except Exception as e:
+                logger.error(f"Lease acquire failed, running without lease: {e}")
+                return await factory()
+
+            if acquired:
+                try:
+                    # The previous holder may have finished just before we got here
+                    result = await lookup(key)
+                    if result is not None:
+                        return result
+                    return await factory()
+                finally:
+                    await self.release(key)
+
+            await asyncio.sleep(self.poll_interval)
+            result = await lookup(key)
+            if result is not None:
+                return result
+            if time.monotonic() > deadline:
+                logger.warning(f"Gave up waiting for lease {key[:12]}, running locally")
+                return await factory()
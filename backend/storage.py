@@ -0,0 +1,190 @@
+import asyncio
+import logging
+import shutil
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Optional
+
+from fastapi import HTTPException
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+# Headers stored with objects, so a CDN or bucket serves them like /api/uploads does
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+
+class Storage(ABC):
+    """Where uploaded and processed images live.
+
+    Keys are flat names like "0123456789abcdef-card.webp", served at
+    /api/uploads/<key>; direct uploads land under "incoming/".
+    """
+
+    supports_direct_upload = False
+    redirect_max_age = 0
+
+    @abstractmethod
+    async def put_file(self, key: str, path: Path, content_type: str) -> None:
+        """Store a local file under key (the file may be moved)"""
+
+    @abstractmethod
+    async def fetch(self, key: str, path: Path, max_bytes: int) -> None:
+        """Copy an object to a local file; 404 if missing, 413 if too large"""
+
+    @abstractmethod
+    async def delete(self, key: str) -> None:
+        """Remove an object; missing objects are not an error"""
+
+    def download_url(self, key: str) -> Optional[str]:
+        """Where to redirect downloads, or None to serve them from the API"""
+        return None
+
+    @abstractmethod
+    def presigned_upload(self, key: str, content_type: str, max_bytes: int) -> dict:
+        """URL and form fields for a browser to POST a file straight to storage"""
+
+
+class LocalStorage(Storage):
+    """Files in UPLOAD_DIR, served by the API (one replica, or a shared volume)"""
+
+    def __init__(self, root: str):
+        self.root = Path(root)
+
+    def path(self, key: str) -> Path:
+        path = (self.root / key).resolve()
+        if not path.is_relative_to(self.root.resolve()):
+            raise HTTPException(status_code=404, detail="File not found")
+        return path
+
+    async def put_file(self, key: str, path: Path, content_type: str) -> None:
+        target = self.path(key)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        # Same filesystem as the work dir, so this is a rename
+        await asyncio.to_thread(shutil.move, str(path), str(target))
+
+    async def fetch(self, key: str, path: Path, max_bytes: int) -> None:
+        source = self.path(key)
+        if not source.is_file():
+            raise HTTPException(status_code=404, detail="Upload not found")
+        if source.stat().st_size > max_bytes:
+            raise HTTPException(status_code=413, detail="Image is too large")
+        await asyncio.to_thread(shutil.copyfile, source, path)
+
+    async def delete(self, key: str) -> None:
+        self.path(key).unlink(missing_ok=True)
+
+    def presigned_upload(self, key: str, content_type: str, max_bytes: int) -> dict:
+        # Uploads go through POST /recipes/{id}/image instead
+        raise HTTPException(status_code=400, detail="Direct uploads are not supported by this storage")
+
+
+class S3Storage(Storage):
+    """S3-compatible bucket (AWS, MinIO, R2...). Browsers upload with
+    presigned POSTs and download from the bucket (or S3_PUBLIC_URL) via
+    redirects, so image bytes don't pass through the API.
+    """
+
+    supports_direct_upload = True
+
+    def __init__(
+        self,
+        bucket: str,
+        endpoint_url: Optional[str] = None,
+        region: Optional[str] = None,
+        access_key_id: Optional[str] = None,
+        secret_access_key: Optional[str] = None,
+        public_url: Optional[str] = None,
+        url_expires: int = 3600
+    ):
+        self.bucket = bucket
+        self.endpoint_url = endpoint_url
+        self.region = region
+        self.access_key_id = access_key_id
+        self.secret_access_key = secret_access_key
+        self.public_url = public_url.rstrip("/") if public_url else None
+        self.url_expires = url_expires
+        self._client = None
+
+    @property
+    def client(self):
+        # boto3 clients are thread safe; calls run via asyncio.to_thread
+        if self._client is None:
+            import boto3
+            from botocore.config import Config
+
+            self._client = boto3.client(
+                "s3",
+                endpoint_url=self.endpoint_url,
+                region_name=self.region,
+                aws_access_key_id=self.access_key_id,
+                aws_secret_access_key=self.secret_access_key,
+                config=Config(signature_version="s3v4", s3={"addressing_style": "path" if self.endpoint_url else "auto"})
+            )
+        return self._client
+
+    async def put_file(self, key: str, path: Path, content_type: str) -> None:
+        await asyncio.to_thread(
+            self.client.upload_file, str(path), self.bucket, key,
+            ExtraArgs={"ContentType": content_type, "CacheControl": IMMUTABLE}
+        )
+        Path(path).unlink(missing_ok=True)
+
+    async def fetch(self, key: str, path: Path, max_bytes: int) -> None:
+        from botocore.exceptions import ClientError
+
+        try:
+            head = await asyncio.to_thread(self.client.head_object, Bucket=self.bucket, Key=key)
+        except ClientError:
+            raise HTTPException(status_code=404, detail="Upload not found")
+        if head["ContentLength"] > max_bytes:
+            raise HTTPException(status_code=413, detail="Image is too large")
+        await asyncio.to_thread(self.client.download_file, self.bucket, key, str(path))
+
+    async def delete(self, key: str) -> None:
+        await asyncio.to_thread(self.client.delete_object, Bucket=self.bucket, Key=key)
+
+    @property
+    def redirect_max_age(self) -> int:
+        """How long a redirect to download_url() may be cached"""
+        if self.public_url:
+            return 31536000
+        return max(self.url_expires - 60, 0)
+
+    def download_url(self, key: str) -> str:
+        if self.public_url:
+            return f"{self.public_url}/{key}"
+        # Signing is local; no request to the bucket
+        return self.client.generate_presigned_url(
+            "get_object", Params={"Bucket": self.bucket, "Key": key}, ExpiresIn=self.url_expires
+        )
+
+    def presigned_upload(self, key: str, content_type: str, max_bytes: int) -> dict:
+        return self.client.generate_presigned_post(
+            self.bucket,
+            key,
+            Fields={"Content-Type": content_type},
+            Conditions=[{"Content-Type": content_type}, ["content-length-range", 1, max_bytes]],
+            ExpiresIn=self.url_expires
+        )
+
+
+def create_storage() -> Storage:
+    if settings.storage_backend == "s3":
+        if not settings.s3_bucket:
+            raise RuntimeError("STORAGE_BACKEND=s3 requires S3_BUCKET")
+        logger.info(f"Storing uploads in S3 bucket {settings.s3_bucket}")
+        return S3Storage(
+            settings.s3_bucket,
+            endpoint_url=settings.s3_endpoint_url,
+            region=settings.s3_region,
+            access_key_id=settings.s3_access_key_id,
+            secret_access_key=settings.s3_secret_access_key,
+            public_url=settings.s3_public_url,
+            url_expires=settings.s3_url_expires
+        )
+    return LocalStorage(settings.upload_dir)
+
+
+storage = create_storage()
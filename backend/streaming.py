@@ -0,0 +1,150 @@
+from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
+from dependencies import clean_llm_json
+import json
+import logging
+import orjson
+from typing import Any, AsyncIterator, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+def ndjson(event: dict) -> bytes:
+    """Encode one event as a line of newline-delimited JSON"""
+    return orjson.dumps(event) + b"\n"
+
+
+def ndjson_response(events: AsyncIterator[dict]) -> StreamingResponse:
+    """Stream events as NDJSON, turning failures into a final error event.
+
+    The status code is sent with the first byte, so errors that happen
+    mid-stream can only be reported in-band.
+    """
+    async def body():
+        try:
+            async for event in events:
+                yield ndjson(event)
+        except HTTPException as e:
+            event = {"type": "error", "detail": e.detail, "status": e.status_code}
+            if e.headers and "Retry-After" in e.headers:
+                event["retry_after"] = int(e.headers["Retry-After"])
+            yield ndjson(event)
+        except Exception as e:
+            logger.error(f"Stream error: {e}")
+            yield ndjson({"type": "error", "detail": str(e)})
+
+    return StreamingResponse(
+        body(),
+        media_type=NDJSON_MEDIA_TYPE,
+        # Ask reverse proxies (nginx) not to buffer the stream
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+class IncrementalJSONParser:
+    """Parse a JSON object as it streams in, one top-level member at a time.
+
+    Text before the first "{" (markdown fences, chatter from the model) is
+    ignored. feed() returns ("field", key, value) for each top-level member
+    as soon as it is complete and ("done", obj, None) once the closing brace
+    arrives, so callers don't have to wait for the model to stop talking.
+    """
+
+    def __init__(self):
+        self._buf = ""
+        self._started = False
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._member_start = 0
+        self.done = False
+        self.result: Any = None
+
+    def feed(self, text: str) -> List[Tuple[str, Any, Any]]:
+        events: List[Tuple[str, Any, Any]] = []
+        if self.done:
+            return events
+
+        if not self._started:
+            start = text.find("{")
+            if start == -1:
+                return events
+            text = text[start:]
+            self._started = True
+
+        self._buf += text
+        buf = self._buf
+        while self._pos < len(buf):
+            char = buf[self._pos]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char in "{[":
+                self._depth += 1
+                if self._depth == 1:
+                    self._member_start = self._pos + 1
+            elif char in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    events.extend(self._member(buf[self._member_start:self._pos]))
+                    self.result = json.loads(buf[:self._pos + 1])
+                    self.done = True
+                    events.append(("done", self.result, None))
+                    return events
+            elif char == "," and self._depth == 1:
+                events.extend(self._member(buf[self._member_start:self._pos]))
+                self._member_start = self._pos + 1
+            self._pos += 1
+        return events
+
+    def _member(self, text: str) -> List[Tuple[str, Any, Any]]:
+        if not text.strip():
+            return []
+        try:
+            member = json.loads("{" + text + "}")
+        except json.JSONDecodeError:
+            # Leave malformed members to the final parse to report
+            return []
+        return [("field", key, value) for key, value in member.items()]
+
+
+async def stream_json_events(tokens: AsyncIterator[str]) -> AsyncIterator[dict]:
+    """Turn a stream of LLM tokens into token, field and result events.
+
+    The token stream is always drained, even after the result is known, so
+    the provider call completes and its response reaches the LLM cache.
+    """
+    parser = IncrementalJSONParser()
+    raw = ""
+    async for token in tokens:
+        raw += token
+        if parser.done:
+            continue
+        yield {"type": "token", "text": token}
+        try:
+            events = parser.feed(token)
+        except json.JSONDecodeError as e:
+            parser.done = True
+            yield {"type": "error", "detail": f"Failed to parse recipe data: {str(e)}"}
+            continue
+        for kind, key, value in events:
+            if kind == "field":
+                yield {"type": "field", "key": key, "value": value}
+            else:
+                yield {"type": "result", "data": key}
+
+    if not parser.done:
+        # No complete object arrived; parse whatever the model produced
+        try:
+            yield {"type": "result", "data": json.loads(clean_llm_json(raw))}
+        except json.JSONDecodeError as e:
+            yield {"type": "error", "detail": f"Failed to parse recipe data: {str(e)}"}
@@ -0,0 +1,55 @@
+import sys
+import os
+from unittest.mock import patch
+
+# Add backend to sys.path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from backend.cache import TTLCache
+
+def test_ttl_cache_hit_and_miss():
+    cache = TTLCache(maxsize=4, ttl=30)
+    assert cache.get("a") is None
+    cache.set("a", {"id": "a"})
+    assert cache.get("a") == {"id": "a"}
+
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+
+def test_ttl_cache_expiry():
+    cache = TTLCache(maxsize=4, ttl=10)
+    with patch('backend.cache.time.monotonic', return_value=100.0):
+        cache.set("a", 1)
+    with patch('backend.cache.time.monotonic', return_value=105.0):
+        assert cache.get("a") == 1
+    with patch('backend.cache.time.monotonic', return_value=111.0):
+        assert cache.get("a") is None
+        assert "a" not in cache
+
+def test_ttl_cache_lru_eviction():
+    cache = TTLCache(maxsize=2, ttl=30)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")  # "b" is now least recently used
+    cache.set("c", 3)
+
+    assert "a" in cache
+    assert "b" not in cache
+    assert "c" in cache
+    assert cache.stats()["evictions"] == 1
+
+def test_ttl_cache_pop():
+    cache = TTLCache(maxsize=2, ttl=30)
+    cache.set("a", 1)
+    assert cache.pop("a") == 1
+    assert cache.pop("a") is None
+
+def test_page_cache_url_normalization():
+    from backend.page_cache import normalize_url, url_hash
+
+    assert normalize_url("HTTPS://Example.com:443/pasta?b=2&utm_source=x&a=1#step-3") == \
+        "https://example.com/pasta?a=1&b=2"
+    assert url_hash("https://example.com/pasta?fbclid=abc") == url_hash("https://EXAMPLE.com/pasta")
+    assert url_hash("https://example.com/pasta?page=2") != url_hash("https://example.com/pasta")
+    assert normalize_url("http://example.com:8080") == "http://example.com:8080/"
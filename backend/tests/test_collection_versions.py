@@ -0,0 +1,60 @@
+import sys
+import os
+import pytest
+from fastapi import Response
+from starlette.requests import Request
+
+# Add backend to sys.path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from backend.collection_versions import CollectionVersions, RECIPES, MEAL_PLANS
+
+class FakeVersions:
+    """Just enough of a Motor collection for CollectionVersions"""
+
+    def __init__(self):
+        self.docs = {}
+
+    async def update_one(self, query, update, upsert=False):
+        doc = self.docs.setdefault(query["scope"], {"scope": query["scope"], **update["$setOnInsert"]})
+        for field, amount in update["$inc"].items():
+            doc[field] = doc.get(field, 0) + amount
+
+    async def find(self, query, projection):
+        for scope in query["scope"]["$in"]:
+            if scope in self.docs:
+                yield self.docs[scope]
+
+def make_request(if_none_match=None):
+    headers = [(b"if-none-match", if_none_match.encode())] if if_none_match else []
+    return Request({"type": "http", "method": "GET", "path": "/api/recipes", "query_string": b"", "headers": headers})
+
+@pytest.mark.asyncio
+async def test_etag_changes_only_when_a_scope_is_bumped():
+    versions = CollectionVersions(FakeVersions())
+    tag = await versions.etag(RECIPES, ["user-1", "house-1"])
+    assert tag.startswith('W/"')
+    assert await versions.etag(RECIPES, ["house-1", "user-1", None]) == tag
+
+    await versions.bump(MEAL_PLANS, "house-1")
+    assert await versions.etag(RECIPES, ["user-1", "house-1"]) == tag
+
+    await versions.bump(RECIPES, "house-1", None)
+    bumped = await versions.etag(RECIPES, ["user-1", "house-1"])
+    assert bumped != tag
+    assert await versions.etag(RECIPES, ["user-1", "house-1"], "view=summary") != bumped
+
+@pytest.mark.asyncio
+async def test_conditional_get_short_circuits_matching_requests():
+    versions = CollectionVersions(FakeVersions())
+    response = Response()
+    assert await versions.conditional_get(make_request(), response, RECIPES, ["user-1"]) is None
+    tag = response.headers["etag"]
+    assert response.headers["cache-control"] == "private, no-cache"
+
+    not_modified = await versions.conditional_get(make_request(tag), Response(), RECIPES, ["user-1"])
+    assert not_modified.status_code == 304
+    assert not_modified.headers["etag"] == tag
+
+    await versions.bump(RECIPES, "user-1")
+    assert await versions.conditional_get(make_request(tag), Response(), RECIPES, ["user-1"]) is None
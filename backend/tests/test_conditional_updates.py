@@ -0,0 +1,170 @@
+import sys
+import os
+import pytest
+from fastapi import HTTPException, Response
+from pymongo import ReturnDocument
+
+# Add backend to sys.path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from backend.data_access import etag
+# The routers import it as a top-level module, so that's the copy to patch
+import data_access
+from backend.models import RecipeCreate, ShoppingListCreate
+from backend.routers import recipes as recipes_router
+from backend.routers import shopping_lists as shopping_lists_router
+
+def matches(doc, query):
+    for field, condition in query.items():
+        if isinstance(condition, dict):
+            if doc.get(field) not in condition["$in"]:
+                return False
+        elif doc.get(field) != condition:
+            return False
+    return True
+
+class FakeCollection:
+    """Just enough of a Motor collection for the update routes and their checks"""
+
+    def __init__(self, docs):
+        self.docs = docs
+
+    async def find_one(self, query, projection=None):
+        for doc in self.docs:
+            if matches(doc, query):
+                return dict(doc)
+        return None
+
+    async def find_one_and_update(self, query, update, projection=None, return_document=ReturnDocument.BEFORE):
+        for doc in self.docs:
+            if matches(doc, query):
+                before = dict(doc)
+                doc.update(update["$set"])
+                return dict(doc) if return_document == ReturnDocument.AFTER else before
+        return None
+
+    async def distinct(self, field, query):
+        wanted = query[field]["$in"]
+        return [v["url"] for doc in self.docs for v in doc.get("image_variants", []) if v["url"] in wanted]
+
+class FakeDb:
+    def __init__(self, recipes, shopping_lists):
+        self.recipes = FakeCollection(recipes)
+        self.shopping_lists = FakeCollection(shopping_lists)
+
+class FakeVersions:
+    async def bump(self, *args):
+        pass
+
+class FakeStorage:
+    def __init__(self):
+        self.deleted = []
+
+    async def delete(self, key):
+        self.deleted.append(key)
+
+def variant(name):
+    return {"name": "card", "url": f"/api/uploads/{name}-card.webp", "width": 800, "height": 600, "format": "webp"}
+
+AUTHOR = {"id": "user-1", "household_id": "house-1"}
+HOUSEMATE = {"id": "user-2", "household_id": "house-1"}
+STRANGER = {"id": "user-3", "household_id": "house-2"}
+
+@pytest.fixture
+def stores(monkeypatch):
+    recipes = [{
+        "id": "r1", "title": "Soup", "description": "", "ingredients": [], "instructions": ["Boil"],
+        "prep_time": 5, "cook_time": 10, "servings": 2, "category": "Dinner", "tags": [],
+        "image_url": "/api/uploads/0123456789abcdef-card.webp",
+        "image_variants": [variant("0123456789abcdef")],
+        "author_id": "user-1", "household_id": "house-1",
+        "created_at": "2024-03-01T10:00:00+00:00", "updated_at": "2024-03-01T10:00:00+00:00"
+    }]
+    lists = [{
+        "id": "l1", "name": "Groceries", "items": [], "household_id": "house-1",
+        "created_at": "2024-03-01T10:00:00+00:00", "updated_at": "2024-03-01T10:00:00+00:00"
+    }]
+    db = FakeDb(recipes, lists)
+    storage = FakeStorage()
+    for module in (recipes_router, shopping_lists_router, data_access):
+        monkeypatch.setattr(module, "db", db)
+    for module in (recipes_router, shopping_lists_router):
+        monkeypatch.setattr(module, "collection_versions", FakeVersions())
+    monkeypatch.setattr(recipes_router, "storage", storage)
+    return recipes, lists, storage
+
+def recipe_edit(**fields):
+    return RecipeCreate(**{"title": "Spicy Soup", "ingredients": [], "instructions": ["Boil"], **fields})
+
+async def update_recipe(user, if_match, **fields):
+    response = Response()
+    updated = await recipes_router.update_recipe("r1", recipe_edit(**fields), response, if_match=if_match, user=user)
+    return updated, response
+
+@pytest.mark.asyncio
+async def test_recipe_updates_need_the_current_version(stores):
+    recipes, _, _ = stores
+    seen = etag(recipes[0])
+
+    updated, response = await update_recipe(AUTHOR, seen, image_url=recipes[0]["image_url"])
+    assert updated.title == "Spicy Soup"
+    assert response.headers["ETag"] == etag(recipes[0]) != seen
+    # Kept its processed photo
+    assert [v.model_dump() for v in updated.image_variants] == [variant("0123456789abcdef")]
+
+    # A second save from the same stale copy would overwrite the first
+    with pytest.raises(HTTPException) as exc:
+        await update_recipe(AUTHOR, seen, title="Mild Soup")
+    assert exc.value.status_code == 412
+    assert recipes[0]["title"] == "Spicy Soup"
+
+@pytest.mark.asyncio
+async def test_recipe_update_reports_missing_and_forbidden_before_stale(stores):
+    recipes, _, _ = stores
+    stale = '"c3RhbGU"'
+    with pytest.raises(HTTPException) as exc:
+        await update_recipe(HOUSEMATE, stale)
+    assert exc.value.status_code == 403
+    with pytest.raises(HTTPException) as exc:
+        await update_recipe(HOUSEMATE, etag(recipes[0]))
+    assert exc.value.status_code == 403
+    with pytest.raises(HTTPException) as exc:
+        await recipes_router.update_recipe("missing", recipe_edit(), Response(), if_match=stale, user=AUTHOR)
+    assert exc.value.status_code == 404
+    assert recipes[0]["title"] == "Soup"
+
+@pytest.mark.asyncio
+async def test_replacing_a_photo_with_a_link_deletes_the_old_variants(stores):
+    _, _, storage = stores
+    updated, _ = await update_recipe(AUTHOR, None, image_url="https://example.com/soup.jpg")
+    assert updated.image_variants == []
+    assert storage.deleted == ["0123456789abcdef-card.webp"]
+
+async def update_list(list_id, user, if_match):
+    response = Response()
+    data = ShoppingListCreate(name="Groceries", items=[{"name": "Milk", "amount": "1"}])
+    updated = await shopping_lists_router.update_shopping_list(list_id, data, response, if_match=if_match, user=user)
+    return updated, response
+
+@pytest.mark.asyncio
+async def test_shopping_list_updates_are_conditional(stores):
+    _, lists, _ = stores
+    seen = etag(lists[0])
+
+    # Any household member may edit, as long as they saw the latest version
+    updated, response = await update_list("l1", HOUSEMATE, seen)
+    assert [item.name for item in updated.items] == ["Milk"]
+    assert response.headers["ETag"] == etag(lists[0])
+
+    with pytest.raises(HTTPException) as exc:
+        await update_list("l1", AUTHOR, seen)
+    assert exc.value.status_code == 412
+    with pytest.raises(HTTPException) as exc:
+        await update_list("l1", STRANGER, response.headers["ETag"])
+    assert exc.value.status_code == 403
+    with pytest.raises(HTTPException) as exc:
+        await update_list("missing", AUTHOR, seen)
+    assert exc.value.status_code == 404
+
+    # Without If-Match the update is unconditional, as before
+    await update_list("l1", AUTHOR, None)
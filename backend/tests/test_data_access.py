@@ -0,0 +1,32 @@
+import sys
+import os
+import pytest
+from fastapi import HTTPException
+
+# Add backend to sys.path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from backend.data_access import etag, etag_matches, if_match_filter
+
+def test_etag_round_trips_through_if_match():
+    doc = {"id": "r1", "updated_at": "2024-05-01T12:00:00.123456+00:00"}
+    tag = etag(doc)
+    assert tag.startswith('"') and tag.endswith('"')
+    assert if_match_filter(tag) == {"updated_at": doc["updated_at"]}
+    # Weak validators and lists are accepted too
+    assert if_match_filter(f"W/{tag}, \"other\"") == {"updated_at": doc["updated_at"]}
+
+def test_if_match_absent_or_wildcard_is_unconditional():
+    assert if_match_filter(None) == {}
+    assert if_match_filter("*") == {}
+
+def test_malformed_if_match_fails_precondition():
+    with pytest.raises(HTTPException) as exc:
+        if_match_filter('"\xff\xfe"')
+    assert exc.value.status_code == 412
+
+def test_etag_matches_uses_weak_comparison():
+    assert etag_matches('W/"abc"', '"abc"')
+    assert etag_matches('"x", "abc"', 'W/"abc"')
+    assert etag_matches("*", '"abc"')
+    assert not etag_matches('"abd"', '"abc"')
@@ -0,0 +1,142 @@
+import sys
+import os
+import asyncio
+import httpcore
+import httpx
+import pytest
+from fastapi import HTTPException
+
+# Add backend to sys.path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from backend.http_clients import InstrumentedTransport, ProviderClients
+from backend import dependencies
+
+class FakePool:
+    """Stands in for the httpcore connection pool behind the transport"""
+
+    def __init__(self):
+        self.error = None
+        self.requests = []
+
+    async def handle_async_request(self, request):
+        self.requests.append(request)
+        if self.error:
+            raise self.error
+        return httpcore.Response(200, content=b'{"ok": true}')
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        pass
+
+def make_transport(max_connections=2):
+    transport = InstrumentedTransport(max_connections=max_connections)
+    transport._pool = FakePool()
+    return transport
+
+PROFILES = {
+    "openai": {"max_connections": 4, "max_keepalive": 2, "keepalive_expiry": 30, "read_timeout": 120},
+    "fetch": {"max_connections": 8, "max_keepalive": 4, "keepalive_expiry": 30, "read_timeout": 10,
+              "follow_redirects": True},
+}
+
+@pytest.mark.asyncio
+async def test_requests_stay_in_flight_until_the_body_is_closed():
+    transport = make_transport()
+    async with httpx.AsyncClient(transport=transport) as client:
+        async with client.stream("GET", "https://example.com/") as response:
+            assert transport.in_flight == 1
+            async for _ in response.aiter_raw():
+                assert transport.in_flight == 1
+        assert transport.in_flight == 0
+
+        # Closing twice doesn't release twice
+        response = await client.get("https://example.com/")
+        await response.aclose()
+        assert transport.in_flight == 0
+
+    stats = transport.stats()
+    assert (stats["requests"], stats["peak_in_flight"], stats["errors"]) == (2, 1, 0)
+
+@pytest.mark.asyncio
+async def test_concurrent_streams_show_up_as_saturation():
+    transport = make_transport(max_connections=2)
+    async with httpx.AsyncClient(transport=transport) as client:
+        responses = await asyncio.gather(*(
+            client.send(client.build_request("GET", "https://example.com/"), stream=True)
+            for _ in range(3)
+        ))
+        # Waiters count too, so saturation can pass 1
+        assert transport.stats()["saturation"] == 1.5
+        for response in responses:
+            await response.aclose()
+    assert transport.stats()["in_flight"] == 0
+    assert transport.stats()["peak_in_flight"] == 3
+
+@pytest.mark.asyncio
+async def test_pool_timeouts_and_errors_are_counted_separately():
+    transport = make_transport()
+    async with httpx.AsyncClient(transport=transport) as client:
+        transport._pool.error = httpcore.PoolTimeout("no free connection")
+        with pytest.raises(httpx.PoolTimeout):
+            await client.get("https://example.com/")
+        transport._pool.error = httpcore.ConnectError("refused")
+        with pytest.raises(httpx.ConnectError):
+            await client.get("https://example.com/")
+
+    stats = transport.stats()
+    assert (stats["pool_timeouts"], stats["errors"], stats["in_flight"]) == (1, 1, 0)
+
+@pytest.mark.asyncio
+async def test_provider_clients_are_pooled_per_provider():
+    clients = ProviderClients(PROFILES, connect_timeout=5, pool_timeout=3)
+    openai = clients.get("openai")
+    fetch = clients.get("fetch")
+
+    assert clients.get("openai") is openai
+    assert openai is not fetch
+    assert openai.timeout == httpx.Timeout(120, connect=5, pool=3)
+    assert fetch.timeout == httpx.Timeout(10, connect=5, pool=3)
+    assert fetch.follow_redirects and not openai.follow_redirects
+    assert clients.client_for("anthropic", fallback=fetch) is fetch
+    assert set(clients.stats()["pools"]) == {"openai", "fetch"}
+    assert clients.stats()["pools"]["openai"]["max_connections"] == 4
+
+    await clients.aclose()
+    assert openai.is_closed
+    assert clients.stats()["pools"] == {}
+    # Used again after shutdown: a fresh client rather than a closed one
+    assert not clients.get("openai").is_closed
+    await clients.aclose()
+
+class OpenAIPoolTimeout(Exception):
+    """Shaped like the SDK's APITimeoutError, raised from the httpx error"""
+
+class FakeCompletions:
+    async def create(self, **kwargs):
+        try:
+            raise httpx.PoolTimeout("no free connection")
+        except httpx.PoolTimeout as e:
+            raise OpenAIPoolTimeout("Request timed out.") from e
+
+class FakeOpenAI:
+    def __init__(self):
+        self.chat = type("Chat", (), {"completions": FakeCompletions()})()
+
+@pytest.mark.asyncio
+async def test_openai_pool_timeouts_are_reported_as_busy(monkeypatch):
+    monkeypatch.setattr(dependencies, "get_openai_client", lambda client: FakeOpenAI())
+
+    with pytest.raises(HTTPException) as exc:
+        await dependencies.call_openai(None, "system", "user")
+    assert exc.value.status_code == 503
+    assert "Retry-After" in exc.value.headers
+
+    with pytest.raises(HTTPException) as exc:
+        async for _ in dependencies.stream_openai(None, "system", "user"):
+            pass
+    assert exc.value.status_code == 503
+
+    assert not dependencies.is_pool_timeout(OpenAIPoolTimeout("Request timed out."))
@@ -0,0 +1,110 @@
+import io
+import sys
+import os
+import pytest
+from fastapi import FastAPI, File, HTTPException, UploadFile
+from fastapi.testclient import TestClient
+from PIL import Image
+
+# Add backend to sys.path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from backend.images import ImageProcessor, ImageTooLarge, render_variants, srcsets, default_url, is_processed_url
+from backend.upload_limit import UploadSizeLimitMiddleware, MULTIPART_OVERHEAD
+
+def make_photo(path, size=(2400, 1200)):
+    image = Image.new("RGB", size, (200, 120, 40))
+    exif = Image.Exif()
+    exif[0x0112] = 6  # Orientation: rotate 90 CW
+    exif[0x010F] = "PhoneCam"  # Make
+    image.save(path, "JPEG", exif=exif)
+
+def test_render_variants_resizes_rotates_and_strips_exif(tmp_path):
+    source = tmp_path / "upload.jpg"
+    make_photo(source)
+
+    variants = render_variants(str(source), str(tmp_path), "0123456789abcdef", {"thumb": 320, "card": 800, "full": 1920}, ["webp"], 50_000_000)
+
+    # Rotated to portrait (1200x2400), so "full" is capped by the original width
+    assert [(v["name"], v["width"], v["height"]) for v in variants] == [
+        ("thumb", 320, 640), ("card", 800, 1600), ("full", 1200, 2400)
+    ]
+    with Image.open(tmp_path / "0123456789abcdef-thumb.webp") as thumb:
+        assert thumb.size == (320, 640)
+        assert not thumb.getexif()
+
+def test_small_images_are_not_upscaled(tmp_path):
+    source = tmp_path / "small.png"
+    Image.new("RGBA", (200, 100)).save(source)
+    variants = render_variants(str(source), str(tmp_path), "fedcba9876543210", {"thumb": 320, "card": 800}, ["webp"], 50_000_000)
+
+    assert [(v["name"], v["width"]) for v in variants] == [("thumb", 200)]
+    assert default_url(variants) == "/api/uploads/fedcba9876543210-thumb.webp"
+
+def test_srcsets_and_processed_urls():
+    variants = [
+        {"name": "card", "url": "/api/uploads/0123456789abcdef-card.webp", "width": 800, "height": 600, "format": "webp"},
+        {"name": "thumb", "url": "/api/uploads/0123456789abcdef-thumb.webp", "width": 320, "height": 240, "format": "webp"},
+        {"name": "thumb", "url": "/api/uploads/0123456789abcdef-thumb.avif", "width": 320, "height": 240, "format": "avif"},
+    ]
+    assert srcsets(variants) == {
+        "webp": "/api/uploads/0123456789abcdef-thumb.webp 320w, /api/uploads/0123456789abcdef-card.webp 800w",
+        "avif": "/api/uploads/0123456789abcdef-thumb.avif 320w"
+    }
+    assert default_url(variants) == "/api/uploads/0123456789abcdef-card.webp"
+    assert is_processed_url("/api/uploads/0123456789abcdef-card.webp")
+    assert not is_processed_url("https://example.com/photo.jpg")
+
+@pytest.mark.asyncio
+async def test_upload_size_limit(tmp_path):
+    processor = ImageProcessor(str(tmp_path), max_bytes=1000, workers=1, max_pixels=1_000_000)
+    with pytest.raises(HTTPException) as exc:
+        await processor.save_upload(UploadFile(io.BytesIO(b"x" * 5000), filename="big.jpg"))
+    assert exc.value.status_code == 413
+    assert list(tmp_path.iterdir()) == []
+
+    path, digest = await processor.save_upload(UploadFile(io.BytesIO(b"x" * 500), filename="ok.jpg"))
+    assert path.read_bytes() == b"x" * 500
+    assert len(digest) == 64
+
+def test_pixel_limit_applies_below_pillows_own_cutoff(tmp_path):
+    source = tmp_path / "wide.png"
+    Image.new("RGB", (3000, 3000)).save(source)
+    # 9 MP against a 5 MP cap: Pillow itself would only warn
+    with pytest.raises(ImageTooLarge):
+        render_variants(str(source), str(tmp_path), "0123456789abcdef", {"thumb": 320}, ["webp"], 5_000_000)
+    assert not (tmp_path / "0123456789abcdef-thumb.webp").exists()
+
+@pytest.fixture
+def upload_client():
+    app = FastAPI()
+    app.add_middleware(UploadSizeLimitMiddleware, max_bytes=1000)
+    received = []
+
+    @app.post("/upload")
+    async def upload(file: UploadFile = File(...)):
+        received.append(await file.read())
+        return {"size": len(received[-1])}
+
+    return TestClient(app), received
+
+def test_oversized_uploads_are_refused_before_the_handler(upload_client):
+    client, received = upload_client
+    assert client.post("/upload", files={"file": ("ok.jpg", b"x" * 500)}).json() == {"size": 500}
+
+    response = client.post("/upload", files={"file": ("big.jpg", b"x" * (MULTIPART_OVERHEAD + 5000))})
+    assert response.status_code == 413
+    assert len(received) == 1
+
+def test_chunked_uploads_are_cut_off_at_the_limit(upload_client):
+    client, received = upload_client
+
+    # A generator body goes out without a Content-Length
+    def body():
+        yield b"--b\r\nContent-Disposition: form-data; name=\"file\"; filename=\"big.jpg\"\r\n\r\n"
+        for _ in range(100):
+            yield b"x" * 4096
+
+    response = client.post("/upload", content=body(), headers={"Content-Type": "multipart/form-data; boundary=b"})
+    assert response.status_code == 413
+    assert received == []
@@ -0,0 +1,93 @@
+import sys
+import os
+import asyncio
+import threading
+import pytest
+from fastapi import HTTPException
+
+# Add backend to sys.path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from backend.inference import InferenceQueue, PRIORITY_BACKGROUND, PRIORITY_INTERACTIVE, inference_priority
+
+# Set on teardown so a failing test can't leave the worker thread blocked
+releases = []
+
+@pytest.fixture
+def queue():
+    queue = InferenceQueue(max_queue=2, name="test-inference")
+    yield queue
+    for release in releases:
+        release.set()
+    releases.clear()
+    queue.shutdown()
+
+async def occupy(queue):
+    """Start a call that holds the worker thread until the event is set"""
+    release = threading.Event()
+    releases.append(release)
+    future = queue.submit(release.wait)
+    while not queue.running:
+        await asyncio.sleep(0.001)
+    return release, future
+
+@pytest.mark.asyncio
+async def test_full_queue_is_rejected_with_retry_after(queue):
+    release, _ = await occupy(queue)
+    # The running call doesn't count; two more can wait
+    waiting = [queue.submit(lambda: "done"), queue.submit(lambda: "done")]
+
+    with pytest.raises(HTTPException) as exc:
+        queue.submit(lambda: "done")
+    assert exc.value.status_code == 429
+    assert int(exc.value.headers["Retry-After"]) >= 1
+    assert queue.stats()["rejected"] == 1
+    assert queue.stats()["queue_depth"] == 2
+
+    release.set()
+    assert await asyncio.gather(*waiting) == ["done", "done"]
+    assert queue.stats()["queue_depth"] == 0
+    assert queue.stats()["processed"] == 3
+
+@pytest.mark.asyncio
+async def test_interactive_calls_run_before_background_ones(queue):
+    release, _ = await occupy(queue)
+    order = []
+
+    background = queue.submit(order.append, "background", priority=PRIORITY_BACKGROUND)
+    # Without an explicit priority the context variable decides
+    token = inference_priority.set(PRIORITY_INTERACTIVE)
+    try:
+        interactive = queue.submit(order.append, "interactive")
+    finally:
+        inference_priority.reset(token)
+
+    release.set()
+    await asyncio.gather(background, interactive)
+    assert order == ["interactive", "background"]
+
+@pytest.mark.asyncio
+async def test_callers_that_give_up_free_their_queue_slot(queue):
+    release, _ = await occupy(queue)
+    ran = []
+
+    abandoned = [queue.submit(ran.append, "abandoned") for _ in range(2)]
+    for future in abandoned:
+        future.cancel()
+    await asyncio.sleep(0)
+    assert queue.stats()["queue_depth"] == 0
+
+    # Would have been a 429 if the cancelled entries still counted
+    kept = queue.submit(ran.append, "kept")
+    release.set()
+    await kept
+    assert ran == ["kept"]
+
+@pytest.mark.asyncio
+async def test_errors_reach_the_caller(queue):
+    def broken():
+        raise ValueError("model exploded")
+
+    with pytest.raises(ValueError, match="model exploded"):
+        await queue.run(broken)
+    assert await queue.run(lambda: "still working") == "still working"
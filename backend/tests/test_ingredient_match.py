@@ -0,0 +1,62 @@
+import sys
+import os
+
+# Add backend to sys.path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from backend.ingredient_match import IngredientIndex, normalize_ingredient, ingredient_key
+
+def make_recipe(recipe_id, ingredients, created_at="2024-01-01", author_id="u1", household_id=None):
+    return {
+        "id": recipe_id,
+        "ingredients": [{"name": name, "amount": "1", "unit": ""} for name in ingredients],
+        "created_at": created_at,
+        "author_id": author_id,
+        "household_id": household_id
+    }
+
+def build_index():
+    index = IngredientIndex("u1", "h1")
+    index.add(make_recipe("omelette", ["Eggs", "butter", "salt", "black pepper"]))
+    index.add(make_recipe("salsa", ["2 large tomatoes, diced", "red onion", "fresh cilantro", "lime"]))
+    index.add(make_recipe("curry", ["chicken breasts", "onion", "coconut milk", "curry paste", "rice"]))
+    index.add(make_recipe("cake", ["flour", "sugar", "eggs", "butter", "milk"], household_id="h1", author_id="u2"))
+    return index
+
+def test_normalize_handles_plurals_descriptors_and_synonyms():
+    assert normalize_ingredient("2 large Tomatoes, diced") == "tomato"
+    assert normalize_ingredient("Scallions (thinly sliced)") == "green onion"
+    assert normalize_ingredient("fresh cilantro") == "coriander"
+    assert normalize_ingredient("1 cup cherries") == "cherry"
+    assert ingredient_key("salt") is None
+    assert ingredient_key("Extra virgin olive oil") is None
+
+def test_match_ranks_by_coverage_and_reports_missing():
+    index = build_index()
+    matches = index.match(["egg", "butter"], limit=10)
+
+    assert [m["recipe_id"] for m in matches] == ["omelette", "cake"]
+    # Staples are never required
+    assert matches[0]["coverage"] == 1.0
+    assert matches[0]["missing_ingredients"] == []
+    assert matches[1]["missing_ingredients"] == ["flour", "milk"]
+
+def test_match_is_fuzzy_on_names():
+    index = build_index()
+    matches = index.match(["tomato", "onions", "coriander", "limes"], limit=10)
+
+    assert matches[0]["recipe_id"] == "salsa"
+    assert matches[0]["coverage"] == 1.0
+    # "onion" also covers the curry's onion, but little else
+    curry = next(m for m in matches if m["recipe_id"] == "curry")
+    assert curry["coverage"] == 0.2
+    assert "chicken breasts" in curry["missing_ingredients"]
+
+def test_updates_and_removal():
+    index = build_index()
+    index.add(make_recipe("salsa", ["mango", "red onion"]))
+    assert index.match(["tomato"], limit=10) == []
+
+    index.remove("salsa")
+    assert [m["recipe_id"] for m in index.match(["mango"], limit=10)] == []
+    assert not index.visible(make_recipe("x", [], author_id="u3", household_id="h2"))
@@ -0,0 +1,384 @@
+import sys
+import os
+import asyncio
+from datetime import datetime, timezone, timedelta
+import pytest
+from fastapi import HTTPException
+from pydantic import BaseModel
+
+# Add backend to sys.path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from backend.jobs import JobManager, JobCancelled, EPOCH
+from backend.models import BatchImportJob
+from backend.routers import jobs as jobs_router
+from backend.routers.ai import batch_import_progress
+
+def matches(doc, query):
+    for field, condition in query.items():
+        value = doc.get(field)
+        if isinstance(condition, dict):
+            if "$in" in condition and value not in condition["$in"]:
+                return False
+            if "$lt" in condition and not (value is not None and value < condition["$lt"]):
+                return False
+        elif value != condition:
+            return False
+    return True
+
+def project(doc, projection):
+    if any(keep for field, keep in projection.items() if field != "_id"):
+        return {field: doc[field] for field, keep in projection.items() if keep and field in doc}
+    return {field: value for field, value in doc.items() if projection.get(field, 1)}
+
+class FakeResult:
+    def __init__(self, matched_count):
+        self.matched_count = matched_count
+
+class FakeCursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def sort(self, field, direction):
+        self.docs.sort(key=lambda d: d[field], reverse=direction < 0)
+        return self
+
+    async def to_list(self, n):
+        return self.docs[:n]
+
+class FakeJobs:
+    """Just enough of a Motor collection for JobManager and the jobs router"""
+
+    def __init__(self):
+        self.docs = []
+
+    @staticmethod
+    def apply(doc, update):
+        doc.update(update.get("$set", {}))
+        for field, amount in update.get("$inc", {}).items():
+            doc[field] = doc.get(field, 0) + amount
+
+    async def insert_one(self, doc):
+        self.docs.append(dict(doc))
+
+    async def find_one(self, query, projection=None):
+        for doc in self.docs:
+            if matches(doc, query):
+                return project(doc, projection or {})
+        return None
+
+    async def find_one_and_update(self, query, update, projection, return_document):
+        for doc in self.docs:
+            if matches(doc, query):
+                self.apply(doc, update)
+                return project(doc, projection)
+        return None
+
+    async def update_one(self, query, update):
+        for doc in self.docs:
+            if matches(doc, query):
+                self.apply(doc, update)
+                return FakeResult(1)
+        return FakeResult(0)
+
+    async def update_many(self, query, update):
+        for doc in self.docs:
+            if matches(doc, query):
+                self.apply(doc, update)
+
+    def find(self, query, projection):
+        return FakeCursor([project(doc, projection) for doc in self.docs if matches(doc, query)])
+
+    def get(self, job_id):
+        return next(doc for doc in self.docs if doc["id"] == job_id)
+
+class FakeUsers:
+    async def find_one(self, query, projection):
+        return {"id": query["id"], "name": "Cook"}
+
+class EchoParams(BaseModel):
+    text: str
+
+def make_manager(max_attempts=3):
+    return JobManager(
+        FakeJobs(), FakeUsers(), default_concurrency=2, heartbeat_interval=1,
+        stale_after=60, max_attempts=max_attempts, result_ttl=3600
+    )
+
+async def settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+@pytest.mark.asyncio
+async def test_submitted_job_runs_to_completion():
+    manager = make_manager()
+    release = asyncio.Event()
+
+    async def echo(params, user, ctx):
+        await ctx.update({"stage": "echoing"}, inc={"completed": 1})
+        await release.wait()
+        return {"echo": params.text, "for": user["id"]}
+
+    manager.register("echo", echo, EchoParams)
+    job = await manager.submit("echo", "user-1", {"text": "hi"}, completed=0)
+    assert job["status"] == "queued"
+    assert job["worker"] == manager.worker_id
+
+    await settle()
+    doc = manager.collection.get(job["id"])
+    assert doc["status"] == "running"
+    assert doc["attempts"] == 1
+    assert doc["stage"] == "echoing" and doc["completed"] == 1
+    assert manager.stats()["types"]["echo"]["running"] == 1
+
+    release.set()
+    await settle()
+    doc = manager.collection.get(job["id"])
+    assert doc["status"] == "completed"
+    assert doc["result"] == {"echo": "hi", "for": "user-1"}
+    assert doc["expires_at"] > datetime.now(timezone.utc)
+    assert manager.stats()["active"] == 0
+
+@pytest.mark.asyncio
+async def test_submit_validates_type_and_params():
+    manager = make_manager()
+
+    async def echo(params, user, ctx):
+        return params.text
+
+    manager.register("echo", echo, EchoParams)
+    with pytest.raises(HTTPException) as exc:
+        await manager.submit("nope", "user-1", {})
+    assert exc.value.status_code == 400
+    with pytest.raises(HTTPException) as exc:
+        await manager.submit("echo", "user-1", {"text": None})
+    assert exc.value.status_code == 422
+    assert manager.collection.docs == []
+
+@pytest.mark.asyncio
+async def test_batch_imports_submitted_generically_get_limits_and_progress():
+    manager = make_manager()
+    release = asyncio.Event()
+
+    async def wait(params, user, ctx):
+        await release.wait()
+
+    manager.register("batch_import", wait, BatchImportJob, progress=batch_import_progress)
+    for params in (
+        {"items": [{"kind": "file", "source": "/etc/passwd"}]},
+        {"items": [{"kind": "text", "source": "x" * 100_000}]},
+        {"items": [{"kind": "url", "source": "https://example.com"}] * 5000},
+        {"items": []},
+    ):
+        with pytest.raises(HTTPException) as exc:
+            await manager.submit("batch_import", "user-1", params)
+        assert exc.value.status_code == 422
+
+    job = await manager.submit("batch_import", "user-1", {"items": [
+        {"kind": "url", "source": "https://example.com/soup"},
+        {"kind": "text", "source": "Soup " * 100},
+    ]})
+    assert (job["total"], job["completed"], job["failed"]) == (2, 0, 0)
+    assert [item["status"] for item in job["items"]] == ["pending", "pending"]
+    assert len(job["items"][1]["source"]) == 80
+    release.set()
+    await settle()
+
+@pytest.mark.asyncio
+async def test_failed_handlers_record_the_error():
+    manager = make_manager()
+
+    async def broken(params, user, ctx):
+        raise HTTPException(status_code=400, detail="Bad page")
+
+    manager.register("broken", broken, EchoParams)
+    job = await manager.submit("broken", "user-1", {"text": "hi"})
+    await settle()
+    doc = manager.collection.get(job["id"])
+    assert doc["status"] == "failed"
+    assert doc["error"] == "Bad page"
+
+@pytest.mark.asyncio
+async def test_cancel_stops_a_running_job():
+    manager = make_manager()
+    started = asyncio.Event()
+
+    async def forever(params, user, ctx):
+        started.set()
+        await asyncio.Event().wait()
+
+    manager.register("forever", forever, EchoParams)
+    job = await manager.submit("forever", "user-1", {"text": "hi"})
+    await started.wait()
+
+    assert await manager.cancel(job["id"], "someone-else") is None
+    cancelled = await manager.cancel(job["id"], "user-1")
+    assert cancelled["status"] == "cancelled"
+    assert "params" not in cancelled
+    await settle()
+    assert manager.stats()["active"] == 0
+    assert manager.collection.get(job["id"])["status"] == "cancelled"
+
+    # Cancelling again just reports the job as it is
+    again = await manager.cancel(job["id"], "user-1")
+    assert again["status"] == "cancelled"
+
+@pytest.mark.asyncio
+async def test_progress_updates_raise_once_cancelled_elsewhere():
+    manager = make_manager()
+    progressed = asyncio.Event()
+    outcome = []
+
+    async def slow(params, user, ctx):
+        await ctx.update({"stage": "one"})
+        progressed.set()
+        await asyncio.sleep(0.01)
+        try:
+            await ctx.update({"stage": "two"})
+        except JobCancelled:
+            outcome.append("cancelled")
+            raise
+        return "done"
+
+    manager.register("slow", slow, EchoParams)
+    job = await manager.submit("slow", "user-1", {"text": "hi"})
+    await progressed.wait()
+    # Another worker cancelled it: only the document changes
+    manager.collection.get(job["id"])["status"] = "cancelled"
+    await asyncio.sleep(0.02)
+
+    assert outcome == ["cancelled"]
+    doc = manager.collection.get(job["id"])
+    assert doc["status"] == "cancelled" and doc["stage"] == "one"
+
+@pytest.mark.asyncio
+async def test_heartbeat_refreshes_jobs_and_picks_up_remote_cancellation():
+    manager = make_manager()
+    started = asyncio.Event()
+
+    async def forever(params, user, ctx):
+        started.set()
+        await asyncio.Event().wait()
+
+    manager.register("forever", forever, EchoParams)
+    job = await manager.submit("forever", "user-1", {"text": "hi"})
+    await started.wait()
+    doc = manager.collection.get(job["id"])
+    doc["heartbeat_at"] = EPOCH
+
+    await manager._heartbeat()
+    assert doc["heartbeat_at"] > EPOCH
+
+    doc["status"] = "cancelled"
+    await manager._heartbeat()
+    await settle()
+    assert manager.stats()["active"] == 0
+
+def stale_job(job_id, attempts, heartbeat_at=None):
+    return {
+        "id": job_id, "type": "echo", "user_id": "user-1", "params": {"text": job_id},
+        "status": "running", "result": None, "error": None, "attempts": attempts,
+        "worker": "dead-worker",
+        "heartbeat_at": heartbeat_at or datetime.now(timezone.utc) - timedelta(minutes=10),
+        "created_at": "2024-03-01T10:00:00+00:00", "updated_at": "2024-03-01T10:00:00+00:00"
+    }
+
+@pytest.mark.asyncio
+async def test_stale_jobs_are_retried_until_max_attempts():
+    manager = make_manager(max_attempts=3)
+
+    async def echo(params, user, ctx):
+        return params.text
+
+    manager.register("echo", echo, EchoParams)
+    jobs = manager.collection
+    jobs.docs = [
+        stale_job("retry", attempts=1),
+        stale_job("exhausted", attempts=3),
+        # Its worker is still heartbeating
+        stale_job("alive", attempts=1, heartbeat_at=datetime.now(timezone.utc)),
+    ]
+
+    assert await manager.recover() == 1
+    await settle()
+
+    retried = jobs.get("retry")
+    assert retried["status"] == "completed"
+    assert retried["result"] == "retry"
+    assert retried["attempts"] == 2
+    assert retried["worker"] == manager.worker_id
+
+    exhausted = jobs.get("exhausted")
+    assert exhausted["status"] == "failed"
+    assert exhausted["error"] == "Job was interrupted too many times"
+
+    assert jobs.get("alive")["status"] == "running"
+    assert jobs.get("alive")["worker"] == "dead-worker"
+    assert await manager.recover() == 0
+
+@pytest.mark.asyncio
+async def test_shutdown_hands_jobs_to_the_next_worker():
+    manager = make_manager()
+    started = asyncio.Event()
+
+    async def forever(params, user, ctx):
+        started.set()
+        await asyncio.Event().wait()
+
+    manager.register("forever", forever, EchoParams)
+    job = await manager.submit("forever", "user-1", {"text": "hi"})
+    await started.wait()
+    await manager.shutdown()
+    await settle()
+
+    doc = manager.collection.get(job["id"])
+    assert doc["status"] == "queued"
+    assert doc["heartbeat_at"] == EPOCH
+
+    # Another worker claims it straight away and runs it again
+    successor = make_manager()
+    successor.collection = manager.collection
+
+    async def echo(params, user, ctx):
+        return params.text
+
+    successor.register("forever", echo, EchoParams)
+    assert await successor.recover() == 1
+    await settle()
+    assert doc["status"] == "completed"
+    assert doc["attempts"] == 2
+
+@pytest.mark.asyncio
+async def test_status_and_result_endpoints(monkeypatch):
+    manager = make_manager()
+    release = asyncio.Event()
+
+    async def echo(params, user, ctx):
+        await release.wait()
+        return {"echo": params.text}
+
+    manager.register("echo", echo, EchoParams)
+    monkeypatch.setattr(jobs_router, "job_manager", manager)
+    monkeypatch.setattr(jobs_router, "db", type("FakeDb", (), {"jobs": manager.collection})())
+    user = {"id": "user-1"}
+
+    job = await jobs_router.submit_job(jobs_router.JobSubmit(type="echo", params={"text": "hi"}), user)
+    assert "params" not in job and "result" not in job
+    await settle()
+
+    status = await jobs_router.get_job(job["id"], user)
+    assert status["status"] == "running"
+    assert "params" not in status
+    with pytest.raises(HTTPException) as exc:
+        await jobs_router.get_job_result(job["id"], user)
+    assert exc.value.status_code == 409
+    with pytest.raises(HTTPException) as exc:
+        await jobs_router.get_job(job["id"], {"id": "someone-else"})
+    assert exc.value.status_code == 404
+
+    release.set()
+    await settle()
+    assert await jobs_router.get_job_result(job["id"], user) == {"echo": "hi"}
+    with pytest.raises(HTTPException) as exc:
+        await jobs_router.cancel_job(job["id"], user)
+    assert exc.value.status_code == 409
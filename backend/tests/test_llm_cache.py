@@ -0,0 +1,140 @@
+import sys
+import os
+import asyncio
+from datetime import timedelta
+import pytest
+
+# Add backend to sys.path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from backend.llm_cache import LLMCache
+from backend.indexes import INDEXES
+
+class FakeResult:
+    def __init__(self, deleted_count):
+        self.deleted_count = deleted_count
+
+class FakeCursor:
+    def __init__(self, docs, projection):
+        self.docs = docs
+        self.projection = projection
+
+    def sort(self, field, direction):
+        self.docs.sort(key=lambda d: d[field], reverse=direction < 0)
+        return self
+
+    def limit(self, n):
+        self.docs = self.docs[:n]
+        return self
+
+    async def to_list(self, n):
+        return [
+            {field: doc[field] for field in self.projection if field in doc}
+            for doc in self.docs[:n]
+        ]
+
+class FakeLLMCacheCollection:
+    """Just enough of a Motor collection for LLMCache"""
+
+    def __init__(self):
+        self.docs = {}
+        self.lookups = 0
+
+    async def find_one_and_update(self, query, update, projection, return_document):
+        self.lookups += 1
+        doc = self.docs.get(query["hash"])
+        if doc is None:
+            return None
+        doc.update(update["$set"])
+        for field, amount in update["$inc"].items():
+            doc[field] = doc.get(field, 0) + amount
+        return {field: doc[field] for field in projection if field != "_id"}
+
+    async def update_one(self, query, update, upsert=False):
+        self.docs.setdefault(query["hash"], {}).update(update["$set"])
+
+    async def estimated_document_count(self):
+        return len(self.docs)
+
+    def find(self, query, projection):
+        return FakeCursor(list(self.docs.values()), projection)
+
+    async def delete_many(self, query):
+        hashes = [h for h in query["hash"]["$in"] if h in self.docs]
+        for h in hashes:
+            del self.docs[h]
+        return FakeResult(len(hashes))
+
+@pytest.mark.asyncio
+async def test_put_then_get_hits_l1_without_mongo():
+    collection = FakeLLMCacheCollection()
+    llm_cache = LLMCache(collection, max_entries=100, l1_size=10, l1_ttl=60)
+
+    await llm_cache.put("h1", "answer", "openai", "gpt-4o-mini")
+    assert await llm_cache.get("h1", "openai") == "answer"
+    assert collection.lookups == 0
+
+    stats = llm_cache.stats()["providers"]["openai"]
+    assert stats == {"hits": 1, "l1_hits": 1, "misses": 0, "evictions": 0}
+
+@pytest.mark.asyncio
+async def test_mongo_hit_fills_l1_and_records_the_hit():
+    collection = FakeLLMCacheCollection()
+    writer = LLMCache(collection, max_entries=100, l1_size=10, l1_ttl=60)
+    await writer.put("h1", "answer", "ollama", "llama3")
+    stored = dict(collection.docs["h1"])
+    assert stored["cached_at"] == stored["last_hit_at"]
+    # Mongo expires entries by cached_at, which hits don't move
+    assert any(
+        index["keys"] == [("cached_at", 1)] and index["expireAfterSeconds"] > 0
+        for index in INDEXES["llm_cache"]
+    )
+
+    # Another worker: empty L1, so the first read goes to Mongo
+    reader = LLMCache(collection, max_entries=100, l1_size=10, l1_ttl=60)
+    assert await reader.get("h1", "ollama") == "answer"
+    assert collection.lookups == 1
+    assert collection.docs["h1"]["hits"] == 1
+    assert collection.docs["h1"]["last_hit_at"] >= stored["last_hit_at"]
+    assert collection.docs["h1"]["cached_at"] == stored["cached_at"]
+
+    assert await reader.get("h1", "ollama") == "answer"
+    assert collection.lookups == 1
+    assert reader.stats()["providers"]["ollama"] == {"hits": 2, "l1_hits": 1, "misses": 0, "evictions": 0}
+
+@pytest.mark.asyncio
+async def test_expired_l1_entries_fall_back_to_mongo():
+    collection = FakeLLMCacheCollection()
+    llm_cache = LLMCache(collection, max_entries=100, l1_size=10, l1_ttl=0.01)
+
+    await llm_cache.put("h1", "answer", "openai", "gpt-4o-mini")
+    await asyncio.sleep(0.02)
+    assert await llm_cache.get("h1", "openai") == "answer"
+    assert collection.lookups == 1
+
+    assert await llm_cache.get("missing", "openai") is None
+    assert llm_cache.stats()["providers"]["openai"]["misses"] == 1
+
+@pytest.mark.asyncio
+async def test_trim_every_n_puts_evicts_least_recently_hit():
+    collection = FakeLLMCacheCollection()
+    llm_cache = LLMCache(collection, max_entries=3, l1_size=10, l1_ttl=60, trim_every=5)
+
+    for i in range(4):
+        await llm_cache.put(f"h{i}", f"answer {i}", "openai", "gpt-4o-mini")
+    # Make h0 the most recently hit entry
+    collection.docs["h0"]["last_hit_at"] += timedelta(minutes=1)
+    assert len(collection.docs) == 4
+
+    await llm_cache.put("h4", "answer 4", "anthropic", "claude")
+    assert set(collection.docs) == {"h0", "h3", "h4"}
+    # Evicted entries leave L1 too, so this worker can't serve them either
+    assert "h1" not in llm_cache.l1
+    assert llm_cache.stats()["providers"]["openai"]["evictions"] == 2
+    # Counted against the provider that produced each evicted entry
+    assert llm_cache.stats()["providers"].keys() == {"openai"}
+
+    # The counter restarts: the next trim waits for another 5 puts
+    for i in range(5, 9):
+        await llm_cache.put(f"h{i}", "answer", "openai", "gpt-4o-mini")
+    assert len(collection.docs) == 7
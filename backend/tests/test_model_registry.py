@@ -0,0 +1,66 @@
+import sys
+import os
+
+# Add backend to sys.path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from backend.model_registry import EmbeddedModelRegistry, GB, parse_size
+
+class FakeModel:
+    def __init__(self, name):
+        self.name = name
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+def make_registry(max_models, budget_gb):
+    loaded = []
+
+    def loader(name, path):
+        model = FakeModel(name)
+        loaded.append(model)
+        return model
+
+    registry = EmbeddedModelRegistry("/nonexistent", max_models, int(budget_gb * GB), loader=loader)
+    return registry, loaded
+
+def test_parse_size():
+    assert parse_size("2.2GB") == int(2.2 * GB)
+    assert parse_size("512MB") == 512 * 1024 ** 2
+    assert parse_size("lots") is None
+
+def test_registry_reuses_resident_models():
+    registry, loaded = make_registry(max_models=2, budget_gb=16)
+    phi = registry.get("Phi-3-mini-4k-instruct.Q4_0.gguf")
+    llama = registry.get("Llama-3.2-3B-Instruct-Q4_K_M.gguf")
+
+    assert registry.get("Phi-3-mini-4k-instruct.Q4_0.gguf") is phi
+    assert registry.get("Llama-3.2-3B-Instruct-Q4_K_M.gguf") is llama
+    assert len(loaded) == 2
+    assert registry.stats()["evictions"] == 0
+
+def test_registry_evicts_least_recently_used_over_count():
+    registry, loaded = make_registry(max_models=2, budget_gb=16)
+    phi = registry.get("Phi-3-mini-4k-instruct.Q4_0.gguf")
+    registry.get("Llama-3.2-3B-Instruct-Q4_K_M.gguf")
+    registry.get("Phi-3-mini-4k-instruct.Q4_0.gguf")
+    registry.get("Mistral-7B-Instruct-v0.3-Q4_K_M.gguf")
+
+    resident = registry.stats()["resident"]
+    assert resident == ["Phi-3-mini-4k-instruct.Q4_0.gguf", "Mistral-7B-Instruct-v0.3-Q4_K_M.gguf"]
+    assert loaded[1].closed
+    assert not phi.closed
+
+def test_registry_respects_ram_budget():
+    registry, _ = make_registry(max_models=4, budget_gb=12)
+    registry.get("Phi-3-mini-4k-instruct.Q4_0.gguf")
+    registry.get("Llama-3.2-3B-Instruct-Q4_K_M.gguf")
+    assert registry.model_size("Phi-3-mini-4k-instruct.Q4_0.gguf") == 4 * GB
+    # 4 + 4 + 8 GB of RAM doesn't fit in 12 GB; dropping the oldest is enough
+    registry.get("Meta-Llama-3-8B-Instruct-Q4_K_M.gguf")
+
+    assert registry.stats()["resident"] == [
+        "Llama-3.2-3B-Instruct-Q4_K_M.gguf", "Meta-Llama-3-8B-Instruct-Q4_K_M.gguf"
+    ]
+    assert registry.resident_bytes() <= 12 * GB
@@ -0,0 +1,214 @@
+import sys
+import os
+import asyncio
+import json
+from datetime import datetime, timezone, timedelta
+import httpx
+import pytest
+from fastapi import HTTPException
+
+# Add backend to sys.path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from backend.page_cache import PageCache, normalize_url, url_hash
+from backend.routers import ai
+
+class FakeResult:
+    def __init__(self, deleted_count):
+        self.deleted_count = deleted_count
+
+class FakeCursor:
+    def __init__(self, docs, projection):
+        self.docs = docs
+        self.projection = projection
+
+    def sort(self, field, direction):
+        self.docs.sort(key=lambda d: d[field], reverse=direction < 0)
+        return self
+
+    def limit(self, n):
+        self.docs = self.docs[:n]
+        return self
+
+    async def to_list(self, n):
+        return [{field: doc[field] for field in self.projection if field in doc} for doc in self.docs[:n]]
+
+class FakePages:
+    """Just enough of a Motor collection for PageCache"""
+
+    def __init__(self):
+        self.docs = {}
+
+    @staticmethod
+    def apply(doc, update):
+        doc.update(update["$set"])
+        for field, amount in update.get("$inc", {}).items():
+            doc[field] = doc.get(field, 0) + amount
+
+    async def find_one_and_update(self, query, update, projection, return_document):
+        doc = self.docs.get(query["url_hash"])
+        if doc is None:
+            return None
+        self.apply(doc, update)
+        return dict(doc)
+
+    async def update_one(self, query, update, upsert=False):
+        if query["url_hash"] in self.docs or upsert:
+            self.apply(self.docs.setdefault(query["url_hash"], {}), update)
+
+    async def estimated_document_count(self):
+        return len(self.docs)
+
+    def find(self, query, projection):
+        return FakeCursor(list(self.docs.values()), projection)
+
+    async def delete_many(self, query):
+        hashes = [h for h in query["url_hash"]["$in"] if h in self.docs]
+        for h in hashes:
+            del self.docs[h]
+        return FakeResult(len(hashes))
+
+RECIPE_PAGE = """<html><head><script type="application/ld+json">{}</script></head>
+<body>Soup</body></html>"""
+
+def recipe_page(title):
+    return RECIPE_PAGE.format(json.dumps({
+        "@context": "https://schema.org",
+        "@type": "Recipe",
+        "name": title,
+        "recipeIngredient": ["1 cup water", "2 carrots"],
+        "recipeInstructions": ["Boil the water", "Add the carrots"]
+    }))
+
+class Site:
+    """A page that honours conditional GETs"""
+
+    def __init__(self):
+        self.title = "Carrot Soup"
+        self.etag = '"v1"'
+        self.requests = []
+
+    def handler(self, request):
+        self.requests.append(request)
+        if request.headers.get("if-none-match") == self.etag:
+            return httpx.Response(304, headers={"ETag": self.etag})
+        return httpx.Response(
+            200,
+            headers={
+                "Content-Type": "text/html",
+                "ETag": self.etag,
+                "Last-Modified": "Fri, 01 Mar 2024 10:00:00 GMT"
+            },
+            text=recipe_page(self.title)
+        )
+
+def make_cache(**kwargs):
+    options = {"max_entries": 100, "fresh_for": 3600, "l1_size": 10, **kwargs}
+    return PageCache(FakePages(), **options)
+
+def make_stale(cache, url):
+    cache.l1.clear()
+    cache.collection.docs[url_hash(url)]["checked_at"] = datetime.now(timezone.utc) - timedelta(hours=2)
+
+def test_tracking_parameters_and_fragments_share_an_entry():
+    assert normalize_url("https://example.com") == "https://example.com/"
+    assert url_hash("https://example.com/soup?UTM_Campaign=x&Ref=home&serves=4#notes") == \
+        url_hash("https://example.com/soup?serves=4")
+    # Blank values still distinguish pages
+    assert url_hash("https://example.com/soup?print=") != url_hash("https://example.com/soup")
+
+@pytest.mark.asyncio
+async def test_stale_pages_are_revalidated_and_reused_on_304(monkeypatch):
+    site = Site()
+    cache = make_cache()
+    monkeypatch.setattr(ai, "page_cache", cache)
+    url = "https://example.com/soup?utm_source=newsletter"
+
+    async with httpx.AsyncClient(transport=httpx.MockTransport(site.handler)) as client:
+        recipe, _ = await ai.read_recipe_page(client, url)
+        assert recipe["title"] == "Carrot Soup"
+        assert "if-none-match" not in site.requests[0].headers
+        stored = cache.collection.docs[url_hash(url)]
+        assert stored["etag"] == '"v1"'
+        assert stored["url"] == "https://example.com/soup"
+
+        # Fresh: served without touching the network, even for another spelling
+        recipe, _ = await ai.read_recipe_page(client, "https://EXAMPLE.com/soup")
+        assert recipe["title"] == "Carrot Soup"
+        assert len(site.requests) == 1
+
+        make_stale(cache, url)
+        checked_before = cache.collection.docs[url_hash(url)]["checked_at"]
+        recipe, _ = await ai.read_recipe_page(client, url)
+        assert recipe["title"] == "Carrot Soup"
+        revalidation = site.requests[1]
+        assert revalidation.headers["if-none-match"] == '"v1"'
+        assert revalidation.headers["if-modified-since"] == "Fri, 01 Mar 2024 10:00:00 GMT"
+
+        # touch() made it fresh again, in Mongo and in L1
+        stored = cache.collection.docs[url_hash(url)]
+        assert stored["checked_at"] > checked_before
+        assert stored["last_hit_at"] == stored["checked_at"]
+        assert cache.is_fresh(cache.l1.get(url_hash(url)))
+        await ai.read_recipe_page(client, url)
+        assert len(site.requests) == 2
+
+        # A changed page replaces the entry
+        make_stale(cache, url)
+        site.title, site.etag = "Spicy Carrot Soup", '"v2"'
+        recipe, _ = await ai.read_recipe_page(client, url)
+        assert recipe["title"] == "Spicy Carrot Soup"
+        assert cache.collection.docs[url_hash(url)]["etag"] == '"v2"'
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["revalidated"], stats["misses"]) == (2, 1, 2)
+
+@pytest.mark.asyncio
+async def test_callers_get_copies_of_cached_recipes():
+    cache = make_cache()
+    await cache.put("https://example.com/soup", {"title": "Soup", "tags": []}, "", None, None)
+    recipe, _ = cache.result(await cache.get("https://example.com/soup"))
+    recipe["tags"].append("changed")
+    again, _ = cache.result(await cache.get("https://example.com/soup"))
+    assert again["tags"] == []
+
+@pytest.mark.asyncio
+async def test_trim_evicts_pages_by_last_hit():
+    cache = make_cache(max_entries=2, trim_every=3)
+    urls = [f"https://example.com/recipe-{i}" for i in range(3)]
+
+    await cache.put(urls[0], None, "zero", None, None)
+    await cache.put(urls[1], None, "one", None, None)
+    # A hit through Mongo moves the oldest page to the back of the queue
+    cache.l1.clear()
+    put_at = cache.collection.docs[url_hash(urls[0])]["last_hit_at"]
+    await cache.get(urls[0])
+    assert cache.collection.docs[url_hash(urls[0])]["last_hit_at"] >= put_at
+    # Nudged so the clock's resolution can't tie it with the next page
+    cache.collection.docs[url_hash(urls[0])]["last_hit_at"] += timedelta(seconds=1)
+    await cache.put(urls[2], None, "two", None, None)
+
+    assert set(cache.collection.docs) == {url_hash(urls[0]), url_hash(urls[2])}
+    assert url_hash(urls[1]) not in cache.l1
+    assert cache.stats()["evictions"] == 1
+
+class SlowDrip(httpx.AsyncByteStream):
+    """A page that never finishes, one small chunk at a time"""
+
+    async def __aiter__(self):
+        while True:
+            await asyncio.sleep(0.01)
+            yield b"<p>ad</p>"
+
+@pytest.mark.asyncio
+async def test_slow_pages_hit_the_overall_deadline(monkeypatch):
+    monkeypatch.setattr(ai.settings, "fetch_total_timeout", 0.1)
+
+    def handler(request):
+        return httpx.Response(200, headers={"Content-Type": "text/html"}, stream=SlowDrip())
+
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+        with pytest.raises(HTTPException) as exc:
+            await ai.fetch_html(client, "https://example.com/slow")
+    assert exc.value.status_code == 400
+    assert "too long" in exc.value.detail
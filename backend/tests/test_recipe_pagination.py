@@ -0,0 +1,175 @@
+import sys
+import os
+import json
+import pytest
+from fastapi import HTTPException, Response
+from starlette.requests import Request
+
+# Add backend to sys.path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from backend.routers import recipes as recipes_router
+from backend.pagination import NEXT_CURSOR_HEADER, encode_cursor
+
+def matches(doc, query):
+    """The subset of Mongo queries get_recipes builds"""
+    for field, condition in query.items():
+        if field == "$and":
+            if not all(matches(doc, q) for q in condition):
+                return False
+        elif field == "$or":
+            if not any(matches(doc, q) for q in condition):
+                return False
+        elif isinstance(condition, dict):
+            value = doc.get(field)
+            if "$in" in condition and value not in condition["$in"]:
+                return False
+            if "$lt" in condition and not (value is not None and value < condition["$lt"]):
+                return False
+        elif doc.get(field) != condition:
+            return False
+    return True
+
+class FakeCursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def sort(self, keys):
+        for field, direction in reversed(keys):
+            self.docs.sort(key=lambda d: d[field], reverse=direction < 0)
+        return self
+
+    def limit(self, n):
+        self.docs = self.docs[:n]
+        return self
+
+    async def to_list(self, n):
+        return self.docs[:n]
+
+class FakeRecipes:
+    """Just enough of a Motor collection for get_recipes"""
+
+    def __init__(self, docs):
+        self.docs = docs
+
+    def find(self, query, projection):
+        fields = [f for f, keep in projection.items() if keep and f != "_id"]
+        return FakeCursor([
+            {f: doc[f] for f in fields if f in doc}
+            for doc in self.docs if matches(doc, query)
+        ])
+
+class FakeDb:
+    def __init__(self, docs):
+        self.recipes = FakeRecipes(docs)
+
+class AlwaysModified:
+    async def conditional_get(self, request, response, *args):
+        return None
+
+class FakeIndex:
+    def __init__(self, ranked):
+        self.ranked = ranked
+
+    def search(self, text, category=None, only_ids=None):
+        return self.ranked
+
+class FakeSearch:
+    def __init__(self, ranked):
+        self.index = FakeIndex(ranked)
+
+    async def for_user(self, user):
+        return self.index
+
+def recipe(n, created_at, author="user-1"):
+    return {
+        "id": f"r{n}", "title": f"Recipe {n}", "description": "", "ingredients": [],
+        "instructions": ["Cook"], "prep_time": 5, "cook_time": 10, "servings": 2,
+        "category": "Dinner", "tags": [], "image_url": "", "author_id": author,
+        "household_id": None, "created_at": created_at, "updated_at": created_at
+    }
+
+USER = {"id": "user-1", "household_id": None, "favorites": ["r2"]}
+
+@pytest.fixture
+def library(monkeypatch):
+    docs = [
+        recipe(1, "2024-03-01T10:00:00"),
+        recipe(2, "2024-03-02T10:00:00"),
+        # Same timestamp: id breaks the tie
+        recipe(3, "2024-03-03T10:00:00"),
+        recipe(4, "2024-03-03T10:00:00"),
+        recipe(5, "2024-03-04T10:00:00"),
+        recipe(6, "2024-03-05T10:00:00", author="someone-else"),
+    ]
+    monkeypatch.setattr(recipes_router, "db", FakeDb(docs))
+    monkeypatch.setattr(recipes_router, "collection_versions", AlwaysModified())
+    return docs
+
+async def get_page(cursor=None, limit=2, search=None, view="full"):
+    request = Request({"type": "http", "method": "GET", "path": "/api/recipes", "query_string": b"", "headers": []})
+    response = await recipes_router.get_recipes(
+        request, Response(), category=None, search=search, favorites_only=False,
+        cursor=cursor, limit=limit, view=view, user=USER
+    )
+    return json.loads(response.body), response.headers.get(NEXT_CURSOR_HEADER.lower())
+
+@pytest.mark.asyncio
+async def test_keyset_cursor_walks_every_recipe_once(library):
+    seen = []
+    page, cursor = await get_page()
+    seen += [r["id"] for r in page]
+    while cursor:
+        page, cursor = await get_page(cursor)
+        seen += [r["id"] for r in page]
+
+    # Newest first, ties broken by id, other users' recipes excluded
+    assert seen == ["r5", "r4", "r3", "r2", "r1"]
+
+@pytest.mark.asyncio
+async def test_last_page_has_no_cursor(library):
+    page, cursor = await get_page(limit=5)
+    assert len(page) == 5
+    assert cursor is None
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("cursor", [
+    "not a cursor!",
+    encode_cursor(["r1"]),
+    encode_cursor({"id": "r1"}),
+    # Operators smuggled in place of values never reach the query
+    encode_cursor({"created_at": {"$gt": ""}, "id": "r1"}),
+    encode_cursor({"created_at": "2024-03-03T10:00:00", "id": {"$ne": None}}),
+])
+async def test_malformed_or_tampered_keyset_cursors_are_rejected(library, cursor):
+    with pytest.raises(HTTPException) as exc:
+        await get_page(cursor)
+    assert exc.value.status_code == 400
+
+@pytest.mark.asyncio
+async def test_search_pages_by_offset_in_rank_order(library, monkeypatch):
+    monkeypatch.setattr(recipes_router, "recipe_search", FakeSearch(["r3", "r1", "r5", "r2"]))
+
+    page, cursor = await get_page(limit=3, search="soup")
+    assert [r["id"] for r in page] == ["r3", "r1", "r5"]
+    page, cursor = await get_page(cursor, limit=3, search="soup")
+    assert [r["id"] for r in page] == ["r2"]
+    assert cursor is None
+
+    for tampered in (encode_cursor({"offset": -1}), encode_cursor({"offset": "3"})):
+        with pytest.raises(HTTPException) as exc:
+            await get_page(tampered, limit=3, search="soup")
+        assert exc.value.status_code == 400
+
+@pytest.mark.asyncio
+async def test_summary_view_returns_card_fields_only(library):
+    page, _ = await get_page(limit=5, view="summary")
+    by_id = {r["id"]: r for r in page}
+
+    assert set(by_id["r1"]) <= {*recipes_router.SUMMARY_PROJECTION, "is_favorite"}
+    assert "instructions" not in by_id["r1"]
+    assert by_id["r1"]["title"] == "Recipe 1"
+    assert by_id["r2"]["is_favorite"] is True
+    assert by_id["r1"]["is_favorite"] is False
+    # Optional fields older documents lack are filled in
+    assert by_id["r1"]["image_variants"] == []
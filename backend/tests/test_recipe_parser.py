@@ -0,0 +1,135 @@
+import sys
+import os
+import json
+import pytest
+
+# Add backend to sys.path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from backend import recipe_parser
+from backend.recipe_parser import (
+    read_page, parse_duration, parse_ingredient, parse_servings, ParserStats
+)
+
+JSON_LD_PAGE = """<html><head><script type="application/ld+json">%s</script></head>
+<body><h1>Ignored</h1></body></html>""" % json.dumps({
+    "@context": "https://schema.org",
+    "@graph": [
+        {"@type": "WebPage", "name": "Page"},
+        {
+            "@type": ["Recipe"],
+            "name": "Tomato Soup",
+            "description": "A <b>simple</b> soup",
+            "recipeIngredient": ["2 cups tomatoes", "1½ tbsp olive oil", "Salt to taste"],
+            "recipeInstructions": [
+                {"@type": "HowToSection", "itemListElement": [
+                    {"@type": "HowToStep", "text": "Chop the tomatoes."},
+                    {"@type": "HowToStep", "text": "Simmer for 20 minutes."}
+                ]}
+            ],
+            "prepTime": "PT10M",
+            "cookTime": "PT1H5M",
+            "recipeYield": ["4", "4 servings"],
+            "recipeCategory": "Soup",
+            "keywords": "easy, vegan",
+            "image": {"@type": "ImageObject", "url": "https://example.com/soup.jpg"}
+        }
+    ]
+})
+
+MICRODATA_PAGE = """<html><body>
+<div itemscope itemtype="http://schema.org/Recipe">
+  <h1 itemprop="name">Pancakes</h1>
+  <meta itemprop="prepTime" content="PT5M">
+  <time itemprop="cookTime" datetime="PT15M">15 min</time>
+  <span itemprop="recipeYield">Serves 6</span>
+  <li itemprop="recipeIngredient">1 cup flour</li>
+  <li itemprop="recipeIngredient">2 eggs</li>
+  <div itemprop="recipeInstructions"><ol><li>Mix.</li><li>Fry.</li></ol></div>
+  <div itemprop="author" itemscope itemtype="http://schema.org/Person">
+    <span itemprop="name">Someone</span>
+  </div>
+</div></body></html>"""
+
+HEURISTIC_PAGE = """<html><head><meta property="og:title" content="Garlic Bread"></head><body>
+<h2>Ingredients</h2><ul><li>1 baguette</li><li>3 cloves garlic</li><li>50 g butter</li></ul>
+<div class="recipe-directions"><ol><li>Mix garlic and butter.</li><li>Spread and bake.</li></ol></div>
+</body></html>"""
+
+def test_parse_duration():
+    assert parse_duration("PT1H30M") == 90
+    assert parse_duration("P0DT0H20M") == 20
+    assert parse_duration("1 hr 15 mins") == 75
+    assert parse_duration("25") == 25
+    assert parse_duration(None) == 0
+
+def test_parse_ingredient():
+    assert parse_ingredient("2 1/2 cups flour, sifted") == {"name": "flour, sifted", "amount": "2 1/2", "unit": "cups"}
+    assert parse_ingredient("1½ tbsp olive oil") == {"name": "olive oil", "amount": "1 1/2", "unit": "tbsp"}
+    assert parse_ingredient("2-3 cloves of garlic") == {"name": "garlic", "amount": "2-3", "unit": "cloves"}
+    assert parse_ingredient("Salt to taste") == {"name": "Salt to taste", "amount": "", "unit": ""}
+
+def test_parse_servings():
+    assert parse_servings("Serves 6") == 6
+    assert parse_servings(["", "4 servings"]) == 4
+    assert parse_servings(None) == 0
+
+@pytest.fixture
+def parse(monkeypatch):
+    """read_page, also returning the stage it recorded"""
+    def parse(html):
+        stats = ParserStats()
+        monkeypatch.setattr(recipe_parser, "parser_stats", stats)
+        recipe, text = read_page(html)
+        (stage,) = stats.hits
+        return recipe, stage
+    return parse
+
+def test_json_ld(parse):
+    recipe, stage = parse(JSON_LD_PAGE)
+    assert stage == "json_ld"
+    assert recipe["title"] == "Tomato Soup"
+    assert recipe["description"] == "A simple soup"
+    assert recipe["instructions"] == ["Chop the tomatoes.", "Simmer for 20 minutes."]
+    assert recipe["ingredients"][0] == {"name": "tomatoes", "amount": "2", "unit": "cups"}
+    assert (recipe["prep_time"], recipe["cook_time"], recipe["servings"]) == (10, 65, 4)
+    assert recipe["category"] == "Lunch"
+    assert recipe["tags"] == ["easy", "vegan"]
+    assert recipe["image_url"] == "https://example.com/soup.jpg"
+
+def test_microdata(parse):
+    recipe, stage = parse(MICRODATA_PAGE)
+    assert stage == "microdata"
+    assert recipe["title"] == "Pancakes"
+    assert recipe["instructions"] == ["Mix.", "Fry."]
+    assert [i["name"] for i in recipe["ingredients"]] == ["flour", "eggs"]
+    assert (recipe["prep_time"], recipe["cook_time"], recipe["servings"]) == (5, 15, 6)
+
+def test_heuristics(parse):
+    recipe, stage = parse(HEURISTIC_PAGE)
+    assert stage == "heuristic"
+    assert recipe["title"] == "Garlic Bread"
+    assert len(recipe["ingredients"]) == 3
+    assert recipe["instructions"] == ["Mix garlic and butter.", "Spread and bake."]
+
+def test_falls_back_to_llm(parse):
+    recipe, stage = parse("<html><body><p>Just a blog post</p></body></html>")
+    assert recipe is None
+    assert stage == "llm"
+
+def test_read_page_returns_text_for_llm():
+    recipe, text = read_page(
+        "<html><head><style>p {}</style></head><body><nav>Menu</nav><p>Line one</p><p>Line two</p></body></html>"
+    )
+    assert recipe is None
+    assert text == "Line one\nLine two"
+
+def test_parser_stats():
+    stats = ParserStats()
+    stats.record("json_ld")
+    stats.record("json_ld")
+    stats.record("llm")
+    result = stats.stats()
+    assert result["attempts"] == 3
+    assert result["hits"]["json_ld"] == 2
+    assert result["hit_rates"]["llm"] == 0.333
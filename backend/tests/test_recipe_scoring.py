@@ -0,0 +1,58 @@
+import sys
+import os
+
+# Add backend to sys.path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from backend.recipe_scoring import RecipeSnapshot, ScoringWeights, effort_level, DAY
+
+NOW = 1_700_000_000.0
+
+def build_snapshot(last_cooked=None):
+    recipes = [
+        {"id": "stew", "total_time": 120, "ingredient_count": 14},
+        {"id": "salad", "total_time": 15, "ingredient_count": 5},
+        {"id": "pasta", "total_time": 40, "ingredient_count": 8},
+        {"id": "tacos", "total_time": 25, "ingredient_count": 9},
+        {"id": "curry", "total_time": 50, "ingredient_count": 12},
+    ]
+    feedback = {"stew": "yes", "tacos": "no", "pasta": "meh"}
+    return RecipeSnapshot.build(recipes, feedback, last_cooked or {})
+
+def test_scores_match_weights():
+    snapshot = build_snapshot()
+    scores = snapshot.scores(ScoringWeights(), now=NOW)
+    # base 50, liked +30, disliked -50, <=30 +20, <=45 +10, >60 -10
+    assert scores.tolist() == [70, 70, 60, 20, 50]
+
+def test_top_k_orders_best_first_and_keeps_library_order_on_ties():
+    snapshot = build_snapshot()
+    top = snapshot.top(3, ScoringWeights(), now=NOW)
+    assert [snapshot.ids[i] for i in top] == ["stew", "salad", "pasta"]
+    assert len(snapshot.top(10, ScoringWeights(), now=NOW)) == 5
+
+def test_ties_on_the_cutoff_are_chosen_in_library_order():
+    recipes = [{"id": f"r{i}", "total_time": 40, "ingredient_count": 8} for i in range(200)]
+    snapshot = RecipeSnapshot.build(recipes, {"r150": "yes"}, {})
+    top = snapshot.top(5, ScoringWeights(), now=NOW)
+    assert [snapshot.ids[i] for i in top] == ["r150", "r0", "r1", "r2", "r3"]
+
+def test_recently_cooked_penalty_fades():
+    snapshot = build_snapshot({"salad": NOW - DAY, "stew": NOW - 30 * DAY})
+    weights = ScoringWeights(recently_cooked=35, recent_days=7)
+    scores = dict(zip(snapshot.ids, snapshot.scores(weights, now=NOW)))
+    assert scores["salad"] == 70 - 30
+    assert scores["stew"] == 70
+
+    top = snapshot.top(2, weights, now=NOW)
+    assert [snapshot.ids[i] for i in top] == ["stew", "pasta"]
+
+def test_configurable_weights_and_effort():
+    snapshot = build_snapshot()
+    weights = ScoringWeights(liked=0, quick=100)
+    top = snapshot.top(1, weights, now=NOW)
+    assert snapshot.ids[top[0]] == "salad"
+
+    assert effort_level(20, 5) == "Low"
+    assert effort_level(50, 5) == "Medium"
+    assert effort_level(30, 16) == "High"
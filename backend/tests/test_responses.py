@@ -0,0 +1,57 @@
+import sys
+import os
+from typing import List
+from fastapi import FastAPI, Response
+from fastapi.testclient import TestClient
+from pydantic import BaseModel
+
+# Add backend to sys.path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from backend.compression import SelectiveGZipMiddleware
+from backend.responses import json_list, response_projection
+from backend.streaming import ndjson_response
+
+class Item(BaseModel):
+    id: str
+    tags: List[str] = []
+
+def make_app():
+    app = FastAPI()
+    app.add_middleware(SelectiveGZipMiddleware, minimum_size=100)
+
+    @app.get("/items", response_model=List[Item])
+    async def items(response: Response):
+        response.headers["X-Next-Cursor"] = "abc"
+        return json_list([{"id": str(i)} for i in range(50)], Item, response)
+
+    @app.get("/stream")
+    async def stream():
+        async def events():
+            for i in range(50):
+                yield {"type": "token", "text": "x" * 10}
+        return ndjson_response(events())
+
+    @app.get("/image")
+    async def image():
+        return Response(b"\0" * 5000, media_type="image/webp")
+
+    return app
+
+def test_json_list_fills_defaults_and_keeps_headers():
+    client = TestClient(make_app())
+    response = client.get("/items")
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["x-next-cursor"] == "abc"
+    assert response.json()[0] == {"id": "0", "tags": []}
+    assert response_projection(Item) == {"_id": 0, "id": 1, "tags": 1}
+
+def test_streams_and_images_are_not_compressed():
+    client = TestClient(make_app())
+    stream = client.get("/stream")
+    assert "content-encoding" not in stream.headers
+    assert len(stream.text.splitlines()) == 50
+
+    image = client.get("/image")
+    assert "content-encoding" not in image.headers
+    assert len(image.content) == 5000
@@ -0,0 +1,113 @@
+import io
+import sys
+import os
+import pytest
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.testclient import TestClient
+
+pytest.importorskip("boto3")
+from botocore.response import StreamingBody
+from botocore.stub import ANY, Stubber
+
+# Add backend to sys.path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from backend.storage import S3Storage, IMMUTABLE
+from backend.uploads import get_stored_upload
+
+KEY = "0123456789abcdef-card.webp"
+
+def make_storage(**kwargs):
+    return S3Storage(
+        "photos", region="us-east-1", access_key_id="test", secret_access_key="secret", **kwargs
+    )
+
+@pytest.fixture
+def stubbed():
+    storage = make_storage()
+    with Stubber(storage.client) as stubber:
+        yield storage, stubber
+        stubber.assert_no_pending_responses()
+
+@pytest.mark.asyncio
+async def test_put_file_uploads_with_cache_headers_and_removes_the_file(stubbed, tmp_path):
+    storage, stubber = stubbed
+    source = tmp_path / "card.webp"
+    source.write_bytes(b"webp bytes")
+    stubber.add_response("put_object", {}, {
+        "Bucket": "photos", "Key": KEY, "Body": ANY, "ContentType": "image/webp",
+        "CacheControl": IMMUTABLE, "ChecksumAlgorithm": ANY
+    })
+
+    await storage.put_file(KEY, source, "image/webp")
+    assert not source.exists()
+
+@pytest.mark.asyncio
+async def test_fetch_downloads_and_checks_size(stubbed, tmp_path):
+    storage, stubber = stubbed
+    target = tmp_path / "copy"
+    stubber.add_client_error("head_object", service_error_code="404", http_status_code=404)
+    stubber.add_response("head_object", {"ContentLength": 5000})
+    for _ in range(2):
+        stubber.add_response("head_object", {"ContentLength": 5, "ETag": '"abc"'})
+    stubber.add_response("get_object", {
+        "Body": StreamingBody(io.BytesIO(b"hello"), 5), "ContentLength": 5, "ETag": '"abc"'
+    })
+
+    with pytest.raises(HTTPException) as exc:
+        await storage.fetch("incoming/r1/missing", target, max_bytes=100)
+    assert exc.value.status_code == 404
+    with pytest.raises(HTTPException) as exc:
+        await storage.fetch("incoming/r1/huge", target, max_bytes=100)
+    assert exc.value.status_code == 413
+    assert not target.exists()
+
+    await storage.fetch("incoming/r1/abc", target, max_bytes=100)
+    assert target.read_bytes() == b"hello"
+
+@pytest.mark.asyncio
+async def test_delete(stubbed):
+    storage, stubber = stubbed
+    stubber.add_response("delete_object", {}, {"Bucket": "photos", "Key": KEY})
+    await storage.delete(KEY)
+
+def test_presigned_upload_is_limited_to_type_and_size():
+    form = make_storage().presigned_upload("incoming/r1/abc", "image/png", 1000)
+    assert form["url"] == "https://photos.s3.amazonaws.com/"
+    assert form["fields"]["key"] == "incoming/r1/abc"
+    assert form["fields"]["Content-Type"] == "image/png"
+    assert "policy" in form["fields"]
+    assert make_storage().supports_direct_upload
+
+def test_download_urls_are_presigned_unless_public():
+    storage = make_storage(url_expires=600)
+    url = storage.download_url(KEY)
+    assert url.startswith(f"https://photos.s3.amazonaws.com/{KEY}?")
+    assert "X-Amz-Expires=600" in url
+    assert storage.redirect_max_age == 540
+
+    public = make_storage(public_url="https://cdn.example/")
+    assert public.download_url(KEY) == f"https://cdn.example/{KEY}"
+    assert public.redirect_max_age == 31536000
+
+def test_custom_endpoints_use_path_style_urls():
+    storage = make_storage(endpoint_url="http://minio:9000")
+    assert storage.download_url(KEY).startswith(f"http://minio:9000/photos/{KEY}?")
+
+def test_uploads_from_before_s3_are_still_served_from_disk(tmp_path):
+    (tmp_path / "recipe-1.jpg").write_bytes(b"legacy")
+    app = FastAPI()
+    storage = make_storage(public_url="https://cdn.example")
+
+    @app.get("/uploads/{filename}")
+    async def get_upload(filename: str, request: Request):
+        return get_stored_upload(request, storage, str(tmp_path), filename)
+
+    client = TestClient(app)
+    hashed = client.get(f"/uploads/{KEY}", follow_redirects=False)
+    assert hashed.status_code == 307
+    assert hashed.headers["location"] == f"https://cdn.example/{KEY}"
+
+    legacy = client.get("/uploads/recipe-1.jpg", follow_redirects=False)
+    assert legacy.status_code == 200
+    assert legacy.content == b"legacy"
@@ -0,0 +1,56 @@
+import sys
+import os
+
+# Add backend to sys.path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from backend.search import RecipeSearchIndex, tokenize
+
+def make_recipe(recipe_id, title, description="", tags=None, category="Dinner", created_at="2024-01-01", author_id="u1", household_id=None):
+    return {
+        "id": recipe_id,
+        "title": title,
+        "description": description,
+        "tags": tags or [],
+        "category": category,
+        "created_at": created_at,
+        "author_id": author_id,
+        "household_id": household_id
+    }
+
+def build_index():
+    index = RecipeSearchIndex("u1", "h1")
+    index.add(make_recipe("r1", "Chicken Curry", "Spicy and creamy", ["indian"]))
+    index.add(make_recipe("r2", "Lemon Chicken", "Roast chicken with lemon", ["easy"], created_at="2024-02-01"))
+    index.add(make_recipe("r3", "Crème Brûlée", "Classic custard", ["french"], category="Dessert"))
+    index.add(make_recipe("r4", "Tomato Soup", "Pairs with a chicken sandwich", ["soup"], category="Lunch"))
+    return index
+
+def test_tokenize_strips_accents_and_punctuation():
+    assert tokenize("Crème Brûlée!") == ["creme", "brulee"]
+    assert tokenize("") == []
+
+def test_title_matches_rank_above_description_matches():
+    results = build_index().search("chicken")
+    assert set(results[:2]) == {"r1", "r2"}
+    assert results[-1] == "r4"
+
+def test_prefix_matching_while_typing():
+    assert "r1" in build_index().search("chick")
+    assert build_index().search("bru") == ["r3"]
+
+def test_all_terms_must_match():
+    assert build_index().search("lemon chicken") == ["r2"]
+    assert build_index().search("lemon custard") == []
+
+def test_category_and_id_filters():
+    index = build_index()
+    assert index.search("chicken", category="Lunch") == ["r4"]
+    assert index.search("chicken", only_ids={"r1"}) == ["r1"]
+
+def test_remove_and_visibility():
+    index = build_index()
+    index.remove("r3")
+    assert index.search("brulee") == []
+    assert index.visible(make_recipe("x", "t", author_id="other", household_id="h1"))
+    assert not index.visible(make_recipe("x", "t", author_id="other", household_id="h2"))
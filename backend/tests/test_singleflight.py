@@ -0,0 +1,141 @@
+import asyncio
+import pytest
+import sys
+import os
+from datetime import datetime, timedelta, timezone
+from pymongo.errors import DuplicateKeyError
+
+# Add backend to sys.path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from backend.singleflight import MongoLease, SingleFlight
+
+@pytest.mark.asyncio
+async def test_concurrent_callers_share_one_call():
+    flight = SingleFlight()
+    calls = 0
+
+    async def work():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return "result"
+
+    results = await asyncio.gather(*[flight.do("key", work) for _ in range(5)])
+
+    assert results == ["result"] * 5
+    assert calls == 1
+    assert flight.stats() == {"in_flight": 0, "started": 1, "coalesced": 4}
+
+@pytest.mark.asyncio
+async def test_errors_reach_every_caller_and_are_not_cached():
+    flight = SingleFlight()
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+
+    results = await asyncio.gather(flight.do("key", fail), flight.do("key", fail), return_exceptions=True)
+    assert all(isinstance(r, ValueError) for r in results)
+
+    async def succeed():
+        return "ok"
+
+    assert await flight.do("key", succeed) == "ok"
+
+class FakeLeases:
+    """Just enough of a Motor collection for MongoLease, with the unique
+    index on "hash"
+    """
+
+    def __init__(self):
+        self.docs = {}
+        self.error = None
+
+    async def update_one(self, query, update, upsert=False):
+        if self.error:
+            raise self.error
+        doc = self.docs.get(query["hash"])
+        if doc is None:
+            self.docs[query["hash"]] = {"hash": query["hash"], **update["$set"]}
+        elif doc["expires_at"] < query["expires_at"]["$lt"]:
+            doc.update(update["$set"])
+        else:
+            # The upsert's insert collides with the live lease
+            raise DuplicateKeyError("duplicate key")
+
+    async def delete_one(self, query):
+        doc = self.docs.get(query["hash"])
+        if doc is not None and doc["owner"] == query["owner"]:
+            del self.docs[query["hash"]]
+
+@pytest.mark.asyncio
+async def test_lease_is_held_until_its_owner_releases_it():
+    leases = FakeLeases()
+    first, second = MongoLease(leases, ttl=30), MongoLease(leases, ttl=30)
+
+    assert await first.acquire("key")
+    assert not await second.acquire("key")
+    # Only the owner can release
+    await second.release("key")
+    assert not await second.acquire("key")
+
+    await first.release("key")
+    assert await second.acquire("key")
+    assert leases.docs["key"]["owner"] == second.owner
+
+@pytest.mark.asyncio
+async def test_expired_lease_is_taken_over():
+    leases = FakeLeases()
+    crashed, next_worker = MongoLease(leases, ttl=30), MongoLease(leases, ttl=30)
+
+    assert await crashed.acquire("key")
+    leases.docs["key"]["expires_at"] = datetime.now(timezone.utc) - timedelta(seconds=1)
+    assert await next_worker.acquire("key")
+    assert leases.docs["key"]["owner"] == next_worker.owner
+
+@pytest.mark.asyncio
+async def test_waiter_uses_the_holders_cached_result():
+    leases = FakeLeases()
+    cache = {}
+    calls = []
+    finish = asyncio.Event()
+
+    async def lookup(key):
+        return cache.get(key)
+
+    async def work():
+        calls.append("work")
+        await finish.wait()
+        cache["key"] = "result"
+        return "result"
+
+    holder = asyncio.ensure_future(MongoLease(leases, ttl=30, poll_interval=0.01).run("key", work, lookup))
+    while not calls:
+        await asyncio.sleep(0.001)
+    waiter = asyncio.ensure_future(MongoLease(leases, ttl=30, poll_interval=0.01).run("key", work, lookup))
+    await asyncio.sleep(0.03)
+    finish.set()
+
+    assert await asyncio.gather(holder, waiter) == ["result", "result"]
+    assert calls == ["work"]
+    # Released once done
+    assert leases.docs == {}
+
+@pytest.mark.asyncio
+async def test_lease_falls_back_to_running_locally():
+    leases = FakeLeases()
+
+    async def lookup(key):
+        return None
+
+    async def work():
+        return "local"
+
+    # A holder that never writes its result is waited on for at most ttl
+    assert await MongoLease(leases, ttl=30).acquire("key")
+    assert await MongoLease(leases, ttl=0.05, poll_interval=0.01).run("key", work, lookup) == "local"
+
+    # So is a lease collection that can't be reached
+    leases.error = RuntimeError("mongo down")
+    assert await MongoLease(leases, ttl=30).run("other", work, lookup) == "local"
@@ -0,0 +1,75 @@
+import sys
+import os
+import pytest
+from fastapi import HTTPException
+from PIL import Image
+
+# Add backend to sys.path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from backend.storage import LocalStorage, Storage
+from backend.images import ImageProcessor
+from backend.uploads import redirect_upload
+
+@pytest.mark.asyncio
+async def test_local_storage_round_trip(tmp_path):
+    storage = LocalStorage(str(tmp_path / "store"))
+    source = tmp_path / "a.txt"
+    source.write_bytes(b"hello")
+
+    await storage.put_file("incoming/r1/abc", source, "text/plain")
+    assert not source.exists()
+    assert storage.download_url("incoming/r1/abc") is None
+
+    copy = tmp_path / "copy.txt"
+    await storage.fetch("incoming/r1/abc", copy, max_bytes=100)
+    assert copy.read_bytes() == b"hello"
+    with pytest.raises(HTTPException) as exc:
+        await storage.fetch("incoming/r1/abc", copy, max_bytes=2)
+    assert exc.value.status_code == 413
+
+    await storage.delete("incoming/r1/abc")
+    with pytest.raises(HTTPException) as exc:
+        await storage.fetch("incoming/r1/abc", copy, max_bytes=100)
+    assert exc.value.status_code == 404
+
+    with pytest.raises(HTTPException):
+        storage.path("../outside")
+
+def test_storage_backends_must_implement_every_operation(tmp_path):
+    with pytest.raises(TypeError):
+        Storage()
+    # Local storage has no direct uploads; clients use POST /image instead
+    with pytest.raises(HTTPException) as exc:
+        LocalStorage(str(tmp_path)).presigned_upload("incoming/r1/abc", "image/png", 100)
+    assert exc.value.status_code == 400
+    assert not LocalStorage.supports_direct_upload
+
+@pytest.mark.asyncio
+async def test_process_stored_renders_into_storage_and_removes_original(tmp_path):
+    storage = LocalStorage(str(tmp_path / "store"))
+    original = tmp_path / "photo.png"
+    Image.new("RGB", (400, 200), (10, 200, 30)).save(original)
+    await storage.put_file("incoming/r1/abc", original, "image/png")
+
+    processor = ImageProcessor(str(tmp_path / "work"), max_bytes=1_000_000, workers=1, max_pixels=1_000_000, storage=storage)
+    try:
+        variants = await processor.process_stored("incoming/r1/abc")
+    finally:
+        processor.shutdown()
+
+    assert {v["width"] for v in variants} == {320, 400}
+    for variant in variants:
+        assert (tmp_path / "store" / variant["url"].rsplit("/", 1)[-1]).is_file()
+    assert not (tmp_path / "store" / "incoming" / "r1" / "abc").exists()
+    # Temp files and render dirs are cleaned up
+    assert list((tmp_path / "work").iterdir()) == []
+
+def test_redirects_cache_only_hashed_variants():
+    hashed = redirect_upload("https://cdn.example/x", "0123456789abcdef-card.webp", 3540)
+    assert hashed.status_code == 307
+    assert hashed.headers["location"] == "https://cdn.example/x"
+    assert hashed.headers["cache-control"] == "private, max-age=3540"
+
+    legacy = redirect_upload("https://cdn.example/y", "recipe-1.jpg", 3540)
+    assert legacy.headers["cache-control"] == "no-cache"
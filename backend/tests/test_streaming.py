@@ -0,0 +1,35 @@
+import sys
+import os
+import json
+
+# Add backend to sys.path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from backend.streaming import IncrementalJSONParser
+
+def feed_in_chunks(text, size):
+    parser = IncrementalJSONParser()
+    events = []
+    for i in range(0, len(text), size):
+        events.extend(parser.feed(text[i:i + size]))
+    return parser, events
+
+def test_fields_are_emitted_as_they_complete():
+    recipe = {"title": "Soup, \"hot\" {spicy}", "ingredients": [{"name": "leek"}], "servings": 4}
+    parser, events = feed_in_chunks(json.dumps(recipe), 3)
+
+    fields = [(key, value) for kind, key, value in events if kind == "field"]
+    assert fields == list(recipe.items())
+    assert events[-1] == ("done", recipe, None)
+    assert parser.done and parser.result == recipe
+
+def test_leading_markdown_and_trailing_text_are_ignored():
+    text = "Here you go:\n```json\n{\"title\": \"Tea\"}\n```\nEnjoy!"
+    parser, events = feed_in_chunks(text, 5)
+    assert parser.result == {"title": "Tea"}
+    assert [kind for kind, _, _ in events] == ["field", "done"]
+
+def test_incomplete_object_is_not_done():
+    parser, events = feed_in_chunks('{"title": "Tea", "servings": ', 4)
+    assert not parser.done
+    assert events == [("field", "title", "Tea")]
@@ -0,0 +1,71 @@
+import sys
+import os
+import pytest
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.testclient import TestClient
+
+# Add backend to sys.path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from backend.uploads import parse_range, serve_upload, IMMUTABLE, REVALIDATE
+
+HASHED = "0123456789abcdef-card.webp"
+
+@pytest.fixture
+def client(tmp_path):
+    (tmp_path / HASHED).write_bytes(bytes(range(256)) * 4)
+    (tmp_path / "recipe-1.jpg").write_bytes(b"legacy")
+
+    app = FastAPI()
+
+    @app.api_route("/uploads/{filename}", methods=["GET", "HEAD"])
+    async def get_upload(filename: str, request: Request):
+        return serve_upload(request, str(tmp_path), filename)
+
+    return TestClient(app)
+
+def test_parse_range():
+    assert parse_range("bytes=0-99", 1000) == (0, 99)
+    assert parse_range("bytes=900-", 1000) == (900, 999)
+    assert parse_range("bytes=-100", 1000) == (900, 999)
+    assert parse_range("bytes=990-2000", 1000) == (990, 999)
+    # Multiple ranges and other units fall back to the full file
+    assert parse_range("bytes=0-1,5-6", 1000) is None
+    assert parse_range("items=0-1", 1000) is None
+    with pytest.raises(HTTPException) as exc:
+        parse_range("bytes=1000-", 1000)
+    assert exc.value.status_code == 416
+
+def test_hashed_uploads_are_immutable_and_revalidate(client):
+    response = client.get(f"/uploads/{HASHED}")
+    assert response.status_code == 200
+    assert response.headers["cache-control"] == IMMUTABLE
+    assert response.headers["content-type"] == "image/webp"
+    etag = response.headers["etag"]
+
+    cached = client.get(f"/uploads/{HASHED}", headers={"If-None-Match": f"W/{etag}"})
+    assert cached.status_code == 304
+    assert cached.content == b""
+
+    legacy = client.get("/uploads/recipe-1.jpg")
+    assert legacy.headers["cache-control"] == REVALIDATE
+    assert client.get("/uploads/recipe-1.jpg", headers={"If-None-Match": legacy.headers["etag"]}).status_code == 304
+
+def test_range_requests(client):
+    response = client.get(f"/uploads/{HASHED}", headers={"Range": "bytes=10-19"})
+    assert response.status_code == 206
+    assert response.headers["content-range"] == "bytes 10-19/1024"
+    assert response.content == bytes(range(10, 20))
+
+    # A stale If-Range gets the whole (current) file instead
+    stale = client.get(f"/uploads/{HASHED}", headers={"Range": "bytes=10-19", "If-Range": '"old"'})
+    assert stale.status_code == 200
+    assert len(stale.content) == 1024
+
+    unsatisfiable = client.get(f"/uploads/{HASHED}", headers={"Range": "bytes=5000-"})
+    assert unsatisfiable.status_code == 416
+    assert unsatisfiable.headers["content-range"] == "bytes */1024"
+
+def test_missing_and_escaping_paths_are_404(client):
+    assert client.get("/uploads/nope.webp").status_code == 404
+    assert client.get("/uploads/..%2Fsecret").status_code == 404
@@ -0,0 +1,101 @@
+import sys
+import os
+import pytest
+from datetime import date
+
+# Add backend to sys.path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+import user_stats
+from backend.user_stats import is_plain_id, streaks, summarize, week_key
+
+def test_streaks():
+    days = {"2024-03-01": 1, "2024-03-02": 2, "2024-03-03": 1, "2024-03-10": 1, "2024-03-11": 1}
+    assert streaks(days, date(2024, 3, 11)) == (2, 3)
+    # Yesterday's cook keeps the streak alive, older ones don't
+    assert streaks(days, date(2024, 3, 12)) == (2, 3)
+    assert streaks(days, date(2024, 3, 13)) == (0, 3)
+    assert streaks({}, date(2024, 3, 13)) == (0, 0)
+
+def test_summarize_shapes_counters():
+    stats = {
+        "total_cooked": 5,
+        "feedback": {"yes": 2, "no": 1, "meh": 0},
+        "recipes": {"a": 1, "b": 3, "c": 0},
+        "days": {"2024-03-10": 2, "2024-03-11": 3},
+        "weeks": {week_key(date(2024, 3, 10)): 2, week_key(date(2024, 3, 11)): 3}
+    }
+    summary = summarize(stats, date(2024, 3, 11))
+
+    assert summary["total_cooked"] == 5
+    assert summary["would_cook_again"] == 2
+    assert summary["would_not_cook_again"] == 1
+    assert summary["meh"] == 0
+    assert summary["current_streak"] == 2
+    assert summary["most_cooked"] == [{"recipe_id": "b", "count": 3}, {"recipe_id": "a", "count": 1}]
+    assert len(summary["weekly"]) == 12
+    assert summary["weekly"][-1] == {"week": "2024-W11", "count": 3}
+    assert summary["weekly"][-2] == {"week": "2024-W10", "count": 2}
+
+def test_only_plain_ids_become_counter_fields():
+    assert is_plain_id("7c9e6679-7425-40de-944b-e07fc1f0d479")
+    assert not is_plain_id("a.b")
+    assert not is_plain_id("$where")
+    assert not is_plain_id("7C9E6679-7425-40DE-944B-E07FC1F0D479")
+    assert not is_plain_id(None)
+
+class FakeCursor:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def __aiter__(self):
+        return self._rows()
+
+    async def _rows(self):
+        for row in self.rows:
+            yield row
+
+class FakeFeedback:
+    """Just enough of a Motor collection for recipe_feedback"""
+
+    def __init__(self):
+        self.docs = {}
+
+    async def update_one(self, query, update, upsert=False):
+        key = (query["user_id"], query["recipe_id"])
+        self.docs[key] = {**query, **update["$set"]}
+
+    def aggregate(self, pipeline):
+        user_id = pipeline[0]["$match"]["user_id"]
+        counts = {}
+        for doc in self.docs.values():
+            if doc["user_id"] == user_id:
+                counts[doc["feedback"]] = counts.get(doc["feedback"], 0) + 1
+        return FakeCursor([{"_id": kind, "count": count} for kind, count in counts.items()])
+
+class FakeSummaries:
+    def __init__(self, doc):
+        self.doc = doc
+
+    async def find_one(self, query, projection=None):
+        return dict(self.doc)
+
+class FakeDb:
+    def __init__(self, summary):
+        self.recipe_feedback = FakeFeedback()
+        self.user_stats = FakeSummaries(summary)
+
+@pytest.mark.asyncio
+async def test_feedback_is_counted_from_the_feedback_itself(monkeypatch):
+    # A counter stored while the baseline was pending may have missed some
+    db = FakeDb({"user_id": "u1", "total_cooked": 3, "feedback": {"yes": 0, "no": 0, "meh": 0}})
+    monkeypatch.setattr(user_stats, "db", db)
+
+    await user_stats.record_feedback("u1", "r1", "yes")
+    await user_stats.record_feedback("u1", "r2", "no")
+    await user_stats.record_feedback("u1", "r2", "yes")
+    await user_stats.record_feedback("u2", "r1", "meh")
+
+    stats = await user_stats.get_user_stats("u1")
+    assert stats["total_cooked"] == 3
+    assert stats["feedback"] == {"yes": 2, "no": 0, "meh": 0}
@@ -0,0 +1,171 @@
+import mimetypes
+import os
+import re
+from datetime import datetime, timezone
+from email.utils import formatdate, parsedate_to_datetime
+from pathlib import Path
+from typing import Optional, Tuple
+
+import aiofiles
+from fastapi import HTTPException, Request, Response
+from fastapi.responses import FileResponse, RedirectResponse, StreamingResponse
+
+from data_access import etag_matches
+from images import is_processed_name
+from storage import Storage
+
+CHUNK_SIZE = 64 * 1024
+
+# Processed images are named by content hash, so a URL never changes meaning
+IMMUTABLE = "public, max-age=31536000, immutable"
+# Older uploads were named after the recipe and overwritten on re-upload
+REVALIDATE = "public, no-cache"
+
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def resolve_upload(upload_dir: str, filename: str) -> Tuple[Path, os.stat_result]:
+    """Path and stat of a file inside upload_dir; 404 for anything else"""
+    root = Path(upload_dir).resolve()
+    try:
+        path = (root / filename).resolve()
+        if not path.is_relative_to(root):
+            raise HTTPException(status_code=404, detail="File not found")
+        stat_result = path.stat()
+    except (OSError, ValueError):
+        raise HTTPException(status_code=404, detail="File not found")
+    if not path.is_file():
+        raise HTTPException(status_code=404, detail="File not found")
+    return path, stat_result
+
+
+def file_etag(filename: str, stat_result: os.stat_result) -> str:
+    """Strong ETag: the content hash for processed images, else mtime and size"""
+    if is_processed_name(filename):
+        return f'"{filename.replace(".", "-")}"'
+    return f'"{stat_result.st_mtime_ns:x}-{stat_result.st_size:x}"'
+
+
+def not_modified(request: Request, etag: str, stat_result: os.stat_result) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return etag_matches(if_none_match, etag)
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        modified = datetime.fromtimestamp(int(stat_result.st_mtime), tz=timezone.utc)
+        return modified <= since
+    return False
+
+
+def parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """Inclusive (start, end) of a single byte range.
+
+    Returns None for headers we don't handle (multiple ranges, other
+    units), which means sending the whole file. Raises 416 when the range
+    lies outside the file.
+    """
+    match = RANGE_RE.match(header.strip())
+    if not match or match.group(1) == match.group(2) == "":
+        return None
+
+    first, last = match.groups()
+    if first == "":
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            raise range_not_satisfiable(size)
+        return max(size - length, 0), size - 1
+
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise range_not_satisfiable(size)
+    return start, end
+
+
+def range_not_satisfiable(size: int) -> HTTPException:
+    return HTTPException(
+        status_code=416,
+        detail="Requested range not satisfiable",
+        headers={"Content-Range": f"bytes */{size}"}
+    )
+
+
+async def read_range(path: Path, start: int, end: int):
+    async with aiofiles.open(path, "rb") as f:
+        await f.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = await f.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+def serve_upload(request: Request, upload_dir: str, filename: str) -> Response:
+    """Serve an uploaded file with validators, conditional GET and byte ranges.
+
+    Full responses go through FileResponse, which hands the path to the
+    server (sendfile) when it supports the pathsend extension.
+    """
+    path, stat_result = resolve_upload(upload_dir, filename)
+    etag = file_etag(filename, stat_result)
+    headers = {
+        "ETag": etag,
+        "Last-Modified": formatdate(stat_result.st_mtime, usegmt=True),
+        "Cache-Control": IMMUTABLE if is_processed_name(filename) else REVALIDATE,
+        "Accept-Ranges": "bytes"
+    }
+
+    if not_modified(request, etag, stat_result):
+        return Response(status_code=304, headers=headers)
+
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    # A range is only valid against the version the client already has
+    if range_header and request.method == "GET" and (if_range is None or if_range.strip() in (etag, headers["Last-Modified"])):
+        byte_range = parse_range(range_header, stat_result.st_size)
+        if byte_range is not None:
+            start, end = byte_range
+            return StreamingResponse(
+                read_range(path, start, end),
+                status_code=206,
+                media_type=mimetypes.guess_type(filename)[0] or "application/octet-stream",
+                headers={
+                    **headers,
+                    "Content-Range": f"bytes {start}-{end}/{stat_result.st_size}",
+                    "Content-Length": str(end - start + 1)
+                }
+            )
+
+    return FileResponse(path, headers=headers, stat_result=stat_result)
+
+
+def redirect_upload(url: str, filename: str, max_age: int) -> Response:
+    """Send the client to the file in object storage.
+
+    Hashed variants never change, so the redirect itself can be cached for
+    as long as the target URL stays valid.
+    """
+    cache_control = f"private, max-age={max_age}" if is_processed_name(filename) and max_age else "no-cache"
+    return RedirectResponse(url, status_code=307, headers={"Cache-Control": cache_control})
+
+
+def get_stored_upload(request: Request, storage: Storage, upload_dir: str, filename: str) -> Response:
+    """Redirect to storage when it serves the file, otherwise serve it from disk.
+
+    Only hashed variants are put in storage; files from before image
+    processing (named after the recipe) stay in upload_dir.
+    """
+    url = storage.download_url(filename) if is_processed_name(filename) else None
+    if url is None:
+        return serve_upload(request, upload_dir, filename)
+    return redirect_upload(url, filename, storage.redirect_max_age)
@@ -0,0 +1,209 @@
+import logging
+import uuid
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, Optional
+
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from dependencies import db
+
+logger = logging.getLogger(__name__)
+
+FEEDBACK_KINDS = ("yes", "no", "meh")
+
+# How much history the stats endpoint reports
+WEEKS_SHOWN = 12
+TOP_RECIPES_SHOWN = 10
+
+
+def week_key(day: date) -> str:
+    year, week, _ = day.isocalendar()
+    return f"{year}-W{week:02d}"
+
+
+def _day(completed_at) -> date:
+    if isinstance(completed_at, datetime):
+        return completed_at.date()
+    return date.fromisoformat(str(completed_at)[:10])
+
+
+def is_plain_id(recipe_id) -> bool:
+    """Recipe ids are used as field names in the summary, so only plain
+    UUIDs are counted (no dots or dollar signs)
+    """
+    try:
+        return str(uuid.UUID(recipe_id)) == recipe_id
+    except (TypeError, ValueError, AttributeError):
+        return False
+
+
+def _counters(day: date, recipe_id: Optional[str]) -> dict:
+    inc = {f"days.{day.isoformat()}": 1, f"weeks.{week_key(day)}": 1}
+    if is_plain_id(recipe_id):
+        inc[f"recipes.{recipe_id}"] = 1
+    return inc
+
+
+async def record_cook(user_id: str, recipe_id: str, completed_at: str) -> None:
+    """Count a completed cook session in the user's summary.
+
+    The summary is created if needed. Its "since" is when counting here
+    started: sessions completed before then are left to the baseline that
+    get_user_stats adds from cook_sessions.
+    """
+    try:
+        await db.user_stats.update_one(
+            # Summaries from before "since" existed count every cook
+            {"user_id": user_id, "since": {"$not": {"$gt": completed_at}}},
+            {
+                "$inc": {"total_cooked": 1, **_counters(_day(completed_at), recipe_id)},
+                "$setOnInsert": {"since": completed_at, "pending": True}
+            },
+            upsert=True
+        )
+    except DuplicateKeyError:
+        # The summary started counting after this session, so the baseline has it
+        pass
+
+
+async def record_feedback(user_id: str, recipe_id: str, feedback: str) -> None:
+    """Store a user's feedback on a recipe.
+
+    Feedback replaces earlier feedback on the same recipe, so there is no
+    "since" to split it at like cooks; get_user_stats counts it on read.
+    """
+    await db.recipe_feedback.update_one(
+        {"user_id": user_id, "recipe_id": recipe_id},
+        {"$set": {
+            "feedback": feedback,
+            "updated_at": datetime.now(timezone.utc).isoformat()
+        }},
+        upsert=True
+    )
+
+
+async def count_feedback(user_id: str) -> Dict[str, int]:
+    """The user's current feedback by kind, from the (user_id, feedback) index"""
+    feedback = {kind: 0 for kind in FEEDBACK_KINDS}
+    async for row in db.recipe_feedback.aggregate([
+        {"$match": {"user_id": user_id}},
+        {"$group": {"_id": "$feedback", "count": {"$sum": 1}}}
+    ]):
+        if row["_id"] in feedback:
+            feedback[row["_id"]] = row["count"]
+    return feedback
+
+
+async def build_user_stats(user_id: str, before: Optional[str] = None) -> dict:
+    """Compute a user's cook counters from cook_sessions, counting only
+    sessions completed before `before` if given
+    """
+    completed = {"$ne": None, "$lt": before} if before else {"$ne": None}
+    facets = await db.cook_sessions.aggregate([
+        {"$match": {"user_id": user_id, "completed_at": completed}},
+        {"$facet": {
+            "total": [{"$count": "count"}],
+            "recipes": [{"$group": {"_id": "$recipe_id", "count": {"$sum": 1}}}],
+            "days": [{"$group": {"_id": {"$substrBytes": ["$completed_at", 0, 10]}, "count": {"$sum": 1}}}]
+        }}
+    ]).to_list(1)
+    facets = facets[0] if facets else {"total": [], "recipes": [], "days": []}
+
+    weeks: Dict[str, int] = {}
+    days = {row["_id"]: row["count"] for row in facets["days"] if row["_id"]}
+    for day, count in days.items():
+        key = week_key(date.fromisoformat(day))
+        weeks[key] = weeks.get(key, 0) + count
+
+    return {
+        "user_id": user_id,
+        "total_cooked": facets["total"][0]["count"] if facets["total"] else 0,
+        "recipes": {row["_id"]: row["count"] for row in facets["recipes"] if is_plain_id(row["_id"])},
+        "days": days,
+        "weeks": weeks
+    }
+
+
+async def get_user_stats(user_id: str) -> dict:
+    """The user's summary document, built on first use for existing users,
+    with their current feedback counts.
+
+    Counting starts before the history is read: cooks from "since" on are
+    added by record_cook, and the baseline adds the ones before it, so a
+    cook completed while the baseline is built is counted exactly once.
+    """
+    stats = await db.user_stats.find_one({"user_id": user_id}, {"_id": 0})
+    if stats is None or stats.get("pending"):
+        stats = await _build_summary(user_id)
+    # Counted fresh: a stored counter could miss feedback given while the
+    # baseline was being built
+    stats["feedback"] = await count_feedback(user_id)
+    return stats
+
+
+async def _build_summary(user_id: str) -> dict:
+
+    stats = await db.user_stats.find_one_and_update(
+        {"user_id": user_id},
+        {"$setOnInsert": {"since": datetime.now(timezone.utc).isoformat(), "pending": True}},
+        projection={"_id": 0, "since": 1},
+        upsert=True,
+        return_document=ReturnDocument.AFTER
+    )
+    baseline = await build_user_stats(user_id, before=stats["since"])
+    inc = {"total_cooked": baseline["total_cooked"]}
+    inc.update({f"recipes.{recipe_id}": count for recipe_id, count in baseline["recipes"].items()})
+    inc.update({f"days.{day}": count for day, count in baseline["days"].items()})
+    inc.update({f"weeks.{week}": count for week, count in baseline["weeks"].items()})
+    # Only the first of concurrent builders applies its baseline
+    await db.user_stats.update_one(
+        {"user_id": user_id, "pending": True},
+        {"$inc": inc, "$unset": {"pending": ""}}
+    )
+    logger.info(f"Built cooking stats for user {user_id}")
+    return await db.user_stats.find_one({"user_id": user_id}, {"_id": 0})
+
+
+def streaks(days: Dict[str, int], today: date) -> tuple:
+    """(current, longest) runs of consecutive days with a cook.
+
+    The current streak still counts if the last cook was yesterday.
+    """
+    cooked = sorted(date.fromisoformat(d) for d, count in days.items() if count > 0)
+    longest = run = 0
+    previous: Optional[date] = None
+    for day in cooked:
+        run = run + 1 if previous and day - previous == timedelta(days=1) else 1
+        longest = max(longest, run)
+        previous = day
+
+    current = run if previous and today - previous <= timedelta(days=1) else 0
+    return current, longest
+
+
+def summarize(stats: dict, today: date) -> dict:
+    """Shape a summary document for the stats endpoint"""
+    feedback = stats.get("feedback") or {}
+    weeks = stats.get("weeks") or {}
+    current_streak, longest_streak = streaks(stats.get("days") or {}, today)
+    recipes = sorted((stats.get("recipes") or {}).items(), key=lambda r: r[1], reverse=True)
+
+    weekly = []
+    for offset in range(WEEKS_SHOWN - 1, -1, -1):
+        key = week_key(today - timedelta(weeks=offset))
+        weekly.append({"week": key, "count": weeks.get(key, 0)})
+
+    return {
+        "total_cooked": stats.get("total_cooked", 0),
+        "would_cook_again": feedback.get("yes", 0),
+        "would_not_cook_again": feedback.get("no", 0),
+        "meh": feedback.get("meh", 0),
+        "current_streak": current_streak,
+        "longest_streak": longest_streak,
+        "most_cooked": [
+            {"recipe_id": recipe_id, "count": count}
+            for recipe_id, count in recipes[:TOP_RECIPES_SHOWN] if count > 0
+        ],
+        "weekly": weekly
+    }
@@ -1,4 +1,8 @@
 const CACHE_NAME = 'mise-v2';
+const IMAGE_CACHE = 'mise-images-v1';
+const MAX_CACHED_IMAGES = 300;
+// Processed recipe photos are named by content hash and never change
+const HASHED_IMAGE = /\/api\/uploads\/[0-9a-f]{16}-(thumb|card|full)\.(webp|avif)$/;
 const STATIC_ASSETS = [
   '/',
   '/index.html',
@@ -22,7 +26,7 @@ self.addEventListener('activate', (event) => {
     caches.keys().then((cacheNames) => {
       return Promise.all(
         cacheNames
-          .filter((name) => name !== CACHE_NAME)
+          .filter((name) => name !== CACHE_NAME && name !== IMAGE_CACHE)
           .map((name) => caches.delete(name))
       );
     })
@@ -35,6 +39,12 @@ self.addEventListener('fetch', (event) => {
   // Skip non-GET requests
   if (event.request.method !== 'GET') return;
 
+  // Recipe photos - cache first
+  if (HASHED_IMAGE.test(new URL(event.request.url).pathname)) {
+    event.respondWith(cachedImage(event.request));
+    return;
+  }
+
   // Skip API requests - always go to network
   if (event.request.url.includes('/api/')) {
     return;
@@ -186,3 +196,20 @@ async function checkMealReminders() {
   // This would be called periodically to check for upcoming meals
   console.log('Mise: Checking meal reminders...');
 }
+
+async function cachedImage(request) {
+  const cache = await caches.open(IMAGE_CACHE);
+  const cached = await cache.match(request);
+  if (cached) {
+    return cached;
+  }
+
+  const response = await fetch(request);
+  if (response.status === 200) {
+    await cache.put(request, response.clone());
+    // Drop the oldest entries so the cache doesn't grow without bound
+    const keys = await cache.keys();
+    await Promise.all(keys.slice(0, Math.max(keys.length - MAX_CACHED_IMAGES, 0)).map((key) => cache.delete(key)));
+  }
+  return response;
+}
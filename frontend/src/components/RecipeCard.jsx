@@ -1,9 +1,12 @@
 import React from 'react';
 import { Link } from 'react-router-dom';
 import { Clock, Users, Heart } from 'lucide-react';
-import { getImageUrl, formatTime } from '../lib/utils';
+import { getImageUrl, getImageSrcSet, formatTime } from '../lib/utils';
 import { Badge } from './ui/badge';
 
+// Matches the recipe grid: 1 column on phones up to 4 on wide screens
+const CARD_SIZES = '(min-width: 1280px) 25vw, (min-width: 1024px) 33vw, (min-width: 640px) 50vw, 100vw';
+
 export const RecipeCard = ({ recipe }) => {
   const totalTime = (recipe.prep_time || 0) + (recipe.cook_time || 0);
 
@@ -16,11 +19,19 @@ export const RecipeCard = ({ recipe }) => {
       <article className="bg-white rounded-2xl border border-border/60 overflow-hidden shadow-soft hover:shadow-hover transition-all duration-300 hover:-translate-y-1">
         {/* Image */}
         <div className="relative aspect-[4/3] overflow-hidden">
-          <img
-            src={getImageUrl(recipe.image_url)}
-            alt={recipe.title}
-            className="w-full h-full object-cover transition-transform duration-500 group-hover:scale-105"
-          />
+          <picture>
+            {getImageSrcSet(recipe.image_variants, 'avif') && (
+              <source type="image/avif" srcSet={getImageSrcSet(recipe.image_variants, 'avif')} sizes={CARD_SIZES} />
+            )}
+            <img
+              src={getImageUrl(recipe.image_url)}
+              srcSet={getImageSrcSet(recipe.image_variants, 'webp')}
+              sizes={CARD_SIZES}
+              alt={recipe.title}
+              loading="lazy"
+              className="w-full h-full object-cover transition-transform duration-500 group-hover:scale-105"
+            />
+          </picture>
           <div className="absolute inset-0 bg-gradient-to-t from-black/40 via-transparent to-transparent" />
           
           {/* Category Badge */}
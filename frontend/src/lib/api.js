@@ -78,6 +78,91 @@ api.interceptors.response.use(
   }
 );
 
+// Server features don't change while the app runs, so /config is fetched once
+let serverFeatures = null;
+const getServerFeatures = () => {
+  if (!serverFeatures) {
+    serverFeatures = api.get('/config')
+      .then((res) => res.data?.features || {})
+      .catch((error) => {
+        serverFeatures = null;
+        throw error;
+      });
+  }
+  return serverFeatures;
+};
+
+const requestError = (status, data) => {
+  const error = new Error(data?.detail || `Request failed with status ${status}`);
+  error.response = { status, data };
+  return error;
+};
+
+// POST to an NDJSON endpoint, calling onEvent for each event as it arrives.
+// Resolves with the data of the final result event; an error event rejects
+// like a failed axios request (error.response.data.detail).
+// Uses fetch because axios can't read a response body incrementally.
+const streamEvents = async (path, body, onEvent = () => {}) => {
+  if (!isServerConfigured()) {
+    throw new Error('Server not configured. Please configure your server URL.');
+  }
+
+  const headers = { 'Content-Type': 'application/json' };
+  const token = localStorage.getItem('token');
+  if (token) {
+    headers.Authorization = `Bearer ${token}`;
+  }
+
+  const response = await fetch(`${getServerUrl()}/api${path}`, {
+    method: 'POST',
+    headers,
+    body: JSON.stringify(body),
+  });
+  if (!response.ok) {
+    if (response.status === 401) {
+      localStorage.removeItem('token');
+      localStorage.removeItem('user');
+      window.location.href = '/login';
+    }
+    throw requestError(response.status, await response.json().catch(() => null));
+  }
+
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = '';
+  let result;
+  const handle = (line) => {
+    if (!line.trim()) return;
+    const event = JSON.parse(line);
+    if (event.type === 'error') {
+      throw requestError(event.status || 500, event);
+    }
+    if (event.type === 'result') {
+      result = event.data;
+    }
+    onEvent(event);
+  };
+
+  for (;;) {
+    const { done, value } = await reader.read();
+    buffer += decoder.decode(value, { stream: !done });
+    const lines = buffer.split('\n');
+    buffer = lines.pop();
+    try {
+      lines.forEach(handle);
+    } catch (error) {
+      reader.cancel();
+      throw error;
+    }
+    if (done) break;
+  }
+  handle(buffer);
+  return result;
+};
+
+// Makes an update conditional on the version the client last saw
+const ifMatch = (etag) => (etag ? { headers: { 'If-Match': etag } } : undefined);
+
 // Auth
 export const authApi = {
   register: (data) => api.post('/auth/register', data),
@@ -104,9 +189,21 @@ export const recipeApi = {
   getAll: (params) => api.get('/recipes', { params }),
   getOne: (id) => api.get(`/recipes/${id}`),
   create: (data) => api.post('/recipes', data),
-  update: (id, data) => api.put(`/recipes/${id}`, data),
+  // etag from getOne: the server answers 412 if someone saved in between
+  update: (id, data, etag) => api.put(`/recipes/${id}`, data, ifMatch(etag)),
   delete: (id) => api.delete(`/recipes/${id}`),
-  uploadImage: (id, file) => {
+  uploadImage: async (id, file) => {
+    // Straight to object storage when the server offers it (S3 storage)
+    const { direct_uploads: directUploads } = await getServerFeatures();
+    if (directUploads) {
+      const target = (await api.post(`/recipes/${id}/image/upload-url`, { content_type: file.type })).data;
+      const form = new FormData();
+      Object.entries(target.fields).forEach(([key, value]) => form.append(key, value));
+      form.append('file', file);
+      await axios.post(target.url, form);
+      return api.post(`/recipes/${id}/image/complete`, { upload_id: target.upload_id });
+    }
+
     const formData = new FormData();
     formData.append('file', file);
     return api.post(`/recipes/${id}/image`, formData, {
@@ -125,10 +222,11 @@ export const favoritesApi = {
 
 // AI
 export const aiApi = {
-  importUrl: (url) => api.post('/ai/import-url', { url }),
-  importText: (text) => api.post('/ai/import-text', { text }),
-  fridgeSearch: (ingredients, searchOnline = false) =>
-    api.post('/ai/fridge-search', { ingredients, search_online: searchOnline }),
+  // Streamed: onEvent sees each field of the recipe as the model writes it
+  importUrl: (url, onEvent) => streamEvents('/ai/import-url/stream', { url }, onEvent),
+  importText: (text, onEvent) => streamEvents('/ai/import-text/stream', { text }, onEvent),
+  fridgeSearch: (ingredients, searchOnline = false, onEvent) =>
+    streamEvents('/ai/fridge-search/stream', { ingredients, search_online: searchOnline }, onEvent),
   autoMealPlan: (days = 7, preferences = '', excludeRecipes = []) =>
     api.post('/ai/auto-meal-plan', { days, preferences, exclude_recipes: excludeRecipes }),
 };
@@ -145,7 +243,7 @@ export const shoppingListApi = {
   getAll: () => api.get('/shopping-lists'),
   getOne: (id) => api.get(`/shopping-lists/${id}`),
   create: (data) => api.post('/shopping-lists', data),
-  update: (id, data) => api.put(`/shopping-lists/${id}`, data),
+  update: (id, data, etag) => api.put(`/shopping-lists/${id}`, data, ifMatch(etag)),
   delete: (id) => api.delete(`/shopping-lists/${id}`),
   fromRecipes: (recipeIds) => api.post('/shopping-lists/from-recipes', recipeIds),
 };
@@ -30,6 +30,16 @@ export function getImageUrl(url) {
   return `${serverUrl}${url}`;
 }
 
+// srcset for one format of a recipe's resized image variants, or undefined
+export function getImageSrcSet(variants, format = 'webp') {
+  const matching = (variants || []).filter((v) => v.format === format);
+  if (matching.length === 0) return undefined;
+  return matching
+    .sort((a, b) => a.width - b.width)
+    .map((v) => `${getImageUrl(v.url)} ${v.width}w`)
+    .join(', ');
+}
+
 export const MEAL_TYPES = ['Breakfast', 'Lunch', 'Dinner', 'Snack'];
 
 export const CATEGORIES = [
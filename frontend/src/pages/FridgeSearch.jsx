@@ -33,6 +33,7 @@ export const FridgeSearch = () => {
   const [loading, setLoading] = useState(false);
   const [searchOnline, setSearchOnline] = useState(false);
   const [results, setResults] = useState(null);
+  const [suggesting, setSuggesting] = useState(false);
 
   const addIngredient = (ingredient) => {
     const trimmed = ingredient.trim();
@@ -56,16 +57,31 @@ export const FridgeSearch = () => {
     setResults(null);
     
     try {
-      const res = await aiApi.fridgeSearch(ingredients, searchOnline);
-      setResults(res.data);
+      // Local matches arrive first; the AI suggestion fills in as it's written
+      const data = await aiApi.fridgeSearch(ingredients, searchOnline, (event) => {
+        if (event.type === 'matches') {
+          setResults(event.data);
+          setLoading(false);
+          setSuggesting(true);
+        } else if (event.type === 'field') {
+          setResults((current) => ({
+            ...current,
+            ai_recipe_suggestion: event.key === 'ai_suggestion'
+              ? event.value
+              : { ...current?.ai_recipe_suggestion, [event.key]: event.value },
+          }));
+        }
+      });
+      setResults(data);
       
-      if (res.data.matching_recipes.length === 0 && !res.data.ai_recipe_suggestion) {
+      if (data.matching_recipes.length === 0 && !data.ai_recipe_suggestion) {
         toast.info('No exact matches found. Try adding more ingredients or enable online search.');
       }
     } catch (error) {
-      toast.error('Failed to search recipes');
+      toast.error(error.response?.data?.detail || 'Failed to search recipes');
     } finally {
       setLoading(false);
+      setSuggesting(false);
     }
   };
 
@@ -174,7 +190,7 @@ export const FridgeSearch = () => {
           <Button 
             onClick={handleSearch}
             className="w-full mt-6 rounded-full bg-sage hover:bg-sage-dark h-12"
-            disabled={loading || ingredients.length === 0}
+            disabled={loading || suggesting || ingredients.length === 0}
             data-testid="search-recipes-btn"
           >
             {loading ? (
@@ -240,6 +256,12 @@ export const FridgeSearch = () => {
             )}
 
             {/* AI Suggestion */}
+            {suggesting && !results.ai_recipe_suggestion && (
+              <div className="flex items-center gap-2 text-sm text-muted-foreground">
+                <Loader2 className="w-4 h-4 animate-spin" />
+                Asking AI for a new recipe...
+              </div>
+            )}
             {results.ai_recipe_suggestion && (
               <div className="bg-terracotta-light rounded-2xl border border-terracotta/20 p-6">
                 <div className="flex items-center gap-2 mb-4">
@@ -272,7 +294,7 @@ export const FridgeSearch = () => {
             {/* No Results */}
             {results.matching_recipes.length === 0 && 
              (!results.suggestions || results.suggestions.length === 0) && 
-             !results.ai_recipe_suggestion && (
+             !results.ai_recipe_suggestion && !suggesting && (
               <div className="bg-white rounded-2xl border border-border/60 p-8 text-center">
                 <ChefHat className="w-12 h-12 text-muted-foreground mx-auto mb-4" />
                 <h3 className="font-heading text-lg font-semibold mb-2">No matching recipes</h3>
@@ -32,11 +32,18 @@ export const ImportRecipe = () => {
     }
 
     setLoading(true);
+    setExtractedRecipe(null);
     try {
-      const res = await aiApi.importUrl(url);
-      setExtractedRecipe(res.data);
+      // Show each field as soon as the model has written it
+      const recipe = await aiApi.importUrl(url, (event) => {
+        if (event.type === 'field') {
+          setExtractedRecipe((current) => ({ ...current, [event.key]: event.value }));
+        }
+      });
+      setExtractedRecipe(recipe);
       toast.success('Recipe extracted successfully!');
     } catch (error) {
+      setExtractedRecipe(null);
       toast.error(error.response?.data?.detail || 'Failed to extract recipe');
     } finally {
       setLoading(false);
@@ -142,16 +149,23 @@ export const ImportRecipe = () => {
             >
               <div className="flex items-center justify-between mb-4">
                 <h2 className="font-heading text-lg font-semibold">Extracted Recipe</h2>
-                <div className="flex items-center gap-2 text-sm text-sage">
-                  <Check className="w-4 h-4" />
-                  Ready to save
-                </div>
+                {loading ? (
+                  <div className="flex items-center gap-2 text-sm text-muted-foreground">
+                    <Loader2 className="w-4 h-4 animate-spin" />
+                    Extracting...
+                  </div>
+                ) : (
+                  <div className="flex items-center gap-2 text-sm text-sage">
+                    <Check className="w-4 h-4" />
+                    Ready to save
+                  </div>
+                )}
               </div>
 
               <div className="space-y-4">
                 <div>
                   <p className="text-xs text-muted-foreground uppercase tracking-wide">Title</p>
-                  <p className="font-medium text-lg">{extractedRecipe.title}</p>
+                  <p className="font-medium text-lg">{extractedRecipe.title || '...'}</p>
                 </div>
 
                 {extractedRecipe.description && (
@@ -216,7 +230,7 @@ export const ImportRecipe = () => {
                 <Button
                   onClick={handleSave}
                   className="rounded-full bg-sage hover:bg-sage-dark"
-                  disabled={saving}
+                  disabled={saving || loading}
                   data-testid="save-imported-btn"
                 >
                   {saving ? (
@@ -230,6 +244,7 @@ export const ImportRecipe = () => {
                   variant="outline"
                   className="rounded-full"
                   onClick={() => setExtractedRecipe(null)}
+                  disabled={loading}
                 >
                   Try Another URL
                 </Button>
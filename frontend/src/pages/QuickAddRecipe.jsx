@@ -42,6 +42,15 @@ export const QuickAddRecipe = () => {
   const [extractedRecipe, setExtractedRecipe] = useState(null);
   const [saving, setSaving] = useState(false);
 
+  const extracting = pasteLoading || urlLoading;
+
+  // Show each field as soon as the model has written it
+  const showField = (event) => {
+    if (event.type === 'field') {
+      setExtractedRecipe((current) => ({ ...current, [event.key]: event.value }));
+    }
+  };
+
   const handlePasteSubmit = async () => {
     if (!pasteText.trim()) {
       toast.error('Please paste a recipe');
@@ -50,10 +59,10 @@ export const QuickAddRecipe = () => {
     
     setPasteLoading(true);
     try {
-      const res = await aiApi.importText(pasteText);
-      setExtractedRecipe(res.data);
+      setExtractedRecipe(await aiApi.importText(pasteText, showField));
       toast.success('Recipe parsed successfully!');
     } catch (error) {
+      setExtractedRecipe(null);
       toast.error(error.response?.data?.detail || 'Failed to parse recipe');
     } finally {
       setPasteLoading(false);
@@ -68,10 +77,10 @@ export const QuickAddRecipe = () => {
     
     setUrlLoading(true);
     try {
-      const res = await aiApi.importUrl(url);
-      setExtractedRecipe(res.data);
+      setExtractedRecipe(await aiApi.importUrl(url, showField));
       toast.success('Recipe extracted successfully!');
     } catch (error) {
+      setExtractedRecipe(null);
       toast.error(error.response?.data?.detail || 'Failed to extract recipe');
     } finally {
       setUrlLoading(false);
@@ -309,16 +318,23 @@ export const QuickAddRecipe = () => {
             >
               <div className="flex items-center justify-between">
                 <h2 className="font-heading text-lg font-semibold">Recipe Preview</h2>
-                <div className="flex items-center gap-2 text-sm text-sage">
-                  <Check className="w-4 h-4" />
-                  Ready to save
-                </div>
+                {extracting ? (
+                  <div className="flex items-center gap-2 text-sm text-muted-foreground">
+                    <Loader2 className="w-4 h-4 animate-spin" />
+                    Extracting...
+                  </div>
+                ) : (
+                  <div className="flex items-center gap-2 text-sm text-sage">
+                    <Check className="w-4 h-4" />
+                    Ready to save
+                  </div>
+                )}
               </div>
 
               <div className="p-4 bg-cream-subtle rounded-xl space-y-4">
                 <div>
                   <p className="text-xs text-muted-foreground uppercase tracking-wide">Title</p>
-                  <p className="font-heading font-semibold text-lg">{extractedRecipe.title}</p>
+                  <p className="font-heading font-semibold text-lg">{extractedRecipe.title || '...'}</p>
                 </div>
 
                 {extractedRecipe.description && (
@@ -375,7 +391,7 @@ export const QuickAddRecipe = () => {
               <div className="flex gap-3">
                 <Button
                   onClick={handleSaveRecipe}
-                  disabled={saving}
+                  disabled={saving || extracting}
                   className="flex-1 rounded-full bg-sage hover:bg-sage-dark h-12"
                   data-testid="save-recipe-btn"
                 >
@@ -391,6 +407,7 @@ export const QuickAddRecipe = () => {
                 <Button
                   variant="outline"
                   onClick={() => setExtractedRecipe(null)}
+                  disabled={extracting}
                   className="rounded-full"
                 >
                   Try Again
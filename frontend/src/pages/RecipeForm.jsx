@@ -48,6 +48,8 @@ export const RecipeForm = () => {
   const [imageUrl, setImageUrl] = useState('');
   const [ingredients, setIngredients] = useState([{ ...emptyIngredient }]);
   const [instructions, setInstructions] = useState(['']);
+  // Version being edited; saving fails with 412 if someone saved since
+  const [etag, setEtag] = useState(null);
 
   useEffect(() => {
     if (isEditing) {
@@ -60,6 +62,7 @@ export const RecipeForm = () => {
     try {
       const res = await recipeApi.getOne(id);
       const recipe = res.data;
+      setEtag(res.headers.etag || null);
       setTitle(recipe.title);
       setDescription(recipe.description || '');
       setCategory(recipe.category);
@@ -115,7 +118,7 @@ export const RecipeForm = () => {
 
     try {
       if (isEditing) {
-        await recipeApi.update(id, recipeData);
+        await recipeApi.update(id, recipeData, etag);
         toast.success('Recipe updated');
       } else {
         const res = await recipeApi.create(recipeData);
@@ -125,6 +128,11 @@ export const RecipeForm = () => {
       }
       navigate(`/recipes/${id}`);
     } catch (error) {
+      if (error.response?.status === 412) {
+        // Keep the form so nothing typed is lost
+        toast.error('This recipe was changed elsewhere. Reload the page to see the latest version.');
+        return;
+      }
       toast.error(isEditing ? 'Failed to update recipe' : 'Failed to create recipe');
     } finally {
       setSaving(false);
@@ -145,6 +153,7 @@ export const RecipeForm = () => {
     try {
       const res = await recipeApi.uploadImage(id, file);
       setImageUrl(res.data.image_url);
+      setEtag(res.headers.etag || etag);
       toast.success('Image uploaded');
     } catch (error) {
       toast.error('Failed to upload image');
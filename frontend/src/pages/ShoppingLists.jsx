@@ -29,6 +29,8 @@ export const ShoppingLists = () => {
   const [lists, setLists] = useState([]);
   const [loading, setLoading] = useState(true);
   const [selectedList, setSelectedList] = useState(null);
+  // Version of selectedList the next update is conditional on
+  const [listEtag, setListEtag] = useState(null);
   const [showCreateDialog, setShowCreateDialog] = useState(false);
   const [newListName, setNewListName] = useState('');
   const [creating, setCreating] = useState(false);
@@ -44,7 +46,7 @@ export const ShoppingLists = () => {
       const res = await shoppingListApi.getAll();
       setLists(res.data);
       if (res.data.length > 0 && !selectedList) {
-        setSelectedList(res.data[0]);
+        await openList(res.data[0].id);
       }
     } catch (error) {
       toast.error('Failed to load shopping lists');
@@ -53,6 +55,40 @@ export const ShoppingLists = () => {
     }
   };
 
+  const showList = (res) => {
+    setSelectedList(res.data);
+    setListEtag(res.headers.etag || null);
+    setLists((current) => current.map(l => l.id === res.data.id ? res.data : l));
+  };
+
+  // Fetched on its own so updates can carry its ETag
+  const openList = async (listId) => {
+    try {
+      showList(await shoppingListApi.getOne(listId));
+    } catch (error) {
+      toast.error('Failed to load shopping list');
+    }
+  };
+
+  const saveItems = async (items, errorMessage) => {
+    try {
+      const res = await shoppingListApi.update(selectedList.id, {
+        name: selectedList.name,
+        items,
+      }, listEtag);
+      showList(res);
+      return true;
+    } catch (error) {
+      if (error.response?.status === 412) {
+        toast.error('Someone else changed this list. Showing the latest version.');
+        await openList(selectedList.id);
+      } else {
+        toast.error(errorMessage);
+      }
+      return false;
+    }
+  };
+
   const handleCreateList = async () => {
     if (!newListName.trim()) return;
     
@@ -61,6 +97,7 @@ export const ShoppingLists = () => {
       const res = await shoppingListApi.create({ name: newListName, items: [] });
       setLists([res.data, ...lists]);
       setSelectedList(res.data);
+      setListEtag(res.headers.etag || null);
       setShowCreateDialog(false);
       setNewListName('');
       toast.success('List created');
@@ -79,7 +116,10 @@ export const ShoppingLists = () => {
       const newLists = lists.filter(l => l.id !== listId);
       setLists(newLists);
       if (selectedList?.id === listId) {
-        setSelectedList(newLists[0] || null);
+        setSelectedList(null);
+        if (newLists[0]) {
+          await openList(newLists[0].id);
+        }
       }
       toast.success('List deleted');
     } catch (error) {
@@ -96,16 +136,7 @@ export const ShoppingLists = () => {
       checked: !updatedItems[itemIndex].checked,
     };
 
-    try {
-      const res = await shoppingListApi.update(selectedList.id, {
-        name: selectedList.name,
-        items: updatedItems,
-      });
-      setSelectedList(res.data);
-      setLists(lists.map(l => l.id === res.data.id ? res.data : l));
-    } catch (error) {
-      toast.error('Failed to update item');
-    }
+    await saveItems(updatedItems, 'Failed to update item');
   };
 
   const handleAddItem = async () => {
@@ -118,17 +149,9 @@ export const ShoppingLists = () => {
       checked: false,
     };
 
-    try {
-      const res = await shoppingListApi.update(selectedList.id, {
-        name: selectedList.name,
-        items: [...selectedList.items, newItem],
-      });
-      setSelectedList(res.data);
-      setLists(lists.map(l => l.id === res.data.id ? res.data : l));
+    if (await saveItems([...selectedList.items, newItem], 'Failed to add item')) {
       setNewItemName('');
       setNewItemAmount('');
-    } catch (error) {
-      toast.error('Failed to add item');
     }
   };
 
@@ -137,16 +160,7 @@ export const ShoppingLists = () => {
 
     const updatedItems = selectedList.items.filter((_, idx) => idx !== itemIndex);
 
-    try {
-      const res = await shoppingListApi.update(selectedList.id, {
-        name: selectedList.name,
-        items: updatedItems,
-      });
-      setSelectedList(res.data);
-      setLists(lists.map(l => l.id === res.data.id ? res.data : l));
-    } catch (error) {
-      toast.error('Failed to remove item');
-    }
+    await saveItems(updatedItems, 'Failed to remove item');
   };
 
   const checkedCount = selectedList?.items.filter(i => i.checked).length || 0;
@@ -237,7 +251,7 @@ export const ShoppingLists = () => {
                       ? 'bg-sage text-white'
                       : 'bg-white border border-border/60 hover:border-sage'
                   }`}
-                  onClick={() => setSelectedList(list)}
+                  onClick={() => openList(list.id)}
                 >
                   <div className="flex items-center justify-between">
                     <div>